@@ -1,4 +1,5 @@
 import os
+import time
 from flask import Flask
 from .extensions import db, socketio
 from .routes.customer import customer_bp
@@ -7,9 +8,20 @@ from .routes.cashier import cashier_bp
 from .routes.monitor import monitor_bp
 from .routes.monitor_snapshot import snapshot_bp
 from .routes.auth import auth_bp
+from .routes.internal import internal_bp
+from .routes.reports import reports_bp
+from .instrumentation import instrument_app
+from .utils.log import configure_logging, get_logger
+from .utils.message_queue import create_client_manager, start_listening
+from .utils import packet_json
+from .utils.pool_metrics import TimedQueuePool, pool_metrics
 
 
 def create_app() -> Flask:
+    started = time.perf_counter()
+
+    # Structured logs are written by a background listener, never on the request path
+    configure_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "text"))
 
     app = Flask(__name__, static_folder="static", template_folder="templates")
     app.url_map.strict_slashes = False
@@ -21,19 +33,84 @@ def create_app() -> Flask:
     mysql_port = os.getenv("MYSQL_PORT", "3306")
     mysql_db = os.getenv("MYSQL_DB", "test_db")
 
-    app.config["SQLALCHEMY_DATABASE_URI"] = (
+    # DATABASE_URL (any SQLAlchemy URL, e.g. sqlite:///load.db) overrides the MySQL settings
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL") or (
         f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_db}"
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # Connection pool. Every request and Socket.IO event holds a session (and so a
+    # connection) until it finishes, so size + overflow bounds concurrent handlers
+    if ":memory:" not in app.config["SQLALCHEMY_DATABASE_URI"]:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            "poolclass": TimedQueuePool,
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        }
+        if app.config["SQLALCHEMY_DATABASE_URI"].startswith("mysql"):
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {
+                "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10")),
+            }
+
+    # Startup DDL: "check" compares one stored schema-version row and only runs
+    # create_all() when it differs, "create" always runs it, "skip" never touches the database
+    app.config["DB_SCHEMA_MODE"] = os.getenv("DB_SCHEMA_MODE", "check")
+
+    # Handler and view calls slower than this are logged with their SQL and emit counts
+    app.config["SLOW_CALL_MS"] = float(os.getenv("SLOW_CALL_MS", "500"))
+
+    # Optional shared secret for /internal/* (without it only loopback clients are allowed)
+    app.config["INTERNAL_METRICS_TOKEN"] = os.getenv("INTERNAL_METRICS_TOKEN", "")
+    # Optional shared secret for /reports/* besides a cashier login (X-Reports-Token header)
+    app.config["REPORTS_TOKEN"] = os.getenv("REPORTS_TOKEN", "")
+
+    # Auth token cache: how long a validated token is trusted from memory, and
+    # how often the sliding token_expires_at is written back (seconds)
+    app.config["AUTH_TOKEN_CACHE_TTL"] = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+    app.config["AUTH_TOKEN_REFRESH_INTERVAL"] = int(os.getenv("AUTH_TOKEN_REFRESH_INTERVAL", "300"))
+
+    # Seconds a computed /room_status response may be reused (0 disables)
+    app.config["ROOM_STATUS_CACHE_TTL"] = float(os.getenv("ROOM_STATUS_CACHE_TTL", "2"))
+
+    # Seconds before the cached service catalog is rebuilt even without a local
+    # change, to pick up edits made by other processes such as scripts/seed.py (0 = never)
+    app.config["SERVICE_CATALOG_TTL"] = float(os.getenv("SERVICE_CATALOG_TTL", "300"))
+    # Minimum seconds between rebuilds triggered by unknown service or classification ids
+    app.config["SERVICE_CATALOG_MIN_REFRESH"] = float(os.getenv("SERVICE_CATALOG_MIN_REFRESH", "30"))
+
+    # Transaction codes: numbers reserved per counter round trip, and reset policy (daily/never)
+    app.config["TRANSACTION_CODE_BLOCK_SIZE"] = int(os.getenv("TRANSACTION_CODE_BLOCK_SIZE", "10"))
+    app.config["TRANSACTION_CODE_RESET"] = os.getenv("TRANSACTION_CODE_RESET", "daily")
+
+    # Archival of paid transactions into the *_history tables
+    app.config["ARCHIVE_AFTER_HOURS"] = float(os.getenv("ARCHIVE_AFTER_HOURS", "24"))
+    app.config["ARCHIVE_BATCH_SIZE"] = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    app.config["ARCHIVE_INTERVAL_SECONDS"] = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
     db.init_app(app)
+    with app.app_context():
+        pool_metrics.instrument(db.engine)
 
     async_mode = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
-    socketio.init_app(app, async_mode=async_mode, cors_allowed_origins="*")
+    # With several worker processes, emits fan out through a message queue (redis://, amqp://, ...;
+    # local:// is an in-process stand-in for tests)
+    message_queue = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+    socketio_options = {}
+    if message_queue:
+        socketio_options["client_manager"] = create_client_manager(
+            message_queue, channel=os.getenv("SOCKETIO_CHANNEL", "flask-socketio")
+        )
+    # packet_json lets shared transaction payloads be encoded once (see app/transaction_payloads.py)
+    socketio.init_app(app, async_mode=async_mode, cors_allowed_origins="*", json=packet_json, **socketio_options)
+    if message_queue:
+        start_listening(socketio.server)
 
-    # Create database tables when this file runs
-    with app.app_context():
-        db.create_all()
+    # Create database tables only when the schema changed (see app/schema.py)
+    from .schema import ensure_schema
+    schema_state = ensure_schema(app)
 
     # Register blueprints from routes folder
     app.register_blueprint(customer_bp)
@@ -42,11 +119,29 @@ def create_app() -> Flask:
     app.register_blueprint(monitor_bp)
     app.register_blueprint(snapshot_bp)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(internal_bp)
+    app.register_blueprint(reports_bp)
 
     # Import socket.io event handlers
     # import the socketio_events module from the same package/folder as this file
     from . import socketio_events
 
+    # Latency, SQL and emit metrics for every view and Socket.IO handler (/internal/metrics)
+    with app.app_context():
+        instrument_app(app, db.engine)
+
+    # Archival: `flask archive-transactions`, plus an optional background loop
+    from .archive import archive_command, start_archiver
+    app.cli.add_command(archive_command)
+    start_archiver(app)
+
+    # Daily rollups: `flask rebuild-rollups [--from DAY] [--to DAY]`
+    from .rollups import rebuild_rollups_command
+    app.cli.add_command(rebuild_rollups_command)
+
+    get_logger("app").info("App ready", extra={
+        "startup_ms": round((time.perf_counter() - started) * 1000), "schema": schema_state,
+    })
     return app
 
 # Expose socketio for run.py
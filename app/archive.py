@@ -0,0 +1,139 @@
+"""Moves old paid transactions out of the live tables into the *_history tables"""
+from __future__ import annotations
+from datetime import date, datetime, timedelta
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, literal, select, update
+
+from .extensions import db, socketio
+from .utils.log import get_logger
+from .models import (
+    Payment,
+    PaymentHistory,
+    Room,
+    Transaction,
+    TransactionHistory,
+    TransactionItem,
+    TransactionItemHistory,
+    TransactionStatus,
+)
+
+log = get_logger("archive")
+
+# (live model, history model, column linking the row to its transaction)
+ARCHIVED_TABLES = (
+    (Transaction, TransactionHistory, Transaction.id),
+    (TransactionItem, TransactionItemHistory, TransactionItem.transaction_id),
+    (Payment, PaymentHistory, Payment.transaction_id),
+)
+
+
+def find_transaction(tx_id: int) -> Transaction | TransactionHistory | None:
+    """
+    A transaction by id from the live tables, else from history once archived.
+    Both expose the same attributes (therapist, items, payment, ...).
+    """
+    return db.session.get(Transaction, tx_id) or db.session.get(TransactionHistory, tx_id)
+
+
+def find_transaction_by_code(code: str, day: date | None = None) -> Transaction | TransactionHistory | None:
+    """
+    The latest transaction holding `code`, live first, then archived. Codes are
+    reused after the daily reset, so pass the `day` it was created to pin one.
+    """
+    for model in (Transaction, TransactionHistory):
+        query = model.query.filter(model.code == code)
+        if day is not None:
+            start = datetime.combine(day, datetime.min.time())
+            query = query.filter(model.created_at >= start, model.created_at < start + timedelta(days=1))
+        tx = query.order_by(model.id.desc()).first()
+        if tx is not None:
+            return tx
+    return None
+
+
+def _archive_batch(cutoff: datetime, batch_size: int) -> int:
+    """Copy one batch of paid transactions with their items and payments, then delete them"""
+    ids = db.session.execute(
+        select(Transaction.id)
+        .where(Transaction.status == TransactionStatus.paid, Transaction.paid_at < cutoff)
+        .order_by(Transaction.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    archived_at = datetime.now()
+    for live, history, link in ARCHIVED_TABLES:
+        columns = [c.name for c in live.__table__.columns]
+        source = select(*[live.__table__.c[name] for name in columns]).where(link.in_(ids))
+        if history is TransactionHistory:
+            columns.append("archived_at")
+            source = source.add_columns(literal(archived_at))
+        db.session.execute(insert(history.__table__).from_select(columns, source))
+
+    db.session.execute(update(Room).where(Room.current_transaction_id.in_(ids)).values(current_transaction_id=None))
+    # Children first so foreign keys hold on every backend
+    for live, history, link in reversed(ARCHIVED_TABLES):
+        db.session.execute(delete(live.__table__).where(link.in_(ids)))
+    db.session.commit()
+    return len(ids)
+
+
+def archive_paid_transactions(older_than: timedelta | None = None, batch_size: int | None = None) -> int:
+    """
+    Archive every paid transaction whose paid_at is older than `older_than`
+    (default ARCHIVE_AFTER_HOURS), one committed batch at a time so live
+    tables are never locked for long. Returns the number archived.
+    """
+    config = current_app.config
+    if older_than is None:
+        older_than = timedelta(hours=config.get("ARCHIVE_AFTER_HOURS", 24))
+    if batch_size is None:
+        batch_size = config.get("ARCHIVE_BATCH_SIZE", 500)
+
+    cutoff = datetime.now() - older_than
+    total = 0
+    while True:
+        try:
+            moved = _archive_batch(cutoff, batch_size)
+        except Exception:
+            db.session.rollback()
+            raise
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+def start_archiver(app: Flask) -> None:
+    """Run archive_paid_transactions every ARCHIVE_INTERVAL_SECONDS in the background"""
+    interval = app.config.get("ARCHIVE_INTERVAL_SECONDS", 3600)
+    if interval <= 0:
+        return
+
+    def run():
+        while True:
+            socketio.sleep(interval)
+            with app.app_context():
+                try:
+                    moved = archive_paid_transactions()
+                    if moved:
+                        log.info("Archived paid transactions", extra={"count": moved})
+                except Exception:
+                    log.exception("Transaction archival failed")
+
+    socketio.start_background_task(run)
+
+
+@click.command("archive-transactions")
+@click.option("--older-than-hours", type=float, default=None, help="Defaults to ARCHIVE_AFTER_HOURS.")
+@click.option("--batch-size", type=int, default=None, help="Defaults to ARCHIVE_BATCH_SIZE.")
+@with_appcontext
+def archive_command(older_than_hours, batch_size):
+    """Move old paid transactions into the history tables."""
+    older_than = timedelta(hours=older_than_hours) if older_than_hours is not None else None
+    moved = archive_paid_transactions(older_than, batch_size)
+    click.echo(f"Archived {moved} paid transactions")
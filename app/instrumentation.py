@@ -0,0 +1,218 @@
+"""Per-call latency, SQL and emit metrics for Socket.IO handlers and Flask views"""
+from __future__ import annotations
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .extensions import socketio
+from .utils.log import get_logger
+
+log = get_logger("metrics")
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are reported as bucket upper bounds"""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = math.ceil(pct / 100 * self.count)
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [f"le_{b}" for b in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class CallStats:
+    """Aggregates for one handler or view"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.wall_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.db_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.db_statements = Histogram(COUNT_BUCKETS)
+        self.emits = 0
+        self.packets = 0
+        self.payload_bytes = Histogram(COUNT_BUCKETS + (10_000, 100_000, 1_000_000))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wall_ms": self.wall_ms.to_dict(),
+            "db_ms": self.db_ms.to_dict(),
+            "db_statements": self.db_statements.to_dict(),
+            "emits": self.emits,
+            "packets": self.packets,
+            "payload_bytes": self.payload_bytes.to_dict(),
+        }
+
+
+class _Call:
+    """Counters for the call in progress on this thread/greenlet"""
+    __slots__ = ("statements", "db_time", "emits", "packets", "payload_bytes")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.emits = 0
+        self.packets = 0
+        self.payload_bytes = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: dict[tuple[str, str], CallStats] = {}
+        self.slow_call_ms = 500.0
+
+    def current(self) -> _Call | None:
+        return getattr(self._local, "call", None)
+
+    def record(self, kind: str, name: str, call: _Call, wall: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats.get((kind, name))
+            if stats is None:
+                stats = self._stats[(kind, name)] = CallStats()
+            stats.calls += 1
+            stats.errors += failed
+            stats.wall_ms.observe(wall * 1000)
+            stats.db_ms.observe(call.db_time * 1000)
+            stats.db_statements.observe(call.statements)
+            stats.emits += call.emits
+            stats.packets += call.packets
+            stats.payload_bytes.observe(call.payload_bytes)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            data: dict[str, Any] = {}
+            for (kind, name), stats in sorted(self._stats.items()):
+                data.setdefault(kind, {})[name] = stats.to_dict()
+            return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def instrumented(self, kind: str, name: str) -> Callable:
+        """Decorator recording wall time, SQL, emits and bytes sent per call"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.current() is not None:
+                    return func(*args, **kwargs)  # Nested: counted by the outer call
+
+                call = self._local.call = _Call()
+                started = time.perf_counter()
+                failed = True
+                try:
+                    result = func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    wall = time.perf_counter() - started
+                    self._local.call = None
+                    self.record(kind, name, call, wall, failed)
+                    if wall * 1000 >= self.slow_call_ms:
+                        log.warning("Slow call", extra={
+                            "kind": kind, "call": name, "wall_ms": round(wall * 1000, 1),
+                            "db_statements": call.statements, "db_ms": round(call.db_time * 1000, 1),
+                            "emits": call.emits, "packets": call.packets,
+                        })
+            return wrapper
+        return decorator
+
+    # Hooks feeding the current call
+
+    def instrument_engine(self, engine: Engine) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info["metrics_started"] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            call = self.current()
+            if call is not None:
+                call.statements += 1
+                call.db_time += time.perf_counter() - conn.info["metrics_started"]
+
+    def instrument_socketio(self, server) -> None:
+        """Count emits, and packets and bytes actually sent (broadcast fan-out)"""
+        server_emit = server.emit
+        send_packet = server._send_eio_packet
+
+        def emit(*args, **kwargs):
+            call = self.current()
+            if call is not None:
+                call.emits += 1
+            return server_emit(*args, **kwargs)
+
+        def send(eio_sid, pkt):
+            call = self.current()
+            if call is not None:
+                call.packets += 1
+                if isinstance(pkt.data, (str, bytes)):
+                    call.payload_bytes += len(pkt.data)
+            return send_packet(eio_sid, pkt)
+
+        server.emit = emit
+        server._send_eio_packet = send
+
+
+metrics = MetricsRegistry()
+
+
+def on_event(event_name: str) -> Callable:
+    """socketio.on(event_name) with instrumentation"""
+    def decorator(func: Callable) -> Callable:
+        return socketio.on(event_name)(metrics.instrumented("socket", event_name)(func))
+    return decorator
+
+
+def instrument_app(app: Flask, engine: Engine) -> None:
+    """Wrap every registered view and hook the engine and Socket.IO server"""
+    metrics.slow_call_ms = app.config.get("SLOW_CALL_MS", 500)
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint != "static":
+            app.view_functions[endpoint] = metrics.instrumented("http", endpoint)(view)
+    metrics.instrument_engine(engine)
+    metrics.instrument_socketio(socketio.server)
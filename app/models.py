@@ -5,7 +5,7 @@ import enum
 # import string
 # from typing import Optional, Any
 
-from sqlalchemy import Integer, String, DateTime, Enum, ForeignKey, Float, Boolean, Column
+from sqlalchemy import Integer, String, Date, DateTime, Enum, ForeignKey, Float, Boolean, Column, Index
 from sqlalchemy.orm import relationship
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -20,6 +20,17 @@ class TransactionCounter(Base):
     
     id = db.Column(Integer, primary_key=True)
     next_number = db.Column(Integer, nullable=False, default=1)
+    # Day the current numbering started (daily reset policy)
+    period = db.Column(Date, nullable=True)
+
+
+class SchemaVersion(Base):
+    """Single row recording the schema fingerprint the database was last built for (app/schema.py)"""
+    __tablename__ = "schema_version"
+
+    id = db.Column(Integer, primary_key=True)
+    version = db.Column(String(64), nullable=False)
+    applied_at = db.Column(DateTime, default=datetime.now)
 
 
 class TransactionStatus(enum.Enum):
@@ -113,11 +124,19 @@ class Cashier(db.Model):
         return check_password_hash(self.password_hash, password)
 
 
+# Live tables archived into *_history keep their ids there, so ids must never be
+# handed out again once the highest rows are archived: AUTOINCREMENT on SQLite
+# (plain rowids reuse max(id) + 1); MySQL needs 8.0+, where AUTO_INCREMENT
+# survives restarts instead of resetting to max(id) + 1.
+MONOTONIC_IDS = {"sqlite_autoincrement": True}
+
+
 class Transaction(db.Model):
     __tablename__ = "transactions"
 
     id = db.Column(Integer, primary_key=True)
-    code = db.Column(String(4), unique=True)
+    # Not unique: 4-digit codes wrap around and restart daily (see CodeAllocator)
+    code = db.Column(String(4), index=True)
     # customer_name = db.Column(String(120))
 
     status = db.Column(Enum(TransactionStatus), default=TransactionStatus.selecting, nullable=False)
@@ -145,21 +164,20 @@ class Transaction(db.Model):
     items = relationship("TransactionItem", back_populates="transaction", cascade="all, delete-orphan")
     payment = relationship("Payment", back_populates="transaction", uselist=False)
 
+    __table_args__ = (
+        # Heads of the therapist and cashier work queues (see app/work_queue.py)
+        Index("ix_transactions_status_selection_confirmed_at", "status", "selection_confirmed_at"),
+        Index("ix_transactions_status_service_finish_at", "status", "service_finish_at"),
+        # Therapist history pages (keyset on service_finish_at, see app/utils/pagination.py)
+        Index("ix_transactions_therapist_finish", "therapist_id", "service_finish_at"),
+        MONOTONIC_IDS,
+    )
+
     @staticmethod
     def generate_code() -> str:
-        # Get or create the counter record
-        counter = db.session.query(TransactionCounter).first()
-        if not counter:
-            counter = TransactionCounter(next_number=1)
-            db.session.add(counter)
-            db.session.flush()
-        
-        # Get the current number and increment for next time
-        current_number = counter.next_number
-        counter.next_number += 1
-        
-        # Format as 4-digit padded integer (0001, 0002, etc.)
-        return f"{current_number:04d}"
+        # Served from a per-process block reserved on the counter row
+        from .utils.code_allocator import code_allocator
+        return code_allocator.allocate()
 
     def recompute_totals(self) -> None:
         total = 0.0
@@ -175,7 +193,7 @@ class TransactionItem(db.Model):
     __tablename__ = "transaction_items"
 
     id = db.Column(Integer, primary_key=True)
-    transaction_id = db.Column(ForeignKey("transactions.id", ondelete="CASCADE"))
+    transaction_id = db.Column(ForeignKey("transactions.id", ondelete="CASCADE"), index=True)
     service_id = db.Column(ForeignKey("services.id"))
     service_classification_id = db.Column(ForeignKey("service_classifications.id"))
 
@@ -186,6 +204,8 @@ class TransactionItem(db.Model):
     service = relationship("Service", back_populates="items")
     service_classification = relationship("ServiceClassification")
 
+    __table_args__ = (MONOTONIC_IDS,)
+
 
 class Room(db.Model):
     __tablename__ = "rooms"
@@ -214,3 +234,126 @@ class Payment(db.Model):
 
     transaction = relationship("Transaction", back_populates="payment")
     cashier = relationship("Cashier", back_populates="payments")
+
+    __table_args__ = (
+        # Cashier payment history pages (keyset on created_at, see app/utils/pagination.py)
+        Index("ix_payments_cashier_created", "cashier_id", "created_at"),
+        MONOTONIC_IDS,
+    )
+
+
+# Archived (cold) copies of paid transactions, moved out of the live tables by
+# app/archive.py. Column names match the live tables so rows serialize the same way.
+
+class TransactionHistory(db.Model):
+    __tablename__ = "transactions_history"
+
+    id = db.Column(Integer, primary_key=True, autoincrement=False)
+    code = db.Column(String(4), index=True)
+    status = db.Column(Enum(TransactionStatus), nullable=False)
+
+    therapist_id = db.Column(ForeignKey("therapists.id"))
+    therapist = relationship("Therapist")
+
+    room_number = db.Column(String(20))
+
+    assigned_cashier_id = db.Column(ForeignKey("cashiers.id"))
+    assigned_cashier = relationship("Cashier")
+
+    total_amount = db.Column(Float, default=0.0)
+    total_duration_minutes = db.Column(Integer, default=0)
+
+    created_at = db.Column(DateTime)
+    selection_confirmed_at = db.Column(DateTime)
+    therapist_confirmed_at = db.Column(DateTime)
+    service_start_at = db.Column(DateTime)
+    service_finish_at = db.Column(DateTime)
+    cashier_claimed_at = db.Column(DateTime)
+    paid_at = db.Column(DateTime)
+    archived_at = db.Column(DateTime, default=datetime.now)
+
+    items = relationship("TransactionItemHistory", back_populates="transaction")
+    payment = relationship("PaymentHistory", back_populates="transaction", uselist=False)
+
+    __table_args__ = (
+        Index("ix_transactions_history_therapist_finish", "therapist_id", "service_finish_at"),
+        Index("ix_transactions_history_paid_at", "paid_at"),
+    )
+
+
+class TransactionItemHistory(db.Model):
+    __tablename__ = "transaction_items_history"
+
+    id = db.Column(Integer, primary_key=True, autoincrement=False)
+    transaction_id = db.Column(ForeignKey("transactions_history.id", ondelete="CASCADE"), index=True)
+    service_id = db.Column(ForeignKey("services.id"))
+    service_classification_id = db.Column(ForeignKey("service_classifications.id"))
+
+    price = db.Column(Float, nullable=False)
+    duration_minutes = db.Column(Integer, nullable=False, default=60)
+
+    transaction = relationship("TransactionHistory", back_populates="items")
+    service = relationship("Service")
+    service_classification = relationship("ServiceClassification")
+
+
+class PaymentHistory(db.Model):
+    __tablename__ = "payments_history"
+
+    id = db.Column(Integer, primary_key=True, autoincrement=False)
+    transaction_id = db.Column(ForeignKey("transactions_history.id", ondelete="CASCADE"), unique=True)
+    cashier_id = db.Column(ForeignKey("cashiers.id"))
+
+    amount_due = db.Column(Float, nullable=False)
+    amount_paid = db.Column(Float, nullable=False)
+    change_amount = db.Column(Float, nullable=False, default=0.0)
+    method = db.Column(String(40), default="cash")
+    created_at = db.Column(DateTime)
+
+    transaction = relationship("TransactionHistory", back_populates="payment")
+    cashier = relationship("Cashier")
+
+    __table_args__ = (
+        Index("ix_payments_history_cashier_created", "cashier_id", "created_at"),
+    )
+
+
+class DailyRollup(db.Model):
+    """
+    Paid revenue and throughput per paid-at day x therapist x service x cashier,
+    maintained by app/rollups.py. 0 stands for "none" in the key columns, which
+    are plain integers so the unique key also holds on MySQL (NULLs never collide).
+
+    Item measures (revenue, item_count, service_minutes) go to each item's service.
+    Transaction measures (transaction_count and the duration sums) go to the row of
+    every distinct service in the transaction, and once more to a row with
+    service_id -1 (rollups.ALL_SERVICES) that holds no item measures; reports not
+    grouped by service read transaction measures from those rows only, so every
+    transaction counts once. Averages are the *_seconds sums over their *_count.
+    """
+    __tablename__ = "daily_rollups"
+
+    id = db.Column(Integer, primary_key=True)
+    day = db.Column(Date, nullable=False)
+    therapist_id = db.Column(Integer, nullable=False, default=0)
+    service_id = db.Column(Integer, nullable=False, default=0)
+    cashier_id = db.Column(Integer, nullable=False, default=0)
+
+    revenue = db.Column(Float, nullable=False, default=0.0)
+    item_count = db.Column(Integer, nullable=False, default=0)
+    service_minutes = db.Column(Integer, nullable=False, default=0)
+    transaction_count = db.Column(Integer, nullable=False, default=0)
+
+    # selection_confirmed_at -> service_start_at
+    wait_seconds = db.Column(Float, nullable=False, default=0.0)
+    wait_count = db.Column(Integer, nullable=False, default=0)
+    # service_start_at -> service_finish_at
+    service_seconds = db.Column(Float, nullable=False, default=0.0)
+    service_count = db.Column(Integer, nullable=False, default=0)
+    # service_finish_at -> paid_at
+    pay_seconds = db.Column(Float, nullable=False, default=0.0)
+    pay_count = db.Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ux_daily_rollups_key", "day", "therapist_id", "service_id", "cashier_id", unique=True),
+    )
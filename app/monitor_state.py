@@ -0,0 +1,369 @@
+"""In-memory projection of the lobby monitor board, kept current by transaction events"""
+from __future__ import annotations
+from datetime import datetime
+import queue
+import threading
+from typing import Any, Callable
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from .extensions import socketio
+from .models import Cashier, Room, Therapist, Transaction, TransactionItem, TransactionStatus
+from .transaction_payloads import serialize_monitor_transaction, transaction_payloads
+from .utils.log import get_logger
+from .utils.message_queue import on_worker_event, publish_to_workers
+from .wait_estimator import WaitEstimator
+
+log = get_logger("monitor")
+
+# Worker event carrying board changes to the other processes
+BOARD_CHANGE_EVENT = "monitor_board_change"
+
+
+# Statuses that appear somewhere on the board
+ACTIVE_STATUSES = (
+    TransactionStatus.pending_therapist,
+    TransactionStatus.therapist_confirmed,
+    TransactionStatus.in_service,
+    TransactionStatus.finished,
+    TransactionStatus.awaiting_payment,
+    TransactionStatus.paying,
+)
+
+# Timestamp that orders a transaction within its board column
+ORDER_FIELDS = {
+    TransactionStatus.pending_therapist: "selection_confirmed_at",
+    TransactionStatus.therapist_confirmed: "therapist_confirmed_at",
+    TransactionStatus.in_service: "service_start_at",
+    TransactionStatus.finished: "service_finish_at",
+    TransactionStatus.awaiting_payment: "cashier_claimed_at",
+    TransactionStatus.paying: "cashier_claimed_at",
+}
+
+
+def load_active_transactions(statuses=ACTIVE_STATUSES) -> list[Transaction]:
+    """
+    Fetch every transaction in `statuses` with its therapist, cashier and
+    items eager-loaded, in a fixed number of statements regardless of row count.
+    """
+    return (
+        Transaction.query
+        .filter(Transaction.status.in_(statuses))
+        .options(
+            joinedload(Transaction.therapist),
+            joinedload(Transaction.assigned_cashier),
+            selectinload(Transaction.items).joinedload(TransactionItem.service),
+            selectinload(Transaction.items).joinedload(TransactionItem.service_classification),
+        )
+        .all()
+    )
+
+
+def order_key(tx: Transaction):
+    """Sort key within a board column; NULL timestamps first, as MySQL orders them"""
+    order_at = getattr(tx, ORDER_FIELDS[tx.status])
+    return (order_at is not None, order_at or datetime.min, tx.id)
+
+
+def therapist_room(therapist: Therapist) -> str | None:
+    """The room a therapist is logged in to, None when logged out, inactive or expired"""
+    logged_in = (
+        therapist.active and therapist.auth_token
+        and (therapist.token_expires_at is None or therapist.token_expires_at > datetime.now())
+    )
+    return therapist.room_number if logged_in else None
+
+
+class MonitorBoard:
+    """
+    Waiting / serving / finished / payment-assigned lists plus room and cashier
+    cards, held in memory. Every change bumps `version` and is broadcast to the
+    "monitor" room as a small delta; clients resync from snapshot() on a gap.
+
+    With several workers each process keeps its own board: changes are applied
+    locally and sent to the other workers as plain data (see apply_remote), and
+    each worker emits versioned deltas only to its own monitor clients.
+
+    Deltas are built under the lock but broadcast by one background task that
+    drains them in version order, so handlers never wait on monitor I/O.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.version = 0
+        self._transactions: dict[int, dict[str, Any]] = {}
+        self._rooms: dict[str, str] = {}  # room_number -> base status from the Room table
+        self._cashiers: dict[int, dict[str, Any]] = {}
+        self._listeners: list[Callable[[dict[str, Any] | None], None]] = []
+        # Expected waits for the waiting column, pushed as 'estimates' (see WaitEstimator)
+        self.estimator = WaitEstimator()
+        self._estimates: list[dict[str, Any]] = []
+        self._outbox: queue.Queue[dict[str, Any]] = queue.Queue()
+        self._emitter_started = False
+
+    def on_change(self, listener: Callable[[dict[str, Any] | None], None]) -> None:
+        """
+        Register a callback run with every published delta (e.g. to drop cached
+        responses), or with None for another worker's change while this board is
+        not loaded, as no delta is built then
+        """
+        self._listeners.append(listener)
+
+    # Loading
+
+    def _entry(self, tx: Transaction, base: dict[str, Any] | None = None) -> dict[str, Any]:
+        entry = dict(base) if base is not None else serialize_monitor_transaction(tx)
+        order_at = getattr(tx, ORDER_FIELDS[tx.status])
+        entry['order_at'] = order_at.isoformat() if order_at else None
+        entry['assigned_cashier_id'] = tx.assigned_cashier_id
+        return entry
+
+    @staticmethod
+    def _cashier_entry(cashier: Cashier) -> dict[str, Any]:
+        return {
+            'id': cashier.id,
+            'name': cashier.name,
+            'counter_number': cashier.counter_number or str(cashier.id),
+        }
+
+    def load(self) -> None:
+        """(Re)build the whole board from the database"""
+        with self._lock:
+            txs = load_active_transactions()
+            rooms = Room.query.order_by(Room.id).all()
+            cashiers = Cashier.query.filter_by(active=True).order_by(Cashier.counter_number).all()
+            therapists = Therapist.query.filter(Therapist.auth_token.isnot(None)).all()
+
+            self._transactions = {tx.id: self._entry(tx) for tx in txs}
+            self._rooms = {room.room_number: room.status for room in rooms}
+            self._cashiers = {c.id: self._cashier_entry(c) for c in cashiers}
+            self.estimator.load(
+                self._transactions.values(), self._rooms,
+                {t.id: room for t in therapists if (room := therapist_room(t)) is not None},
+            )
+            self._loaded = True
+            self.version += 1
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def invalidate(self) -> None:
+        """Force a reload from the database on next use"""
+        with self._lock:
+            self._loaded = False
+
+    # Derived views
+
+    def _column(self, *statuses: TransactionStatus) -> list[dict[str, Any]]:
+        values = {s.value for s in statuses}
+        rows = [t for t in self._transactions.values() if t['status'] in values]
+        rows.sort(key=lambda t: (t['order_at'] or '', t['id']))
+        return rows
+
+    def _room_view(self, room_number: str) -> dict[str, Any]:
+        in_service = preparing = None
+        for t in self._transactions.values():
+            if t['room_number'] != room_number:
+                continue
+            if t['status'] == TransactionStatus.in_service.value and in_service is None:
+                in_service = t
+            elif t['status'] == TransactionStatus.therapist_confirmed.value and preparing is None:
+                preparing = t
+
+        if in_service:
+            return {
+                'room_number': room_number,
+                'status': "on_going_service",
+                'transaction_code': in_service['code'],
+                'service_start_at': in_service['service_start_at'],
+                'total_duration_minutes': in_service['total_duration_minutes'],
+                'transaction_id': in_service['id'],
+            }
+        if preparing:
+            return {
+                'room_number': room_number,
+                'status': "occupied",
+                'transaction_code': preparing['code'],
+                'service_start_at': None,
+                'total_duration_minutes': None,
+                'transaction_id': preparing['id'],
+            }
+        return {
+            'room_number': room_number,
+            'status': self._rooms[room_number],
+            'transaction_code': None,
+            'service_start_at': None,
+            'total_duration_minutes': None,
+            'transaction_id': None,
+        }
+
+    def _cashier_view(self, cashier_id: int) -> dict[str, Any]:
+        open_statuses = (TransactionStatus.awaiting_payment.value, TransactionStatus.paying.value)
+        txs = [
+            t for t in self._transactions.values()
+            if t['assigned_cashier_id'] == cashier_id and t['status'] in open_statuses
+        ]
+        txs.sort(key=lambda t: (open_statuses.index(t['status']), t['id']))
+        return {
+            **self._cashiers[cashier_id],
+            'transaction_count': len(txs),
+            'transactions': [
+                {
+                    'id': t['id'],
+                    'code': t['code'],
+                    'total_amount': t['total_amount'],
+                    'status': t['status'],
+                } for t in txs
+            ],
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        """Full, versioned board state"""
+        with self._lock:
+            self._ensure_loaded()
+            cashier_ids = sorted(self._cashiers, key=lambda cid: self._cashiers[cid]['counter_number'])
+            return {
+                'version': self.version,
+                'waiting': self._column(TransactionStatus.pending_therapist),
+                'serving': (
+                    self._column(TransactionStatus.therapist_confirmed)
+                    + self._column(TransactionStatus.in_service)
+                ),
+                'finished': self._column(TransactionStatus.finished),
+                'payment_assigned': self._column(TransactionStatus.awaiting_payment),
+                'rooms': [self._room_view(number) for number in self._rooms],
+                'cashiers': [self._cashier_view(cid) for cid in cashier_ids],
+                'estimates': self.estimator.estimates(),
+            }
+
+    # Updates
+
+    def _publish(self, transactions=(), removed=(), rooms=(), cashiers=(), removed_cashiers=()) -> dict[str, Any]:
+        self.version += 1
+        delta = {
+            'version': self.version,
+            'transactions': list(transactions),
+            'removed': list(removed),
+            'rooms': [self._room_view(r) for r in rooms if r in self._rooms],
+            'cashiers': [self._cashier_view(c) for c in cashiers if c in self._cashiers],
+            'removed_cashiers': list(removed_cashiers),
+        }
+        # A queue or room change can move every waiting customer's estimate; omitted
+        # when nothing they depend on changed, or while the queue stays empty
+        if self.estimator.take_changed():
+            estimates = self.estimator.estimates()
+            if estimates or self._estimates:
+                delta['estimates'] = estimates
+            self._estimates = estimates
+        for listener in self._listeners:
+            listener(delta)
+        # Queued under the lock so deltas leave in version order, sent after it is released
+        self._outbox.put(delta)
+        if not self._emitter_started:
+            self._emitter_started = True
+            socketio.start_background_task(self._emit_deltas)
+        return delta
+
+    def _emit_deltas(self) -> None:
+        """Broadcast queued deltas one at a time, in the order they were published"""
+        while True:
+            delta = self._outbox.get()
+            try:
+                # Versions are per process, so the delta goes to this worker's clients only
+                socketio.emit("monitor_delta", delta, to="monitor", ignore_queue=True)
+            except Exception:
+                log.exception("Monitor delta broadcast failed", extra={"version": delta['version']})
+
+    def _apply(self, change: dict[str, Any]) -> dict[str, Any]:
+        """Apply one change (as built by the update_* methods) and publish the delta"""
+        op = change['op']
+        if op == 'transaction':
+            old = self._transactions.get(change['id'])
+            rooms = {change['room_number']}
+            cashiers = {change['assigned_cashier_id']}
+            if old:
+                rooms.add(old['room_number'])
+                cashiers.add(old['assigned_cashier_id'])
+
+            entry = change['entry']
+            self.estimator.update(old, entry)
+            if entry is not None:
+                self._transactions[change['id']] = entry
+                return self._publish(transactions=[entry], rooms=rooms, cashiers=cashiers)
+
+            self._transactions.pop(change['id'], None)
+            return self._publish(removed=[change['id']], rooms=rooms, cashiers=cashiers)
+
+        if op == 'room':
+            self._rooms[change['room_number']] = change['status']
+            self.estimator.set_room(change['room_number'], change['status'])
+            return self._publish(rooms=[change['room_number']])
+
+        if op == 'therapist':
+            # Only moves estimates: a room counts as a server while its therapist is logged in
+            self.estimator.set_therapist(change['id'], change['room_number'])
+            return self._publish()
+
+        if op == 'cashier':
+            if change['entry'] is not None:
+                self._cashiers[change['id']] = change['entry']
+                return self._publish(cashiers=[change['id']])
+            # Deactivated: the card leaves the board
+            self._cashiers.pop(change['id'], None)
+            return self._publish(removed_cashiers=[change['id']])
+
+        raise ValueError(f"Unknown board change: {op}")
+
+    def _change(self, change: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self._ensure_loaded()
+            delta = self._apply(change)
+        publish_to_workers(BOARD_CHANGE_EVENT, change)
+        return delta
+
+    def apply_remote(self, change: dict[str, Any]) -> None:
+        """Apply a change made by another worker"""
+        with self._lock:
+            if self._loaded:
+                self._apply(change)
+                return
+        # An unloaded board reads the change from the database when loaded, but
+        # responses cached from the database before it are stale now
+        for listener in self._listeners:
+            listener(None)
+
+    def update_transaction(self, tx: Transaction) -> dict[str, Any]:
+        """
+        Apply a committed transaction change and broadcast the delta. The entry
+        is built from the shared payload, so load tx with TRANSACTION_GRAPH first.
+        """
+        entry = None
+        if tx.status in ACTIVE_STATUSES:
+            entry = self._entry(tx, transaction_payloads.get(tx).monitor)
+        return self._change({
+            'op': 'transaction',
+            'id': tx.id,
+            'entry': entry,
+            'room_number': tx.room_number,
+            'assigned_cashier_id': tx.assigned_cashier_id,
+        })
+
+    def update_room(self, room: Room) -> dict[str, Any]:
+        return self._change({'op': 'room', 'room_number': room.room_number, 'status': room.status})
+
+    def update_therapist(self, therapist: Therapist) -> dict[str, Any]:
+        """Apply a therapist login or logout"""
+        return self._change({'op': 'therapist', 'id': therapist.id, 'room_number': therapist_room(therapist)})
+
+    def update_cashier(self, cashier: Cashier) -> dict[str, Any]:
+        return self._change({
+            'op': 'cashier',
+            'id': cashier.id,
+            'entry': self._cashier_entry(cashier) if cashier.active else None,
+        })
+
+
+monitor_board = MonitorBoard()
+on_worker_event(BOARD_CHANGE_EVENT, monitor_board.apply_remote)
@@ -0,0 +1,263 @@
+"""Daily revenue and throughput rollups (DailyRollup), updated on every payment and rebuildable in bulk"""
+from __future__ import annotations
+from datetime import date, datetime, timedelta
+import importlib
+from itertools import groupby
+from typing import Any, Iterable
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, delete, func, insert, select
+
+from .extensions import db
+from .models import (
+    Cashier,
+    DailyRollup,
+    Payment,
+    PaymentHistory,
+    Service,
+    Therapist,
+    Transaction,
+    TransactionHistory,
+    TransactionItem,
+    TransactionItemHistory,
+    TransactionStatus,
+)
+
+ITEM_MEASURES = ("revenue", "item_count", "service_minutes")
+TRANSACTION_MEASURES = (
+    "transaction_count", "wait_seconds", "wait_count", "service_seconds", "service_count", "pay_seconds", "pay_count",
+)
+MEASURES = ITEM_MEASURES + TRANSACTION_MEASURES
+
+# service_id of the rows counting each transaction once, whatever its services (see DailyRollup)
+ALL_SERVICES = -1
+
+# (measure prefix, start timestamp, end timestamp)
+DURATIONS = (
+    ("wait", "selection_confirmed_at", "service_start_at"),
+    ("service", "service_start_at", "service_finish_at"),
+    ("pay", "service_finish_at", "paid_at"),
+)
+
+# Rows fetched per round trip when rebuilding
+REBUILD_YIELD_PER = 1000
+
+RollupKey = tuple[date, int, int, int]
+
+
+def accumulate(rollups: dict[RollupKey, dict[str, Any]], tx, cashier_id: int | None,
+               items: Iterable[tuple[int | None, float, int]]) -> None:
+    """
+    Add one paid transaction to `rollups`. `tx` is anything with the Transaction
+    timestamp and therapist_id attributes; `items` are (service_id, price,
+    duration_minutes) in item id order.
+    """
+    day = tx.paid_at.date()
+    prefix = (day, tx.therapist_id or 0)
+    suffix = (cashier_id or 0,)
+
+    def row(service_id: int | None) -> dict[str, Any]:
+        key = prefix + (service_id or 0,) + suffix
+        if key not in rollups:
+            rollups[key] = dict.fromkeys(MEASURES, 0)
+        return rollups[key]
+
+    services = {}
+    for service_id, price, minutes in items:
+        r = services[service_id or 0] = row(service_id)
+        r["revenue"] += price
+        r["item_count"] += 1
+        r["service_minutes"] += minutes
+    if not services:
+        services[0] = row(None)
+
+    # Transaction measures once per distinct service, and once on the ALL_SERVICES row
+    for r in (*services.values(), row(ALL_SERVICES)):
+        r["transaction_count"] += 1
+        for name, start, end in DURATIONS:
+            started, ended = getattr(tx, start), getattr(tx, end)
+            if started and ended:
+                r[f"{name}_seconds"] += (ended - started).total_seconds()
+                r[f"{name}_count"] += 1
+
+
+# sqlalchemy.dialects module whose insert() has an "add on conflict" upsert; imported
+# on first use, so startup only loads the engine's own dialect
+UPSERTS = {"mysql": "mysql", "mariadb": "mysql", "postgresql": "postgresql", "sqlite": "sqlite"}
+
+
+def _upsert(dialect: str, rows: list[dict[str, Any]]):
+    """One INSERT of `rows` that adds the measures to rows already stored under the same key"""
+    dialect_insert = importlib.import_module(f"sqlalchemy.dialects.{UPSERTS[dialect]}").insert
+    stmt = dialect_insert(DailyRollup).values(rows)
+    table = DailyRollup.__table__
+    if dialect in ("mysql", "mariadb"):
+        return stmt.on_duplicate_key_update({name: table.c[name] + stmt.inserted[name] for name in MEASURES})
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.therapist_id, table.c.service_id, table.c.cashier_id],
+        set_={name: table.c[name] + stmt.excluded[name] for name in MEASURES},
+    )
+
+
+def apply_rollups(rollups: dict[RollupKey, dict[str, Any]]) -> None:
+    """
+    Add `rollups` to the stored rows in the current session transaction, as a
+    single upsert with the keys in sorted order: no read-then-insert race, no
+    savepoint, and concurrent payments lock rows in a consistent order.
+    """
+    if not rollups:
+        return
+    rows = [
+        {"day": day, "therapist_id": therapist_id, "service_id": service_id, "cashier_id": cashier_id, **values}
+        for (day, therapist_id, service_id, cashier_id), values in sorted(rollups.items())
+    ]
+    db.session.execute(_upsert(db.session.get_bind().dialect.name, rows))
+
+
+def record_payment(tx: Transaction, payment: Payment) -> None:
+    """Add a transaction being paid to the rollups; call before the payment's commit"""
+    items = sorted(tx.items, key=lambda it: it.id)
+    rollups: dict[RollupKey, dict[str, Any]] = {}
+    accumulate(rollups, tx, payment.cashier_id, [(it.service_id, it.price, it.duration_minutes) for it in items])
+    apply_rollups(rollups)
+
+
+def _paid_rows(transaction, item, payment, start: datetime | None, end: datetime | None):
+    stmt = (
+        select(
+            transaction.id,
+            transaction.therapist_id,
+            transaction.selection_confirmed_at,
+            transaction.service_start_at,
+            transaction.service_finish_at,
+            transaction.paid_at,
+            payment.cashier_id,
+            item.service_id,
+            item.price,
+            item.duration_minutes,
+        )
+        .join(payment, payment.transaction_id == transaction.id)
+        .outerjoin(item, item.transaction_id == transaction.id)
+        .where(transaction.status == TransactionStatus.paid, transaction.paid_at.isnot(None))
+        .order_by(transaction.id, item.id)
+    )
+    if start is not None:
+        stmt = stmt.where(transaction.paid_at >= start)
+    if end is not None:
+        stmt = stmt.where(transaction.paid_at < end)
+    return db.session.execute(stmt.execution_options(yield_per=REBUILD_YIELD_PER))
+
+
+def rebuild_rollups(date_from: date | None = None, date_to: date | None = None) -> int:
+    """
+    Recompute the rollups for paid days in [date_from, date_to) (all days when
+    omitted) from the live and archived tables, in one transaction. Returns the
+    number of rollup rows written. Payments committed meanwhile for the days
+    being rebuilt can be missed, so rebuild closed days or run it when quiet.
+    """
+    start = datetime.combine(date_from, datetime.min.time()) if date_from else None
+    end = datetime.combine(date_to, datetime.min.time()) if date_to else None
+
+    rollups: dict[RollupKey, dict[str, Any]] = {}
+    for transaction, item, payment in (
+        (TransactionHistory, TransactionItemHistory, PaymentHistory),
+        (Transaction, TransactionItem, Payment),
+    ):
+        rows = _paid_rows(transaction, item, payment, start, end)
+        for tx_id, group in groupby(rows, key=lambda row: row.id):
+            group = list(group)
+            tx = group[0]
+            items = [(row.service_id, row.price, row.duration_minutes) for row in group if row.price is not None]
+            accumulate(rollups, tx, tx.cashier_id, items)
+
+    try:
+        stmt = delete(DailyRollup)
+        if date_from is not None:
+            stmt = stmt.where(DailyRollup.day >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(DailyRollup.day < date_to)
+        db.session.execute(stmt)
+        if rollups:
+            db.session.execute(insert(DailyRollup), [
+                {"day": day, "therapist_id": therapist_id, "service_id": service_id, "cashier_id": cashier_id, **values}
+                for (day, therapist_id, service_id, cashier_id), values in rollups.items()
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(rollups)
+
+
+# Report columns for each group_by dimension
+GROUPS = {
+    "day": (DailyRollup.day,),
+    "therapist": (DailyRollup.therapist_id, Therapist.name.label("therapist_name")),
+    "service": (DailyRollup.service_id, Service.service_name),
+    "cashier": (DailyRollup.cashier_id, Cashier.name.label("cashier_name")),
+}
+
+
+def rollup_report(date_from: date | None, date_to: date | None, group_by: list[str],
+                  cashier_id: int | None = None) -> list[dict[str, Any]]:
+    """
+    Sum the rollups over [date_from, date_to) by the `group_by` dimensions (a
+    subset of GROUPS), for one cashier when `cashier_id` is given. Grouped by
+    service, transaction measures count each transaction under every service it
+    included; otherwise they come from the ALL_SERVICES rows, once per transaction.
+    """
+    per_service = "service" in group_by
+    columns = [column for name in group_by for column in GROUPS[name]]
+    sums = []
+    for name in MEASURES:
+        column = getattr(DailyRollup, name)
+        if name in TRANSACTION_MEASURES and not per_service:
+            column = case((DailyRollup.service_id == ALL_SERVICES, column), else_=0)
+        sums.append(func.sum(column).label(name))
+    stmt = select(*columns, *sums)
+    if per_service:
+        stmt = stmt.where(DailyRollup.service_id != ALL_SERVICES)
+    if "therapist" in group_by:
+        stmt = stmt.outerjoin(Therapist, Therapist.id == DailyRollup.therapist_id)
+    if per_service:
+        stmt = stmt.outerjoin(Service, Service.id == DailyRollup.service_id)
+    if "cashier" in group_by:
+        stmt = stmt.outerjoin(Cashier, Cashier.id == DailyRollup.cashier_id)
+    if date_from is not None:
+        stmt = stmt.where(DailyRollup.day >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(DailyRollup.day < date_to)
+    if cashier_id is not None:
+        stmt = stmt.where(DailyRollup.cashier_id == cashier_id)
+    stmt = stmt.group_by(*columns).order_by(*columns)
+
+    report = []
+    for row in db.session.execute(stmt).mappings():
+        entry = {key: value for key, value in row.items() if key not in MEASURES}
+        if "day" in entry:
+            entry["day"] = entry["day"].isoformat()
+        entry.update({
+            "revenue": round(row["revenue"] or 0.0, 2),
+            "transaction_count": row["transaction_count"] or 0,
+            "item_count": row["item_count"] or 0,
+            "service_minutes": row["service_minutes"] or 0,
+        })
+        for name, _, _ in DURATIONS:
+            count = row[f"{name}_count"] or 0
+            entry[f"avg_{name}_minutes"] = round(row[f"{name}_seconds"] / count / 60, 2) if count else None
+        report.append(entry)
+    return report
+
+
+@click.command("rebuild-rollups")
+@click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]), default=None, help="First day (inclusive).")
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]), default=None, help="Last day (inclusive).")
+@with_appcontext
+def rebuild_rollups_command(date_from, date_to):
+    """Recompute the daily rollups from paid transactions."""
+    written = rebuild_rollups(
+        date_from.date() if date_from else None,
+        date_to.date() + timedelta(days=1) if date_to else None,
+    )
+    click.echo(f"Wrote {written} rollup rows")
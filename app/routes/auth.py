@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify
 from ..extensions import db
 from ..models import Therapist, Cashier
+from ..monitor_state import monitor_board
 from ..utils.auth_helpers import create_token_for_user, invalidate_token, get_current_therapist, get_current_cashier
 
 auth_bp = Blueprint("auth", __name__)
@@ -27,6 +28,7 @@ def login_therapist():
 
     # Generate auth token
     token = create_token_for_user(therapist_data)
+    monitor_board.update_therapist(therapist_data)
     
     # Redirect to therapist page with token in query parameter
     # The therapist page will store it in sessionStorage before making API calls
@@ -39,6 +41,7 @@ def logout_therapist():
     therapist, auth_method = get_current_therapist()
     if therapist and auth_method == 'token':
         invalidate_token(therapist)
+        monitor_board.update_therapist(therapist)
     
     # Clear session for backward compatibility
     session.pop("therapist_id", None)
@@ -63,6 +66,7 @@ def login_cashier():
     if counter_number:
         cashier.counter_number = counter_number
         db.session.commit()
+        monitor_board.update_cashier(cashier)
 
     # Generate auth token
     token = create_token_for_user(cashier)
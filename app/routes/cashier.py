@@ -1,10 +1,16 @@
 from flask import Blueprint, render_template, session, redirect, url_for, jsonify, request
-from ..models import Cashier, Payment, Transaction, TransactionItem, ServiceClassification, Service
+from datetime import datetime
+from sqlalchemy.orm import contains_eager
+from ..models import Cashier, Payment, PaymentHistory, Transaction, TransactionHistory, TransactionItem, TransactionItemHistory
+from ..archive import find_transaction
 from ..utils.auth_helpers import get_current_cashier
-from ..utils.thermal_printer import ThermalPrinter
-from .. import db
+from ..utils.pagination import before_cursor, decode_cursor, merge_pages, page_size, parse_day_bound
+from ..utils.print_spooler import print_spooler
+from .. import db, socketio
+from ..utils.log import get_logger
 
 cashier_bp = Blueprint("cashier", __name__)
+log = get_logger("cashier")
 
 @cashier_bp.get("/cashier")
 def cashier_page():
@@ -16,7 +22,7 @@ def cashier_page():
         from ..utils.auth_helpers import validate_cashier_token
         cashier = validate_cashier_token(token_from_query)
         if cashier:
-            print(f"[DEBUG] Auth method: token (from query), Cashier: {cashier.name}, Counter: {cashier.counter_number}")
+            log.debug("Cashier page auth", extra={"auth_method": "token (from query)", "cashier": cashier.name, "counter": cashier.counter_number})
             return render_template("cashier.html", 
                                  cashier_name=cashier.name, 
                                  counter_number=cashier.counter_number,
@@ -26,11 +32,10 @@ def cashier_page():
     cashier, auth_method = get_current_cashier()
     
     if not cashier:
-        print("[DEBUG] No cashier found, redirecting to login")
+        log.debug("No cashier found, redirecting to login")
         return redirect(url_for("auth.login_cashier_form"))
     
-    print(f"[DEBUG] Auth method: {auth_method}, Cashier: {cashier.name}, Counter: {cashier.counter_number}")
-    print(f"[DEBUG] Cashier token: {cashier.auth_token}")
+    log.debug("Cashier page auth", extra={"auth_method": auth_method, "cashier": cashier.name, "counter": cashier.counter_number})
     
     return render_template("cashier.html", 
                          cashier_name=cashier.name, 
@@ -48,7 +53,7 @@ def payment_management_page():
         from ..utils.auth_helpers import validate_cashier_token
         cashier = validate_cashier_token(token_from_query)
         if cashier:
-            print(f"[DEBUG] Auth method: token (from query), Cashier: {cashier.name}, Counter: {cashier.counter_number}")
+            log.debug("Cashier page auth", extra={"auth_method": "token (from query)", "cashier": cashier.name, "counter": cashier.counter_number})
             return render_template("payment_management.html", 
                                  cashier_name=cashier.name, 
                                  counter_number=cashier.counter_number,
@@ -60,7 +65,7 @@ def payment_management_page():
     if not cashier:
         return redirect(url_for("auth.login_cashier_form"))
     
-    print(f"[DEBUG] Auth method: {auth_method}, Cashier: {cashier.name}, Counter: {cashier.counter_number}")
+    log.debug("Cashier page auth", extra={"auth_method": auth_method, "cashier": cashier.name, "counter": cashier.counter_number})
     
     return render_template("payment_management.html", 
                          cashier_name=cashier.name, 
@@ -68,29 +73,75 @@ def payment_management_page():
                          token=cashier.auth_token)
 
 
+def _payment_page(model, transaction_model, item_model, cashier_id: int, cursor, limit: int,
+                  date_from: datetime | None, date_to: datetime | None) -> list:
+    """
+    One newest-first page of `model` payments, joined to their transaction and
+    therapist, with items, services and classifications selectin-loaded.
+    """
+    query = (
+        model.query
+        .join(model.transaction)
+        .filter(model.cashier_id == cashier_id)
+        .filter(before_cursor(model.created_at, model.id, cursor))
+    )
+    if date_from is not None:
+        query = query.filter(model.created_at >= date_from)
+    if date_to is not None:
+        query = query.filter(model.created_at < date_to)
+
+    transaction = contains_eager(model.transaction)
+    return (
+        query
+        .order_by(model.created_at.desc(), model.id.desc())
+        .options(
+            transaction.joinedload(transaction_model.therapist),
+            transaction.selectinload(transaction_model.items).joinedload(item_model.service),
+            transaction.selectinload(transaction_model.items).joinedload(item_model.service_classification),
+        )
+        .limit(limit)
+        .all()
+    )
+
+
 @cashier_bp.get("/cashier/payment-history")
 def get_payment_history():
-    """Get all paid transactions processed by the current cashier"""
+    """
+    Paid transactions processed by the current cashier, newest first.
+    Filters: ?from= and ?to= (ISO date or datetime; `to` is exclusive, a date
+    includes its whole day). Pages with ?limit= (default 50); the next page's
+    ?cursor= comes back in the X-Next-Cursor header, absent on the last page.
+    """
     cashier, auth_method = get_current_cashier()
     
     if not cashier:
         return jsonify({"error": "Unauthorized"}), 401
-    
-    # Query payments made by this cashier
-    payments = Payment.query.filter_by(cashier_id=cashier.id).order_by(Payment.created_at.desc()).limit(50).all()
+
+    try:
+        cursor = decode_cursor(request.args.get("cursor"))
+        date_from = parse_day_bound(request.args.get("from"))
+        date_to = parse_day_bound(request.args.get("to"), end=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = page_size(request.args.get("limit"))
+
+    # Query payments made by this cashier, from the live and archived tables
+    live = _payment_page(Payment, Transaction, TransactionItem, cashier.id, cursor, limit + 1, date_from, date_to)
+    archived = _payment_page(
+        PaymentHistory, TransactionHistory, TransactionItemHistory, cashier.id, cursor, limit + 1, date_from, date_to
+    )
+    payments, next_cursor = merge_pages((live, archived), limit, key=lambda p: (p.created_at, p.id))
     
     # Format the payment data with transaction details
     payment_history = []
     for payment in payments:
         transaction = payment.transaction
-        if not transaction:
-            continue
             
         # Get all services for this transaction
         services = []
         for item in transaction.items:
-            service_classification = ServiceClassification.query.get(item.service_classification_id)
-            service = Service.query.get(item.service_id)
+            service_classification = item.service_classification
+            service = item.service
             
             if service and service_classification:
                 services.append({
@@ -113,8 +164,11 @@ def get_payment_history():
             'therapist_name': transaction.therapist.name if transaction.therapist else None,
             'room_number': transaction.room_number
         })
-    
-    return jsonify(payment_history)
+
+    response = jsonify(payment_history)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 
 @cashier_bp.post("/cashier/print-receipt")
@@ -133,18 +187,19 @@ def print_receipt_thermal():
     if not transaction_id:
         return jsonify({"error": "transaction_id required"}), 400
     
-    transaction = Transaction.query.get(transaction_id)
+    # Reprints of archived transactions come from the history tables
+    transaction = find_transaction(int(transaction_id))
     if not transaction:
         return jsonify({"error": "Transaction not found"}), 404
     
-    payment = Payment.query.filter_by(transaction_id=transaction_id).first()
+    payment = transaction.payment
     if not payment:
         return jsonify({"error": "Payment not found"}), 404
     
     # Format receipt data
     services = []
     for item in transaction.items:
-        service = Service.query.get(item.service_id)
+        service = item.service
         if service:
             services.append({
                 'name': service.service_name,
@@ -164,11 +219,42 @@ def print_receipt_thermal():
         'payment_date': payment.created_at.strftime('%Y-%m-%d %H:%M:%S') if payment.created_at else ''
     }
     
-    # Send to thermal printer
-    printer = ThermalPrinter(host=printer_host, port=printer_port)
-    success = printer.print_receipt(receipt_data)
-    
-    if success:
-        return jsonify({"success": True, "message": "Receipt printed successfully"})
-    else:
-        return jsonify({"error": "Failed to connect to printer"}), 500
+    # Queue for the background spooler; the outcome is pushed over Socket.IO
+    cashier_room = f"cashier_{cashier.id}"
+
+    def notify(job):
+        socketio.emit("print_job_update", job.to_dict(), to=cashier_room)
+
+    # Imported on first print so workers that never print don't load the ESC/POS builder
+    from ..utils.thermal_printer import ThermalPrinter
+    job = print_spooler.submit(
+        printer_host, int(printer_port), ThermalPrinter.build_receipt(receipt_data), on_done=notify,
+        owner_id=cashier.id,
+    )
+    return jsonify({"success": True, "message": "Receipt queued for printing", **job.to_dict()}), 202
+
+
+@cashier_bp.get("/cashier/print-jobs/<job_id>")
+def print_job_status(job_id: str):
+    """Get the status of a queued receipt print job."""
+    cashier, auth_method = get_current_cashier()
+
+    if not cashier:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    job = print_spooler.get_job(job_id)
+    # Other cashiers' jobs are reported as missing rather than forbidden
+    if not job or job.owner_id != cashier.id:
+        return jsonify({"error": "Print job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@cashier_bp.get("/cashier/print-queue")
+def print_queue_stats():
+    """Queue depth, job counters and latency of the print spooler."""
+    cashier, auth_method = get_current_cashier()
+
+    if not cashier:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return jsonify(print_spooler.stats())
@@ -1,17 +1,14 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, Response, render_template, jsonify, request
 from ..extensions import db
 from ..models import Service, ServiceCategory, ServiceClassification, Therapist, Cashier
+from ..service_catalog import service_catalog
 
 customer_bp = Blueprint("customer", __name__)
 
 @customer_bp.get("/")
 def home_page():
-    services = Service.query.order_by(Service.service_name.asc()).all()
-    categories: dict[str, list[Service]] = {}
-    for s in services:
-        cat_name = s.category.category_name if s.category else "Uncategorized"
-        categories.setdefault(cat_name, []).append(s)
-    return render_template("home.html", services=services, categories=categories)
+    catalog = service_catalog.get()
+    return render_template("home.html", services=catalog.services, categories=catalog.categories)
 
 @customer_bp.get("/about")
 def about_page():
@@ -20,41 +17,22 @@ def about_page():
 # Experimental link for service 2 page
 @customer_bp.get("/services1")
 def customer_page1():
-    services = Service.query.order_by(Service.service_name.asc()).all()
-    categories: dict[str, list[Service]] = {}
-    for s in services:
-        cat_name = s.category.category_name if s.category else "Uncategorized"
-        categories.setdefault(cat_name, []).append(s)
-    return render_template("services1.html", services=services, categories=categories)
+    catalog = service_catalog.get()
+    return render_template("services1.html", services=catalog.services, categories=catalog.categories)
 
 @customer_bp.get("/services2")
 def customer_page2():
-    services = Service.query.order_by(Service.service_name.asc()).all()
-    categories: dict[str, list[Service]] = {}
-    for s in services:
-        cat_name = s.category.category_name if s.category else "Uncategorized"
-        categories.setdefault(cat_name, []).append(s)
-    return render_template("services2.html", services=services, categories=categories)
+    catalog = service_catalog.get()
+    return render_template("services2.html", services=catalog.services, categories=catalog.categories)
 
 
 # API ginagamit ni therapist page para kuhain yung data sa services table ng database
 @customer_bp.get("/api/services")
 def api_services():
-    services = Service.query.order_by(Service.service_name.asc()).all()
-    result = []
-    for s in services:
-        for classification in s.classifications:
-            result.append({
-                "id": s.id,
-                "classification_id": classification.id,
-                "name": s.service_name,
-                "classification_name": classification.classification_name,
-                "price": classification.price,
-                "duration_minutes": classification.duration_minutes,
-                "category": s.category.category_name if s.category else "Uncategorized",
-                "description": s.description or "No description available"
-            })
-    return jsonify(result)
+    catalog = service_catalog.get()
+    response = Response(catalog.api_json, mimetype="application/json")
+    response.set_etag(catalog.version)
+    return response.make_conditional(request)
 
 # API to get service classifications for a specific service
 # @customer_bp.get("/api/services/<int:service_id>/classifications")
@@ -0,0 +1,43 @@
+from flask import Blueprint, abort, current_app, jsonify, request
+from ..extensions import db
+from ..instrumentation import metrics
+from ..utils.pool_metrics import pool_metrics
+
+internal_bp = Blueprint('internal', __name__, url_prefix='/internal')
+
+LOOPBACK = {"127.0.0.1", "::1"}
+
+
+@internal_bp.before_request
+def restrict_internal():
+    """Only loopback clients, or callers presenting INTERNAL_METRICS_TOKEN"""
+    token = current_app.config.get("INTERNAL_METRICS_TOKEN")
+    if token:
+        if request.headers.get("X-Metrics-Token") != token:
+            abort(403)
+    elif request.remote_addr not in LOOPBACK:
+        abort(403)
+
+
+@internal_bp.get('/pool')
+def pool_stats():
+    """Connection-pool occupancy plus checkout/checkin counters and wait/hold times."""
+    return jsonify(pool_metrics.snapshot(db.engine))
+
+
+@internal_bp.post('/pool/reset')
+def reset_pool_stats():
+    pool_metrics.reset()
+    return jsonify({'ok': True})
+
+
+@internal_bp.get('/metrics')
+def call_metrics():
+    """Per view and Socket.IO handler: calls, errors and histograms of wall time, SQL and bytes sent."""
+    return jsonify(metrics.snapshot())
+
+
+@internal_bp.post('/metrics/reset')
+def reset_call_metrics():
+    metrics.reset()
+    return jsonify({'ok': True})
@@ -1,5 +1,7 @@
-from flask import Blueprint, render_template
-from ..models import Transaction
+from datetime import date
+
+from flask import Blueprint, abort, render_template, request
+from ..archive import find_transaction, find_transaction_by_code
 
 monitor_bp = Blueprint("monitor", __name__)
 
@@ -9,7 +11,17 @@ def monitor_page():
     return render_template("monitor.html")
 
 
+@monitor_bp.get("/receipt/id/<int:transaction_id>")
+def receipt_by_id(transaction_id: int):
+    # Live or archived
+    return render_template("receipt.html", tx=find_transaction(transaction_id))
+
+
 @monitor_bp.get("/receipt/<code>")
 def receipt_page(code: str):
-    tx = Transaction.query.filter_by(code=code).first()
-    return render_template("receipt.html", tx=tx)
+    # Codes repeat across days: ?day=YYYY-MM-DD picks that day's holder, otherwise the most recent
+    try:
+        day = date.fromisoformat(request.args["day"]) if request.args.get("day") else None
+    except ValueError:
+        abort(400)
+    return render_template("receipt.html", tx=find_transaction_by_code(code, day))
@@ -1,48 +1,48 @@
-from flask import Blueprint, jsonify
-from ..models import Transaction, TransactionStatus, Therapist, Cashier
-from sqlalchemy import distinct
+from flask import Blueprint, current_app, jsonify, request
+from ..extensions import db
+from ..models import Transaction, TransactionStatus, Room
+from ..monitor_state import load_active_transactions, monitor_board, order_key, serialize_monitor_transaction
+from ..utils.response_cache import ResponseCache
+from sqlalchemy import and_
 
 snapshot_bp = Blueprint('monitor_snapshot', __name__)
 
+# Optional short-lived /room_status payload, dropped on every room or transaction change
+room_status_cache = ResponseCache()
+monitor_board.on_change(room_status_cache.clear)
+
 
 @snapshot_bp.get('/monitor_snapshot/')
 def monitor_snapshot():
+    # One query over every status shown on the board, partitioned below
+    transactions = load_active_transactions((
+        TransactionStatus.pending_therapist,
+        TransactionStatus.therapist_confirmed,
+        TransactionStatus.in_service,
+        TransactionStatus.finished,
+        TransactionStatus.awaiting_payment,
+    ))
+    transactions.sort(key=order_key)
+
+    by_status: dict[TransactionStatus, list[Transaction]] = {}
+    for tx in transactions:
+        by_status.setdefault(tx.status, []).append(tx)
+
     # WAITING: Shows transactions after customer confirms services, waiting for therapist
-    waiting = Transaction.query.filter_by(status=TransactionStatus.pending_therapist).order_by(Transaction.selection_confirmed_at.asc()).all()
+    waiting = by_status.get(TransactionStatus.pending_therapist, [])
     
     # SERVING: Shows transactions after therapist confirms until service finished
     # This includes both therapist_confirmed and in_service statuses
-    therapist_confirmed = Transaction.query.filter_by(status=TransactionStatus.therapist_confirmed).order_by(Transaction.therapist_confirmed_at.asc()).all()
-    in_service = Transaction.query.filter_by(status=TransactionStatus.in_service).order_by(Transaction.service_start_at.asc()).all()
+    therapist_confirmed = by_status.get(TransactionStatus.therapist_confirmed, [])
+    in_service = by_status.get(TransactionStatus.in_service, [])
     
     # FINISHED: Shows transactions after service finished, waiting for cashier to claim
-    finished = Transaction.query.filter_by(status=TransactionStatus.finished).order_by(Transaction.service_finish_at.asc()).all()
+    finished = by_status.get(TransactionStatus.finished, [])
     
     # COUNTER: Shows transactions after cashier confirms payment assignment
-    payment_assigned = Transaction.query.filter_by(status=TransactionStatus.awaiting_payment).order_by(Transaction.cashier_claimed_at.asc()).all()
-
-    def s(tx):
-        return {
-            'id': tx.id,
-            'code': tx.code,
-            # 'customer_name': tx.customer_name,
-            'therapist': tx.therapist.name if tx.therapist else None,
-            'room_number': tx.room_number,
-            'total_amount': tx.total_amount,
-            'total_duration_minutes': tx.total_duration_minutes,
-            'cashier': tx.assigned_cashier.name if tx.assigned_cashier else None,
-            'counter': tx.assigned_cashier.counter_number if tx.assigned_cashier else None,
-            'status': tx.status.value,  # Include status for frontend logic
-            'service_start_at': tx.service_start_at.isoformat() if tx.service_start_at else None,  # Add timer data
-            'selected_services': [
-                {
-                    'service_name': item.service.service_name,
-                    'price': item.price,
-                    'duration_minutes': item.duration_minutes,
-                    'classification_name': item.service_classification.classification_name
-                } for item in tx.items
-            ]
-        }
+    payment_assigned = by_status.get(TransactionStatus.awaiting_payment, [])
+
+    s = serialize_monitor_transaction
 
     # Combine therapist_confirmed and in_service for the SERVING section
     serving = therapist_confirmed + in_service
@@ -58,24 +58,43 @@ def monitor_snapshot():
 @snapshot_bp.get('/room_status/')
 def room_status():
     """Get the status of all rooms in the system"""
-    from ..models import Room
-    
-    # Get all rooms from the Room table
-    rooms = Room.query.all()
-    
+    ttl = current_app.config.get("ROOM_STATUS_CACHE_TTL", 0)
+    return jsonify(room_status_cache.get_or_build(ttl, _build_room_status))
+
+
+def _build_room_status():
+    # Every room with its active transactions in one pass
+    rows = (
+        db.session.query(Room, Transaction)
+        .outerjoin(
+            Transaction,
+            and_(
+                Transaction.room_number == Room.room_number,
+                Transaction.status.in_([TransactionStatus.in_service, TransactionStatus.therapist_confirmed]),
+            ),
+        )
+        .order_by(Room.id, Transaction.id)
+        .all()
+    )
+
+    rooms: dict[int, Room] = {}
+    in_service: dict[int, Transaction] = {}
+    preparing: dict[int, Transaction] = {}
+    for room, tx in rows:
+        rooms.setdefault(room.id, room)
+        if tx is None:
+            continue
+        if tx.status == TransactionStatus.in_service:
+            in_service.setdefault(room.id, tx)
+        else:
+            preparing.setdefault(room.id, tx)
+
     room_statuses = []
     
-    for room in rooms:
+    for room in rooms.values():
         # Check if room has active transactions that override the base status
-        in_service_transaction = Transaction.query.filter_by(
-            room_number=room.room_number, 
-            status=TransactionStatus.in_service
-        ).first()
-        
-        preparing_transaction = Transaction.query.filter_by(
-            room_number=room.room_number, 
-            status=TransactionStatus.therapist_confirmed
-        ).first()
+        in_service_transaction = in_service.get(room.id)
+        preparing_transaction = preparing.get(room.id)
         
         # Determine final status based on transactions and room status
         if in_service_transaction:
@@ -111,32 +130,42 @@ def room_status():
             'transaction_id': transaction_id
         })
     
-    return jsonify({'rooms': room_statuses})
+    return {'rooms': room_statuses}
 
 
 @snapshot_bp.get('/cashier_status/')
 def cashier_status():
     """Get the status of all cashiers and their assigned transactions"""
-    # Get all active cashiers
-    cashiers = Cashier.query.filter_by(active=True).order_by(Cashier.counter_number).all()
-    
+    open_statuses = [TransactionStatus.awaiting_payment, TransactionStatus.paying]
+
+    # All active cashiers with their open transactions in one query
+    rows = (
+        db.session.query(Cashier, Transaction)
+        .outerjoin(
+            Transaction,
+            and_(
+                Transaction.assigned_cashier_id == Cashier.id,
+                Transaction.status.in_(open_statuses),
+            ),
+        )
+        .filter(Cashier.active == True)
+        .order_by(Cashier.counter_number, Cashier.id, Transaction.id)
+        .all()
+    )
+
+    cashiers: dict[int, Cashier] = {}
+    open_transactions: dict[int, list[Transaction]] = {}
+    for cashier, tx in rows:
+        cashiers.setdefault(cashier.id, cashier)
+        txs = open_transactions.setdefault(cashier.id, [])
+        if tx is not None:
+            txs.append(tx)
+
     cashier_statuses = []
     
-    for cashier in cashiers:
-        # Check if cashier has any transactions awaiting payment
-        awaiting_transactions = Transaction.query.filter_by(
-            assigned_cashier_id=cashier.id,
-            status=TransactionStatus.awaiting_payment
-        ).all()
-        
-        # Check if cashier has any transactions currently being paid
-        paying_transactions = Transaction.query.filter_by(
-            assigned_cashier_id=cashier.id,
-            status=TransactionStatus.paying
-        ).all()
-        
-        # Combine all transactions for this cashier
-        all_transactions = awaiting_transactions + paying_transactions
+    for cashier in cashiers.values():
+        # Transactions awaiting payment first, then those currently being paid
+        all_transactions = sorted(open_transactions[cashier.id], key=lambda tx: open_statuses.index(tx.status))
         
         cashier_statuses.append({
             'id': cashier.id,
@@ -154,4 +183,7 @@ def cashier_status():
             ]
         })
     
-    return jsonify({'cashiers': cashier_statuses})
+    # Unchanged boards answer If-None-Match with 304 Not Modified
+    response = jsonify({'cashiers': cashier_statuses})
+    response.add_etag()
+    return response.make_conditional(request)
@@ -0,0 +1,231 @@
+import csv
+import io
+import json
+from itertools import groupby
+
+from flask import Blueprint, Response, abort, current_app, g, jsonify, request, stream_with_context
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import (
+    Cashier, Payment, PaymentHistory, Service, ServiceClassification, Therapist,
+    Transaction, TransactionHistory, TransactionItem, TransactionItemHistory,
+)
+from ..rollups import GROUPS, rollup_report
+from ..utils.auth_helpers import get_current_cashier
+from ..utils.pagination import parse_day_bound
+
+reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_YIELD_PER = 1000
+# Bytes buffered before a chunk is written to the client
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+PAYMENT_FIELDS = [
+    'payment_id', 'payment_date', 'amount_due', 'amount_paid', 'change_amount', 'payment_method',
+    'transaction_id', 'code', 'status', 'room_number', 'total_amount', 'total_duration_minutes',
+    'service_start_at', 'service_finish_at', 'paid_at',
+    'therapist_id', 'therapist_name', 'cashier_id', 'cashier_name', 'counter_number',
+]
+ITEM_FIELDS = ['item_id', 'service_name', 'classification_name', 'price', 'duration_minutes']
+
+
+@reports_bp.before_request
+def restrict_reports():
+    """
+    Callers presenting REPORTS_TOKEN (e.g. accounting scripts) see every cashier;
+    logged-in cashiers only their own payments (g.report_cashier_id).
+    """
+    token = current_app.config.get("REPORTS_TOKEN")
+    if token and request.headers.get("X-Reports-Token") == token:
+        g.report_cashier_id = None
+        return
+    cashier, auth_method = get_current_cashier()
+    if not cashier:
+        abort(401)
+    g.report_cashier_id = cashier.id
+
+
+def _export_statement(payment, transaction, item, date_from, date_to, cashier_id, therapist_id):
+    """Flat payment x item rows, oldest payment first; payments without items get one row"""
+    stmt = (
+        select(
+            payment.id.label('payment_id'),
+            payment.created_at.label('payment_date'),
+            payment.amount_due,
+            payment.amount_paid,
+            payment.change_amount,
+            payment.method.label('payment_method'),
+            transaction.id.label('transaction_id'),
+            transaction.code,
+            transaction.status,
+            transaction.room_number,
+            transaction.total_amount,
+            transaction.total_duration_minutes,
+            transaction.service_start_at,
+            transaction.service_finish_at,
+            transaction.paid_at,
+            transaction.therapist_id,
+            Therapist.name.label('therapist_name'),
+            payment.cashier_id,
+            Cashier.name.label('cashier_name'),
+            Cashier.counter_number,
+            item.id.label('item_id'),
+            Service.service_name,
+            ServiceClassification.classification_name,
+            item.price,
+            item.duration_minutes,
+        )
+        .join(transaction, transaction.id == payment.transaction_id)
+        .outerjoin(Therapist, Therapist.id == transaction.therapist_id)
+        .outerjoin(Cashier, Cashier.id == payment.cashier_id)
+        .outerjoin(item, item.transaction_id == transaction.id)
+        .outerjoin(Service, Service.id == item.service_id)
+        .outerjoin(ServiceClassification, ServiceClassification.id == item.service_classification_id)
+        .order_by(payment.created_at, payment.id, item.id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(payment.created_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(payment.created_at < date_to)
+    if cashier_id is not None:
+        stmt = stmt.where(payment.cashier_id == cashier_id)
+    if therapist_id is not None:
+        stmt = stmt.where(transaction.therapist_id == therapist_id)
+    return stmt
+
+
+def _export_rows(**filters):
+    """
+    Stream rows from the archive tables, then the live ones, through server-side
+    cursors, so memory stays bounded by EXPORT_YIELD_PER whatever the range.
+    """
+    for payment, transaction, item in (
+        (PaymentHistory, TransactionHistory, TransactionItemHistory),
+        (Payment, Transaction, TransactionItem),
+    ):
+        stmt = _export_statement(payment, transaction, item, **filters)
+        result = db.session.execute(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+        try:
+            yield from result.mappings()
+        finally:
+            result.close()
+
+
+def _value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat(sep=' ')
+    if hasattr(value, 'value'):  # Enum
+        return value.value
+    return value
+
+
+def _chunked(lines):
+    """Join small writes into EXPORT_CHUNK_BYTES chunks"""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _csv_lines(rows):
+    """One line per transaction item, with the payment columns repeated"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    fields = PAYMENT_FIELDS + ITEM_FIELDS
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_value(row[f]) for f in fields])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue()
+
+
+def _ndjson_lines(rows):
+    """One JSON object per payment, its items nested"""
+    for payment_id, group in groupby(rows, key=lambda row: row['payment_id']):
+        first = next(group)
+        record = {f: _value(first[f]) for f in PAYMENT_FIELDS}
+        record['items'] = [
+            {f: _value(row[f]) for f in ITEM_FIELDS}
+            for row in (first, *group) if row['item_id'] is not None
+        ]
+        yield json.dumps(record, separators=(',', ':')) + '\n'
+
+
+def _int_arg(name: str):
+    value = request.args.get(name)
+    return int(value) if value else None
+
+
+@reports_bp.get('/payments/export')
+def export_payments():
+    """
+    Payments with their transaction, therapist, cashier and items, streamed.
+    ?format=csv (default, one row per item) or ndjson (one object per payment);
+    filters ?from= / ?to= (ISO date or datetime on the payment time, a bare `to`
+    date includes that day), ?cashier_id= and ?therapist_id=. A cashier login
+    is always limited to its own cashier_id.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    try:
+        filters = {
+            'date_from': parse_day_bound(request.args.get('from')),
+            'date_to': parse_day_bound(request.args.get('to'), end=True),
+            'cashier_id': _int_arg('cashier_id'),
+            'therapist_id': _int_arg('therapist_id'),
+        }
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if g.report_cashier_id is not None:
+        filters['cashier_id'] = g.report_cashier_id
+
+    lines = _csv_lines if fmt == 'csv' else _ndjson_lines
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    name = '_'.join(['payments'] + [request.args[k] for k in ('from', 'to') if request.args.get(k)])
+    return Response(
+        stream_with_context(_chunked(lines(_export_rows(**filters)))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@reports_bp.get('/daily')
+def daily_report():
+    """
+    Revenue, counts and average wait/service/pay minutes from the daily rollups
+    only. ?from= / ?to= are inclusive days; ?group_by= is a comma-separated
+    subset of day, therapist, service, cashier (default day). A cashier login
+    only sums its own rollup rows.
+    """
+    group_by = [name for name in request.args.get('group_by', 'day').split(',') if name]
+    unknown = [name for name in group_by if name not in GROUPS]
+    if unknown:
+        return jsonify({"error": f"Unknown group_by: {', '.join(unknown)}"}), 400
+    try:
+        date_from = parse_day_bound(request.args.get('from'))
+        date_to = parse_day_bound(request.args.get('to'), end=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = rollup_report(
+        date_from.date() if date_from else None,
+        date_to.date() if date_to else None,
+        group_by,
+        cashier_id=g.report_cashier_id,
+    )
+    return jsonify({
+        'from': request.args.get('from'),
+        'to': request.args.get('to'),
+        'group_by': group_by,
+        'rows': rows,
+    })
@@ -1,9 +1,14 @@
 from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify
-from ..models import Therapist, Room, Transaction, TransactionStatus, TransactionItem, ServiceClassification, Service
+from sqlalchemy.orm import selectinload
+from ..models import Therapist, Room, Transaction, TransactionHistory, TransactionStatus, TransactionItem, TransactionItemHistory
 from ..utils.auth_helpers import get_current_therapist
+from ..utils.pagination import before_cursor, decode_cursor, merge_pages, page_size
+from ..monitor_state import monitor_board
 from .. import db, socketio
+from ..utils.log import get_logger
 
 therapist_bp = Blueprint("therapist", __name__)
+log = get_logger("therapist")
 
 
 @therapist_bp.get("/therapist")
@@ -16,7 +21,7 @@ def therapist_page():
         from ..utils.auth_helpers import validate_therapist_token
         therapist = validate_therapist_token(token_from_query)
         if therapist:
-            print(f"[DEBUG] Auth method: token (from query), Therapist: {therapist.name}, Room: {therapist.room_number}")
+            log.debug("Therapist page auth", extra={"auth_method": "token (from query)", "therapist": therapist.name, "room": therapist.room_number})
             return render_template("therapist.html", 
                                  therapist_name=therapist.name, 
                                  room_number=therapist.room_number,
@@ -28,7 +33,7 @@ def therapist_page():
     if not therapist:
         return redirect(url_for("auth.login_therapist_form"))
     
-    print(f"[DEBUG] Auth method: {auth_method}, Therapist: {therapist.name}, Room: {therapist.room_number}")
+    log.debug("Therapist page auth", extra={"auth_method": auth_method, "therapist": therapist.name, "room": therapist.room_number})
     
     return render_template("therapist.html", 
                          therapist_name=therapist.name, 
@@ -46,7 +51,7 @@ def service_management_page():
         from ..utils.auth_helpers import validate_therapist_token
         therapist = validate_therapist_token(token_from_query)
         if therapist:
-            print(f"[DEBUG] Auth method: token (from query), Therapist: {therapist.name}, Room: {therapist.room_number}")
+            log.debug("Therapist page auth", extra={"auth_method": "token (from query)", "therapist": therapist.name, "room": therapist.room_number})
             return render_template("service_management.html", 
                                  therapist_name=therapist.name, 
                                  room_number=therapist.room_number,
@@ -58,7 +63,7 @@ def service_management_page():
     if not therapist:
         return redirect(url_for("auth.login_therapist_form"))
 
-    print(f"[DEBUG] Auth method: {auth_method}, Therapist: {therapist.name}, Room: {therapist.room_number}")
+    log.debug("Therapist page auth", extra={"auth_method": auth_method, "therapist": therapist.name, "room": therapist.room_number})
     
     return render_template("service_management.html", 
                          therapist_name=therapist.name, 
@@ -91,6 +96,7 @@ def toggle_room_status():
     
     try:
         db.session.commit()
+        monitor_board.update_room(room)
         
         # Emit socket event to update monitor page
         socketio.emit('monitor_updated', {
@@ -108,19 +114,49 @@ def toggle_room_status():
         return jsonify({"error": str(e)}), 500
 
 
+def _finished_page(model, item_model, therapist_id: int, cursor, limit: int, *criteria) -> list:
+    """One newest-first page of `model` rows with items, services and classifications eager-loaded"""
+    return (
+        model.query
+        .filter(model.therapist_id == therapist_id, *criteria)
+        .filter(before_cursor(model.service_finish_at, model.id, cursor))
+        .order_by(model.service_finish_at.desc(), model.id.desc())
+        .options(
+            selectinload(model.items).joinedload(item_model.service),
+            selectinload(model.items).joinedload(item_model.service_classification),
+        )
+        .limit(limit)
+        .all()
+    )
+
+
 @therapist_bp.get("/therapist/finished-transactions")
 def get_finished_transactions():
-    """Get all finished transactions for the current therapist"""
+    """
+    Finished and paid transactions for the current therapist, newest first.
+    Pages with ?limit= (default 50) and the next_cursor of the previous page.
+    """
     therapist, auth_method = get_current_therapist()
     
     if not therapist:
         return jsonify({"error": "Unauthorized"}), 401
-    
-    # Query finished transactions for this therapist
-    finished_transactions = Transaction.query.filter(
-        Transaction.therapist_id == therapist.id,
-        Transaction.status.in_([TransactionStatus.finished, TransactionStatus.paid])
-    ).order_by(Transaction.service_finish_at.desc()).limit(50).all()
+
+    try:
+        cursor = decode_cursor(request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = page_size(request.args.get("limit"))
+
+    # One extra row per table tells whether another page exists.
+    # Older paid transactions live in the archive table; ids are shared, so (finish, id) stays unique
+    live = _finished_page(
+        Transaction, TransactionItem, therapist.id, cursor, limit + 1,
+        Transaction.status.in_([TransactionStatus.finished, TransactionStatus.paid]),
+    )
+    archived = _finished_page(TransactionHistory, TransactionItemHistory, therapist.id, cursor, limit + 1)
+    finished_transactions, next_cursor = merge_pages(
+        (live, archived), limit, key=lambda tx: (tx.service_finish_at, tx.id)
+    )
     
     # Format the transactions data
     transactions_data = []
@@ -128,8 +164,8 @@ def get_finished_transactions():
         # Get all services for this transaction
         services = []
         for item in transaction.items:
-            service_classification = ServiceClassification.query.get(item.service_classification_id)
-            service = Service.query.get(item.service_id)
+            service_classification = item.service_classification
+            service = item.service
             
             if service and service_classification:
                 services.append({
@@ -151,4 +187,4 @@ def get_finished_transactions():
             'services': services
         })
     
-    return jsonify(transactions_data)
+    return jsonify({'transactions': transactions_data, 'next_cursor': next_cursor})
@@ -0,0 +1,172 @@
+"""Startup schema check: run DDL only when the stored schema version differs"""
+import hashlib
+
+from flask import Flask
+from sqlalchemy import Table, UniqueConstraint, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from .extensions import db
+from .models import SchemaVersion
+from .utils.log import get_logger
+
+log = get_logger("schema")
+
+SCHEMA_VERSION_ID = 1
+
+
+class SchemaMigrationRequired(RuntimeError):
+    """
+    Existing tables lack model columns, keep UNIQUE indexes the models dropped or
+    (SQLite) lack AUTOINCREMENT ids; create_all() never alters tables, so they
+    must be migrated
+    """
+
+
+def schema_fingerprint() -> str:
+    """Hash of every table, column and index in the models, so any model change alters it"""
+    parts = []
+    for table in sorted(db.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"{table.name}:{table.dialect_options['sqlite']['autoincrement']}")
+        for column in table.columns:
+            targets = sorted(fk.target_fullname for fk in column.foreign_keys)
+            parts.append(
+                f"{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}:{bool(column.unique)}:{targets}"
+            )
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"index:{index.name}:{[c.name for c in index.columns]}:{index.unique}")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def stored_schema_version():
+    try:
+        return db.session.execute(
+            select(SchemaVersion.version).where(SchemaVersion.id == SCHEMA_VERSION_ID)
+        ).scalar()
+    except (OperationalError, ProgrammingError):
+        # No schema_version table yet
+        db.session.rollback()
+        return None
+
+
+def _declared_unique(table: Table) -> set[frozenset[str]]:
+    """Column sets the models declare unique: primary key, unique columns, indexes and constraints"""
+    declared = {frozenset(c.name for c in table.primary_key.columns)}
+    declared |= {frozenset([c.name]) for c in table.columns if c.unique}
+    declared |= {frozenset(c.name for c in i.columns) for i in table.indexes if i.unique}
+    declared |= {
+        frozenset(c.name for c in con.columns) for con in table.constraints if isinstance(con, UniqueConstraint)
+    }
+    return declared
+
+
+def _drop_unique(table: str, name: str | None, columns: list[str], is_index: bool, dialect: str) -> str:
+    if name is None:
+        # SQLite's inline UNIQUE constraints (sqlite_autoindex_*) cannot be dropped
+        return f"-- rebuild {table} without its UNIQUE ({', '.join(columns)}) constraint"
+    if dialect in ("mysql", "mariadb"):
+        return f"ALTER TABLE {table} DROP INDEX {name}"
+    if is_index:
+        return f"DROP INDEX {name}"
+    return f"ALTER TABLE {table} DROP CONSTRAINT {name}"
+
+
+def missing_schema() -> tuple[list[str], list[str], list[str]]:
+    """
+    Compare the existing tables with the models and return the DDL that brings
+    them in line: (ALTER TABLE ... ADD COLUMN statements, CREATE INDEX
+    statements, statements dropping UNIQUE indexes the models no longer declare
+    or rebuilding SQLite tables that lack AUTOINCREMENT ids).
+    """
+    inspector = inspect(db.engine)
+    dialect = db.engine.dialect
+    tables = set(inspector.get_table_names())
+    columns, indexes, stale = [], [], []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        present = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in present:
+                columns.append(f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(dialect=dialect)}")
+
+        existing = inspector.get_indexes(table.name)
+        present = {i["name"] for i in existing}
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            if index.name not in present:
+                indexes.append(str(CreateIndex(index).compile(dialect=dialect)))
+
+        # A UNIQUE index left behind by an older model still rejects rows the code now writes
+        declared = _declared_unique(table)
+        found = [(i, True) for i in existing if i.get("unique")]
+        found += [(c, False) for c in inspector.get_unique_constraints(table.name)]
+        seen = set()
+        for entry, is_index in found:
+            names = [name for name in entry["column_names"] if name]
+            key = (entry["name"], frozenset(names))
+            if frozenset(names) in declared or key in seen:
+                continue
+            seen.add(key)
+            stale.append(_drop_unique(table.name, entry["name"], names, is_index, dialect.name))
+
+        if dialect.name == "sqlite" and table.dialect_options["sqlite"]["autoincrement"]:
+            with db.engine.connect() as conn:
+                ddl = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+                ).scalar()
+            if "AUTOINCREMENT" not in (ddl or "").upper():
+                stale.append(f"-- rebuild {table.name} with INTEGER PRIMARY KEY AUTOINCREMENT ids")
+    return columns, indexes, stale
+
+
+def record_schema_version(version: str) -> None:
+    row = db.session.get(SchemaVersion, SCHEMA_VERSION_ID)
+    if row is None:
+        db.session.add(SchemaVersion(id=SCHEMA_VERSION_ID, version=version))
+    else:
+        row.version = version
+    db.session.commit()
+
+
+def ensure_schema(app: Flask) -> str:
+    """
+    Apply DB_SCHEMA_MODE at startup and return what was done:
+        check  - one SELECT of the stored version; create_all() only on mismatch (default)
+        create - create_all() on every start (the old behaviour)
+        skip   - no database access at all
+
+    create_all() adds missing tables but never alters existing ones, so after it
+    the tables are compared with the models. Missing columns, stale UNIQUE
+    indexes and SQLite tables without AUTOINCREMENT stop startup with
+    SchemaMigrationRequired; missing indexes are logged. Either way the version
+    is not recorded, so the comparison runs again on every boot until migrated.
+    """
+    mode = app.config.get("DB_SCHEMA_MODE", "check")
+    if mode == "skip":
+        return "skipped"
+
+    with app.app_context():
+        version = schema_fingerprint()
+        if mode == "check" and stored_schema_version() == version:
+            return "up to date"
+
+        db.create_all()
+        columns, indexes, stale = missing_schema()
+        if columns or stale:
+            migration = stale + columns + indexes
+            statements = ";\n".join(migration)
+            log.error("Database schema is out of date", extra={"statements": migration})
+            raise SchemaMigrationRequired(
+                "Existing tables are missing model columns, keep UNIQUE indexes the models dropped "
+                "or reuse archived ids. "
+                f"Migrate the database, e.g.:\n{statements};"
+            )
+        if indexes:
+            log.warning(
+                "Existing tables are missing indexes; create them to record the schema version",
+                extra={"statements": indexes},
+            )
+            return "missing indexes"
+
+        record_schema_version(version)
+        return "created"
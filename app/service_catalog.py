@@ -0,0 +1,138 @@
+"""Process-wide, versioned cache of the service catalog"""
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from .models import Service, ServiceCategory, ServiceClassification
+
+CATALOG_MODELS = (Service, ServiceCategory, ServiceClassification)
+
+
+class CatalogSnapshot:
+    """One immutable build of the catalog"""
+
+    def __init__(self, services: list[Service]):
+        self.services: list[dict[str, Any]] = []
+        self.categories: dict[str, list[dict[str, Any]]] = {}
+        self.services_by_id: dict[int, dict[str, Any]] = {}
+        self.classifications_by_id: dict[int, dict[str, Any]] = {}
+        api_rows = []
+
+        for s in services:
+            cat_name = s.category.category_name if s.category else "Uncategorized"
+            service = {
+                "id": s.id,
+                "service_name": s.service_name,
+                "description": s.description,
+                "category": cat_name,
+                "classifications": [],
+            }
+            for classification in s.classifications:
+                entry = {
+                    "id": classification.id,
+                    "service_id": s.id,
+                    "classification_name": classification.classification_name,
+                    "price": classification.price,
+                    "duration_minutes": classification.duration_minutes,
+                }
+                service["classifications"].append(entry)
+                self.classifications_by_id[classification.id] = entry
+                api_rows.append({
+                    "id": s.id,
+                    "classification_id": classification.id,
+                    "name": s.service_name,
+                    "classification_name": classification.classification_name,
+                    "price": classification.price,
+                    "duration_minutes": classification.duration_minutes,
+                    "category": cat_name,
+                    "description": s.description or "No description available"
+                })
+            self.services.append(service)
+            self.services_by_id[s.id] = service
+            self.categories.setdefault(cat_name, []).append(service)
+
+        # Pre-serialized /api/services body and its content hash
+        self.api_json = json.dumps(api_rows, separators=(",", ":")).encode("utf-8")
+        self.version = hashlib.sha1(self.api_json).hexdigest()
+        self.built_at = time.monotonic()
+
+
+class ServiceCatalog:
+    """
+    Builds the catalog once with eager loading and serves it from memory until
+    invalidate() is called (automatically on commits touching catalog rows) or
+    SERVICE_CATALOG_TTL seconds pass. Rebuilds requested by refresh() for ids
+    the cache lacks are at most one per SERVICE_CATALOG_MIN_REFRESH seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: CatalogSnapshot | None = None
+
+    def get(self) -> CatalogSnapshot:
+        ttl = current_app.config.get("SERVICE_CATALOG_TTL", 0)
+        snapshot = self._snapshot
+        if snapshot is not None and (not ttl or time.monotonic() - snapshot.built_at < ttl):
+            return snapshot
+        with self._lock:
+            if self._snapshot is snapshot:
+                self._snapshot = self._build()
+            return self._snapshot
+
+    def refresh(self) -> CatalogSnapshot:
+        """
+        Rebuild to pick up ids added by another process, unless the current build
+        is younger than SERVICE_CATALOG_MIN_REFRESH; until then unknown ids stay
+        unknown, so a client sending bad ids cannot force a rebuild per request.
+        """
+        min_interval = current_app.config.get("SERVICE_CATALOG_MIN_REFRESH", 0)
+        snapshot = self.get()
+        if time.monotonic() - snapshot.built_at < min_interval:
+            return snapshot
+        with self._lock:
+            if self._snapshot is snapshot:
+                self._snapshot = self._build()
+            return self._snapshot
+
+    @staticmethod
+    def _build() -> CatalogSnapshot:
+        services = (
+            Service.query
+            .options(joinedload(Service.category), selectinload(Service.classifications))
+            .order_by(Service.service_name.asc())
+            .all()
+        )
+        return CatalogSnapshot(services)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+
+service_catalog = ServiceCatalog()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_catalog_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CATALOG_MODELS):
+            session.info["service_catalog_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("service_catalog_changed", False):
+        service_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("service_catalog_changed", None)
@@ -3,8 +3,15 @@ from datetime import datetime, timedelta
 from typing import Any
 
 from flask_socketio import emit, join_room
-
-from .extensions import db, socketio
+from sqlalchemy import insert
+
+from .extensions import db
+from .instrumentation import on_event
+from .monitor_state import monitor_board
+from .rollups import record_payment
+from .service_catalog import service_catalog
+from .transaction_payloads import TRANSACTION_GRAPH, transaction_payloads
+from .work_queue import therapist_queue, cashier_queue
 from .models import (
     Service,
     ServiceClassification,
@@ -15,61 +22,32 @@ from .models import (
     TransactionStatus,
     Payment,
 )
-from .utils.auth_helpers import get_current_therapist, get_current_cashier
-
-
-# Utility serializers
-def _iso(dt: datetime | None) -> str | None:
-    if not dt:
-        return None
-    # Use local time instead of UTC
-    try:
-        return dt.isoformat()
-    except Exception:
-        return None
-
-def serialize_transaction(tx: Transaction) -> dict[str, Any]:
-    data = {
-        "id": tx.id,
-        "code": tx.code,
-        # "customer_name": tx.customer_name,
-        "status": tx.status.value,
-        "therapist": tx.therapist.name if tx.therapist else None,
-        "room_number": tx.room_number,
-        "total_amount": tx.total_amount,
-        "total_duration_minutes": tx.total_duration_minutes,
-        "service_start_at": _iso(tx.service_start_at),
-        "items": [
-            {
-                "id": it.id,
-                "service_id": it.service_id,
-                "service_name": it.service.service_name,
-                "price": it.price,
-                "duration_minutes": it.duration_minutes,
-            }
-            for it in tx.items
-        ],
-    }
-    if tx.payment:
-        data["payment"] = {
-            "amount_due": tx.payment.amount_due,
-            "amount_paid": tx.payment.amount_paid,
-            "change_amount": tx.payment.change_amount,
-            "method": tx.payment.method,
-            "created_at": _iso(tx.payment.created_at),
-        }
-    return data
+from .utils.auth_helpers import (
+    authenticate_socket,
+    forget_socket,
+    get_socket_therapist,
+    get_socket_cashier,
+)
+from .utils.log import get_logger
+
+log = get_logger("socket")
 
 
 # Rooms
 # - Global broadcast rooms: "therapist_queue", "cashier_queue", "monitor"
 # - Per-transaction room: f"txn_{tx.id}"
 
-@socketio.on("connect")
-def on_connect():
+@on_event("connect")
+def on_connect(auth=None):
+    # Resolve the therapist/cashier once; handlers read it from memory afterwards
+    authenticate_socket()
     emit("connected", {"message": "connected"})
 
-@socketio.on("join_room")
+@on_event("disconnect")
+def on_disconnect():
+    forget_socket()
+
+@on_event("join_room")
 def on_join_room(data):
     room = data.get("room")
     if room:
@@ -77,16 +55,19 @@ def on_join_room(data):
         emit("joined_room", {"room": room})
 
 # Dito napupunta yung confirm signal after iclick ni customer yung confirm button
-@socketio.on("customer_confirm_selection")
+@on_event("customer_confirm_selection")
 def customer_confirm_selection(data):
     customer_name = data.get("customer_name")
     items = data.get("items", [])  # list of service items with classification info
 
-    tx = Transaction(status=TransactionStatus.pending_therapist)
+    # Generate a transaction code immediately so both customer and therapist can see it.
+    # Reserved before this session writes anything, so the counter is never locked behind it.
+    tx = Transaction(status=TransactionStatus.pending_therapist, code=Transaction.generate_code())
     # tx = Transaction(customer_name=customer_name, status=TransactionStatus.pending_therapist)
     db.session.add(tx)
     db.session.flush()
 
+    requested = []
     for item in items:
         # Handle both old format (just service_id) and new format (with classification)
         if isinstance(item, dict):
@@ -96,36 +77,57 @@ def customer_confirm_selection(data):
             # Backward compatibility: treat as service_id
             service_id = item
             service_classification_id = None
-
-        service = db.session.get(Service, int(service_id))
-        if not service:
+        requested.append((
+            int(service_id),
+            int(service_classification_id) if service_classification_id else None,
+        ))
+
+    # Resolve every id from the cached catalog; unknown ids may trigger a rate-limited
+    # rebuild, and ids still unknown after it are rejected (skipped) below
+    catalog = service_catalog.get()
+    if any(
+        service_id not in catalog.services_by_id
+        or (classification_id and classification_id not in catalog.classifications_by_id)
+        for service_id, classification_id in requested
+    ):
+        catalog = service_catalog.refresh()
+
+    rows = []
+    for service_id, classification_id in requested:
+        if service_id not in catalog.services_by_id:
             continue
 
         # Get price and duration from classification if available, otherwise use default
         price = 0.0
         duration_minutes = 60  # Default duration
 
-        if service_classification_id:
-            classification = db.session.get(ServiceClassification, int(service_classification_id))
-            if classification:
-                price = classification.price
-                duration_minutes = classification.duration_minutes
-        
-        db.session.add(
-            TransactionItem(
-                transaction_id=tx.id,
-                service_id=service.id,
-                service_classification_id=service_classification_id,
-                price=price,
-                duration_minutes=duration_minutes,
-            )
-        )
+        if classification_id:
+            classification = catalog.classifications_by_id.get(classification_id)
+            if not classification or classification["service_id"] != service_id:
+                # Classification must belong to the selected service
+                continue
+            price = classification["price"]
+            duration_minutes = classification["duration_minutes"]
+
+        rows.append({
+            "transaction_id": tx.id,
+            "service_id": service_id,
+            "service_classification_id": classification_id,
+            "price": price,
+            "duration_minutes": duration_minutes,
+        })
+
+    if rows:
+        # Single executemany instead of one INSERT per item
+        db.session.execute(insert(TransactionItem), rows)
+
     tx.selection_confirmed_at = datetime.now()  # Use local time instead of UTC
-    tx.recompute_totals()
-    # Generate a transaction code immediately so both customer and therapist can see it
-    tx.code = Transaction.generate_code()
+    tx.total_amount = round(sum(row["price"] for row in rows), 2)
+    tx.total_duration_minutes = sum(row["duration_minutes"] for row in rows)
 
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
     emit("therapist_queue_updated", broadcast=True, to="therapist_queue")
     emit("monitor_updated", broadcast=True, to="monitor")
@@ -133,25 +135,35 @@ def customer_confirm_selection(data):
     # emit("monitor_customer_confirmed", {"code": tx.code, "customer": customer_name}, to="monitor")
 
     # Send initial transaction snapshot back to the customer so UI can show code, items, and total right away
-    emit("customer_selection_received", {"transaction_id": tx.id, "transaction": serialize_transaction(tx)})
+    emit("customer_selection_received", {"transaction_id": tx.id, "transaction": payload.customer})
 
-@socketio.on("therapist_subscribe")
+@on_event("therapist_subscribe")
 def therapist_subscribe():
     join_room("therapist_queue")
 
-@socketio.on("cashier_subscribe")
+@on_event("cashier_subscribe")
 def cashier_subscribe():
     join_room("cashier_queue")
+    # Per-cashier room for print job notifications
+    cashier = get_socket_cashier()
+    if cashier:
+        join_room(f"cashier_{cashier.id}")
 
-@socketio.on("monitor_subscribe")
+@on_event("monitor_subscribe")
 def monitor_subscribe():
     join_room("monitor")
+    emit("monitor_state", monitor_board.snapshot())
+
+@on_event("monitor_sync")
+def monitor_sync():
+    # Sent by monitors that missed a delta version
+    emit("monitor_state", monitor_board.snapshot())
 
-@socketio.on("therapist_confirm_next")
+@on_event("therapist_confirm_next")
 def therapist_confirm_next(data):
     # Get authenticated therapist from token or session
     # Tuple Unpacking
-    therapist, _ = get_current_therapist()
+    therapist = get_socket_therapist()
     
     if not therapist:
         emit("therapist_confirm_result", {"ok": False, "error": "Authentication required"})
@@ -160,40 +172,37 @@ def therapist_confirm_next(data):
     room_number = therapist.room_number
 
     # Type Annotation
-    tx: Transaction | None = (
-        Transaction.query
-        .filter_by(status=TransactionStatus.pending_therapist)
-        .order_by(Transaction.selection_confirmed_at.asc())
-        .with_for_update(skip_locked=True)
-        .first()
+    tx: Transaction | None = therapist_queue.claim(
+        TransactionStatus.therapist_confirmed,
+        therapist=therapist,
+        room_number=room_number,
+        therapist_confirmed_at=datetime.now(),  # Use local time instead of UTC
     )
 
     if not tx:
         emit("therapist_confirm_result", {"ok": False, "error": "No pending customers."})
         return
 
-    tx.therapist = therapist
-    tx.room_number = room_number
-    tx.status = TransactionStatus.therapist_confirmed
-    tx.therapist_confirmed_at = datetime.now()  # Use local time instead of UTC
     if not tx.code:
         tx.code = Transaction.generate_code()
 
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
     room = f"txn_{tx.id}"
     join_room(room)  # Therapist joins the transaction room
     emit("joined_room", {"room": room})
-    print(f"[DEBUG] Therapist {therapist.name} joined room {room} after confirming transaction")
+    log.debug("Therapist joined room after confirming transaction", extra={"therapist": therapist.name, "room": room})
 
     emit("therapist_queue_updated", broadcast=True, to="therapist_queue")
     emit("monitor_updated", broadcast=True, to="monitor")
     emit("monitor_therapist_confirmed", {"code": tx.code, "therapist": therapist.name, "room": room_number}, to="monitor")
-    emit("customer_txn_update", serialize_transaction(tx), to=room)
+    emit("customer_txn_update", payload.customer, to=room)
 
-    emit("therapist_confirm_result", {"ok": True, "transaction": serialize_transaction(tx)})
+    emit("therapist_confirm_result", {"ok": True, "transaction": payload.customer})
 
-@socketio.on("therapist_start_service")
+@on_event("therapist_start_service")
 def therapist_start_service(data):
     tx_id = int(data.get("transaction_id"))
     tx = db.session.get(Transaction, tx_id)
@@ -204,14 +213,16 @@ def therapist_start_service(data):
     tx.status = TransactionStatus.in_service
     tx.service_start_at = datetime.now()  # Use local time instead of UTC
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
     room = f"txn_{tx.id}"
     emit("monitor_updated", broadcast=True, to="monitor")
     emit("monitor_service_started", {"code": tx.code, "therapist": tx.therapist.name if tx.therapist else None}, to="monitor")
-    emit("customer_txn_update", serialize_transaction(tx), to=room)
+    emit("customer_txn_update", payload.customer, to=room)
 
 
-@socketio.on("therapist_add_service")
+@on_event("therapist_add_service")
 def therapist_add_service(data):
     tx_id = int(data.get("transaction_id"))
     service_id = int(data.get("service_id"))
@@ -252,14 +263,16 @@ def therapist_add_service(data):
     )
     tx.recompute_totals()
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
     room = f"txn_{tx.id}"
-    emit("customer_txn_update", serialize_transaction(tx), to=room)
+    emit("customer_txn_update", payload.customer, to=room)
     emit("monitor_updated", broadcast=True, to="monitor")
-    emit("therapist_edit_done", {"ok": True, "transaction": serialize_transaction(tx)})
+    emit("therapist_edit_done", {"ok": True, "transaction": payload.customer})
 
 
-@socketio.on("therapist_remove_item")
+@on_event("therapist_remove_item")
 def therapist_remove_item(data):
     item_id = int(data.get("transaction_item_id"))
     item = db.session.get(TransactionItem, item_id)
@@ -276,16 +289,18 @@ def therapist_remove_item(data):
     db.session.flush()
     tx.recompute_totals()
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
     room = f"txn_{tx.id}"
-    emit("customer_txn_update", serialize_transaction(tx), to=room)
+    emit("customer_txn_update", payload.customer, to=room)
     emit("monitor_updated", broadcast=True, to="monitor")
-    emit("therapist_edit_done", {"ok": True, "transaction": serialize_transaction(tx)})
+    emit("therapist_edit_done", {"ok": True, "transaction": payload.customer})
 
 
-@socketio.on("therapist_get_current_transaction")
+@on_event("therapist_get_current_transaction")
 def therapist_get_current_transaction():
-    therapist, _ = get_current_therapist()
+    therapist = get_socket_therapist()
     if not therapist:
         emit("therapist_current_transaction", None)
         return
@@ -294,19 +309,19 @@ def therapist_get_current_transaction():
     tx = Transaction.query.filter(
         Transaction.therapist_id == therapist.id,
         Transaction.status.in_([TransactionStatus.therapist_confirmed, TransactionStatus.in_service])
-    ).first()
+    ).options(*TRANSACTION_GRAPH).first()
     
     if tx:
         # Join the transaction room to receive updates
         room = f"txn_{tx.id}"
         join_room(room)
-        print(f"[DEBUG] Therapist {therapist.name} joined room {room}")
-        emit("therapist_current_transaction", serialize_transaction(tx))
+        log.debug("Therapist joined room", extra={"therapist": therapist.name, "room": room})
+        emit("therapist_current_transaction", transaction_payloads.get(tx).customer)
     else:
         emit("therapist_current_transaction", None)
 
 
-@socketio.on("therapist_finish_service")
+@on_event("therapist_finish_service")
 def therapist_finish_service(data):
     tx_id = int(data.get("transaction_id"))
     tx = db.session.get(Transaction, tx_id)
@@ -317,46 +332,45 @@ def therapist_finish_service(data):
     tx.status = TransactionStatus.finished
     tx.service_finish_at = datetime.now()  # Use local time instead of UTC
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
-    emit("therapist_finish_result", {"ok": True, "transaction": serialize_transaction(tx)})
+    emit("therapist_finish_result", {"ok": True, "transaction": payload.customer})
 
     emit("cashier_queue_updated", broadcast=True, to="cashier_queue")
     emit("monitor_updated", broadcast=True, to="monitor")
     emit("monitor_service_finished", {"code": tx.code, "therapist": tx.therapist.name if tx.therapist else None}, to="monitor")
 
 
-@socketio.on("cashier_claim_next")
+@on_event("cashier_claim_next")
 def cashier_claim_next(data):
-    cashier, _ = get_current_cashier()
+    cashier = get_socket_cashier()
     if not cashier:
         emit("cashier_claim_result", {"ok": False, "error": "Login required"})
         return
 
-    tx: Transaction | None = (
-        Transaction.query
-        .filter_by(status=TransactionStatus.finished)
-        .order_by(Transaction.service_finish_at.asc())
-        .with_for_update(skip_locked=True)
-        .first()
+    tx: Transaction | None = cashier_queue.claim(
+        TransactionStatus.awaiting_payment,
+        assigned_cashier=cashier,
+        cashier_claimed_at=datetime.now(),  # Use local time instead of UTC
     )
 
     if not tx:
         emit("cashier_claim_result", {"ok": False, "error": "No finished customers."})
         return
 
-    tx.status = TransactionStatus.awaiting_payment
-    tx.assigned_cashier = cashier
-    tx.cashier_claimed_at = datetime.now()  # Use local time instead of UTC
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
     emit("monitor_payment_counter", {"code": tx.code, "cashier": cashier.name, "counter": cashier.counter_number}, to="monitor")
     emit("cashier_queue_updated", broadcast=True, to="cashier_queue")
-    emit("cashier_claim_result", {"ok": True, "transaction": serialize_transaction(tx)})
+    emit("cashier_claim_result", {"ok": True, "transaction": payload.customer})
 
 
-@socketio.on("cashier_get_current_transaction")
+@on_event("cashier_get_current_transaction")
 def cashier_get_current_transaction():
-    cashier, _ = get_current_cashier()
+    cashier = get_socket_cashier()
     if not cashier:
         emit("cashier_current_transaction", None)
         return
@@ -365,21 +379,21 @@ def cashier_get_current_transaction():
     tx = Transaction.query.filter(
         Transaction.assigned_cashier_id == cashier.id,
         Transaction.status.in_([TransactionStatus.awaiting_payment, TransactionStatus.paying])
-    ).first()
+    ).options(*TRANSACTION_GRAPH).first()
     
     if tx:
-        emit("cashier_current_transaction", serialize_transaction(tx))
+        emit("cashier_current_transaction", transaction_payloads.get(tx).customer)
     else:
         emit("cashier_current_transaction", None)
 
 
-@socketio.on("cashier_pay")
+@on_event("cashier_pay")
 def cashier_pay(data):
     amount_paid = float(data.get("amount_paid"))
     # Automatically set method to "cash" - no need to get from data
     method = "cash"
 
-    cashier, _ = get_current_cashier()
+    cashier = get_socket_cashier()
     if not cashier:
         emit("cashier_pay_result", {"ok": False, "error": "Login required"})
         return
@@ -409,9 +423,13 @@ def cashier_pay(data):
     db.session.add(payment)
     tx.status = TransactionStatus.paid
     tx.paid_at = datetime.now()  # Use local time instead of UTC
+    # Daily rollups change in the same commit as the payment
+    record_payment(tx, payment)
     db.session.commit()
+    payload = transaction_payloads.refresh(tx)
+    monitor_board.update_transaction(tx)
 
     emit("monitor_updated", broadcast=True, to="monitor")
     emit("monitor_payment_completed", {"code": tx.code, "cashier": cashier.name}, to="monitor")
     emit("cashier_queue_updated", broadcast=True, to="cashier_queue")
-    emit("cashier_pay_result", {"ok": True, "transaction": serialize_transaction(tx)})
+    emit("cashier_pay_result", {"ok": True, "transaction": payload.customer})
@@ -128,16 +128,20 @@ function refreshQueues() {
     .then((data) => renderQueues(data));
 }
 
-function renderPaymentHistory(payments) {
+// Cursor for the next history page (X-Next-Cursor); null once everything is loaded
+let paymentHistoryCursor = null;
+let paymentHistoryLoading = false;
+
+function renderPaymentHistory(payments, append = false) {
   const ul = document.getElementById("payment_history_list");
   if (!ul) return;
 
-  if (payments.length === 0) {
+  if (!append && payments.length === 0) {
     ul.innerHTML = '<li class="no-history-message">No payment history yet</li>';
     return;
   }
 
-  ul.innerHTML = payments
+  const html = payments
     .map((payment) => {
       const servicesHTML =
         payment.services && payment.services.length > 0
@@ -211,19 +215,41 @@ function renderPaymentHistory(payments) {
     `;
     })
     .join("");
+
+  if (append) {
+    ul.insertAdjacentHTML("beforeend", html);
+  } else {
+    ul.innerHTML = html;
+  }
 }
 
-function refreshPaymentHistory() {
-  fetchWithAuth("/cashier/payment-history")
-    .then((r) => r.json())
+function loadPaymentHistory(append) {
+  if (paymentHistoryLoading || (append && !paymentHistoryCursor)) return;
+  paymentHistoryLoading = true;
+
+  const url = append
+    ? `/cashier/payment-history?cursor=${encodeURIComponent(paymentHistoryCursor)}`
+    : "/cashier/payment-history";
+  fetchWithAuth(url)
+    .then((r) => {
+      paymentHistoryCursor = r.headers.get("X-Next-Cursor");
+      return r.json();
+    })
     .then((data) => {
-      renderPaymentHistory(data);
+      renderPaymentHistory(data, append);
     })
     .catch((error) => {
       console.error("Error fetching payment history:", error);
+    })
+    .finally(() => {
+      paymentHistoryLoading = false;
     });
 }
 
+function refreshPaymentHistory() {
+  loadPaymentHistory(false);
+}
+
 function viewReceipt(transactionId, code, amountPaid, changeAmount, services, amountDue) {
   const cashierName = myName || document.getElementById("cashier_name").textContent || "Cashier";
   
@@ -420,8 +446,8 @@ function renderPaymentPanel(tx) {
       <div class="controls">
         <label>Payment Amount <input id="amount_paid" type="number" min="0" step="0.01"></label>
         <button id="btn_pay" disabled>Pay</button>
-        <a id="receipt" href="/receipt/${
-          tx.code
+        <a id="receipt" href="/receipt/id/${
+          tx.id
         }" target="_blank" style="display:none">Receipt</a>
       </div>
       <div id="change_line"></div>
@@ -540,6 +566,14 @@ function bindControls() {
   const historySection = document.querySelector(".cashier-history-section");
   
   if (toggleHistoryBtn && historyContainer) {
+    // Fetch the next page when scrolled near the bottom
+    historyContainer.addEventListener("scroll", () => {
+      const remaining = historyContainer.scrollHeight - historyContainer.scrollTop - historyContainer.clientHeight;
+      if (remaining < 200) {
+        loadPaymentHistory(true);
+      }
+    });
+
     toggleHistoryBtn.addEventListener("click", () => {
       if (historyContainer.style.display === "none") {
         historyContainer.style.display = "block";
@@ -1,6 +1,14 @@
 const socket = io();
 
-socket.emit("monitor_subscribe");
+// Local copy of the server-side monitor board, kept current by monitor_delta
+let board = null; // { version, transactions: Map, rooms: Map, cashiers: Map, estimates: Map }
+let syncing = false;
+
+// (Re)subscribe on every connect; the server answers with a full monitor_state
+socket.on("connect", () => {
+  syncing = true;
+  socket.emit("monitor_subscribe");
+});
 
 const soundEl = document.getElementById("notifySound");
 let soundReady = false;
@@ -255,234 +263,260 @@ function div(content, className) {
   return div;
 }
 
-function refreshLists() {
-  fetch("/monitor_snapshot")
-    .then((r) => r.json())
-    .then((data) => {
-      const w = document.getElementById("waiting_therapist");
-      const serving = document.getElementById("serving");
-      const pa = document.getElementById("payment_assigned");
+function byOrder(a, b) {
+  const ka = a.order_at || "";
+  const kb = b.order_at || "";
+  if (ka !== kb) return ka < kb ? -1 : 1;
+  return a.id - b.id;
+}
 
-      // Stop all existing timers before refreshing
-      activeTimers.forEach((intervalId, transactionId) => {
-        clearInterval(intervalId);
-      });
-      activeTimers.clear();
-      
-      // Stop all existing room timers before refreshing
-      roomTimers.forEach((intervalId, roomNumber) => {
-        clearInterval(intervalId);
-      });
-      roomTimers.clear();
-
-      // WAITING: Shows transactions after customer confirms services (pending_therapist status)
-      w.innerHTML = "";
-      (data.waiting || []).forEach((t) =>
-        w.appendChild(div(`${t.code || "—"}`, "waiting"))
-      );
-
-      // SERVING: Shows transactions after therapist confirms until service finished
-      // This includes: therapist_confirmed and in_service statuses
-      serving.innerHTML = "";
-      (data.serving || []).forEach((t) => {
-        if (t.status === 'Therapist Confirmed') 
-          {
-          const occupiedHtml = `<div style="display:flex; align-items: center; gap: 20px; justify-content: center;"><span>${t.code}</span><span>Room ${t.room_number}</span><span class="occupied-flag">OCCUPIED</span></div>`;
-          serving.appendChild(div(occupiedHtml, "monitor-serving-container"));
-        } else if (t.status === 'In Service') 
-          {
-          const timerHtml = `<div style="display: flex; align-items: center; gap: 20px; justify-content: center;"><span>${t.code}</span><span>Room ${t.room_number}</span><span class="in-service-flag">IN SERVICE</span><span class="service-timer" id="timer-${t.id}">00:00:00</span></div>`;
-          serving.appendChild(div(timerHtml, "room-in-service"));
-          
-          // Start timer for this transaction
-          if (t.service_start_at && t.total_duration_minutes) {
-            startTimer(t.id, t.service_start_at, t.total_duration_minutes);
-          }
-        }
-      });
+function column(...statuses) {
+  return [...board.transactions.values()]
+    .filter((t) => statuses.includes(t.status))
+    .sort(byOrder);
+}
 
-      // COUNTER: Shows transactions after cashier confirms payment assignment (awaiting_payment status)
-      pa.innerHTML = "";
-      (data.payment_assigned || []).forEach((t) =>
-        pa.appendChild(div(`<p>${t.code}</p> <p>Counter ${t.counter}</p>`, "counter-designation"))
-      );
-    });
+function loadBoard(state) {
+  board = {
+    version: state.version,
+    transactions: new Map(),
+    rooms: new Map(),
+    cashiers: new Map(),
+    estimates: new Map(),
+  };
+  (state.estimates || []).forEach((e) => board.estimates.set(e.id, e));
+  [...state.waiting, ...state.serving, ...state.finished, ...state.payment_assigned].forEach((t) =>
+    board.transactions.set(t.id, t)
+  );
+  state.rooms.forEach((room) => board.rooms.set(room.room_number, room));
+  state.cashiers.forEach((cashier) => board.cashiers.set(cashier.id, cashier));
+  syncing = false;
+  renderBoard();
 }
 
-function refreshRoomStatus() {
-  fetch("/room_status")
-    .then((r) => r.json())
-    .then((data) => {
-      const roomStatusContainer = document.getElementById("room_status");
-      
-      // Store current timer states before clearing
-      const currentTimerStates = new Map();
-      roomTimers.forEach((intervalId, roomNumber) => {
-        currentTimerStates.set(roomNumber, true);
-      });
-      
-      // Clear existing room timers
-      roomTimers.forEach((intervalId, roomNumber) => {
-        clearInterval(intervalId);
-      });
-      roomTimers.clear();
-      
-      roomStatusContainer.innerHTML = "";
-      
-      (data.rooms || []).forEach((room) => {
-        console.log("Room data:", room); // Debug log
-        const statusClass = `room-${room.status.toLowerCase()}`;
-        
-        // Create the room info content with proper status display
-        let statusDisplay = room.status;
-        let showTimer = false;
-        
-        if (room.status === 'preparing') {
-          statusDisplay = 'ON BREAK';
-        } else if (room.status === 'available') {
-          statusDisplay = 'AVAILABLE';
-        } else if (room.status === 'occupied') {
-          statusDisplay = 'OCCUPIED';
-        } else if (room.status === 'on_going_service') {
-          statusDisplay = 'ON GOING SERVICE';
-          showTimer = true;
-        }
+function requestSync() {
+  if (syncing) return;
+  syncing = true;
+  socket.emit("monitor_sync");
+}
 
-        // Determine if we should show timer based on status and data availability
-        if (room.status === 'on_going_service' && room.service_start_at && room.total_duration_minutes) {
-          console.log("Room has ongoing service with timer data:", {
-            room_number: room.room_number,
-            service_start_at: room.service_start_at,
-            total_duration_minutes: room.total_duration_minutes,
-            transaction_id: room.transaction_id
-          });
-          showTimer = true;
-        }
-        
-        let roomInfoContent = `
-          <div class="room-number">ROOM ${room.room_number}</div>
-          <div style="display: flex; justify-content: space-between; align-items: center;">
-            <div class="room-status-text">${statusDisplay}</div>
-            ${showTimer ? `<div class="room-timer" id="room-timer-${room.room_number}">00:00:00</div>` : ''}
-          </div>
-        `;
-        
-        // Create the complete room card with status indicator
-        const roomContent = `
-          <div class="room-status-indicator"></div>
-          <div class="room-info">
-            ${roomInfoContent}
-          </div>
-        `;
-        
-        roomStatusContainer.appendChild(div(roomContent, `room-card ${statusClass}`));
-        
-        // Start timer for rooms with ongoing services
-        if (room.status === 'on_going_service' && room.service_start_at && room.total_duration_minutes) {
-          console.log("Starting timer for ongoing service in room", room.room_number);
-          // Start timer immediately without setTimeout
-          startRoomTimer(room.room_number, room.transaction_id, room.service_start_at, room.total_duration_minutes);
-        }
-      });
-    })
-    .catch((error) => {
-      console.error("Error fetching room status:", error);
-    });
+function applyDelta(delta) {
+  if (!board) return; // Waiting for the initial monitor_state
+  if (delta.version <= board.version) return; // Already covered by a newer snapshot
+  if (delta.version !== board.version + 1) {
+    // Missed a delta; fetch a fresh versioned snapshot
+    requestSync();
+    return;
+  }
+  board.version = delta.version;
+  delta.transactions.forEach((t) => board.transactions.set(t.id, t));
+  delta.removed.forEach((id) => board.transactions.delete(id));
+  delta.rooms.forEach((room) => board.rooms.set(room.room_number, room));
+  delta.cashiers.forEach((cashier) => board.cashiers.set(cashier.id, cashier));
+  (delta.removed_cashiers || []).forEach((id) => board.cashiers.delete(id));
+  if (delta.estimates) {
+    // Sent in full whenever the waiting queue is non-empty
+    board.estimates = new Map(delta.estimates.map((e) => [e.id, e]));
+  }
+  renderBoard();
 }
 
-function refreshCashierCounters() {
-  fetch("/cashier_status")
-    .then((r) => r.json())
-    .then((data) => {
-      const cashierContainer = document.getElementById("cashier_counters");
-      cashierContainer.innerHTML = "";
+function renderBoard() {
+  renderLists();
+  renderRoomStatus();
+  renderCashierCounters();
+}
+
+function renderLists() {
+  const data = {
+    waiting: column("pending_therapist"),
+    serving: [...column("Therapist Confirmed"), ...column("In Service")],
+    payment_assigned: column("awaiting_payment"),
+  };
+  const w = document.getElementById("waiting_therapist");
+  const serving = document.getElementById("serving");
+  const pa = document.getElementById("payment_assigned");
+
+  // Stop all existing timers before refreshing
+  activeTimers.forEach((intervalId, transactionId) => {
+    clearInterval(intervalId);
+  });
+  activeTimers.clear();
+
+  // WAITING: Shows transactions after customer confirms services (pending_therapist status)
+  w.innerHTML = "";
+  (data.waiting || []).forEach((t) => {
+    const estimate = board.estimates.get(t.id);
+    const eta = estimate && estimate.expected_start_at
+      ? ` <span class="waiting-eta" data-start="${estimate.expected_start_at}">${formatEta(estimate.expected_start_at)}</span>`
+      : "";
+    w.appendChild(div(`${t.code || "—"}${eta}`, "waiting"));
+  });
+
+  // SERVING: Shows transactions after therapist confirms until service finished
+  // This includes: therapist_confirmed and in_service statuses
+  serving.innerHTML = "";
+  (data.serving || []).forEach((t) => {
+    if (t.status === 'Therapist Confirmed') 
+      {
+      const occupiedHtml = `<div style="display:flex; align-items: center; gap: 20px; justify-content: center;"><span>${t.code}</span><span>Room ${t.room_number}</span><span class="occupied-flag">OCCUPIED</span></div>`;
+      serving.appendChild(div(occupiedHtml, "monitor-serving-container"));
+    } else if (t.status === 'In Service') 
+      {
+      const timerHtml = `<div style="display: flex; align-items: center; gap: 20px; justify-content: center;"><span>${t.code}</span><span>Room ${t.room_number}</span><span class="in-service-flag">IN SERVICE</span><span class="service-timer" id="timer-${t.id}">00:00:00</span></div>`;
+      serving.appendChild(div(timerHtml, "room-in-service"));
       
-      (data.cashiers || []).forEach((cashier) => {
-        const hasTransactions = cashier.transaction_count > 0;
-        const statusClass = hasTransactions ? 'has-transactions' : '';
-        
-        // Get the transaction codes for this cashier
-        let displayText = '';
-        if (cashier.transactions && cashier.transactions.length > 0) {
-          // Show the first transaction code, or multiple if they fit
-          const codes = cashier.transactions.map(tx => tx.code);
-          if (codes.length === 1) {
-            displayText = codes[0];
-          } else {
-            // For multiple transactions, show the first one with a count indicator
-            displayText = `${codes[0]} +${codes.length - 1}`;
-          }
-        }
-        
-        const cashierContent = `
-          <div class="cashier-name">CASHIER ${cashier.counter_number}</div>
-          <div class="cashier-counter">${displayText}</div>
-        `;
-        
-        cashierContainer.appendChild(div(cashierContent, `cashier-card ${statusClass}`));
-      });
-    })
-    .catch((error) => {
-      console.error("Error fetching cashier status:", error);
-    });
+      // Start timer for this transaction
+      if (t.service_start_at && t.total_duration_minutes) {
+        startTimer(t.id, t.service_start_at, t.total_duration_minutes);
+      }
+    }
+  });
+
+  // COUNTER: Shows transactions after cashier confirms payment assignment (awaiting_payment status)
+  pa.innerHTML = "";
+  (data.payment_assigned || []).forEach((t) =>
+    pa.appendChild(div(`<p>${t.code}</p> <p>Counter ${t.counter}</p>`, "counter-designation"))
+  );
+}
+
+// "~N min" until the expected start; estimates are absolute, so they count down without new pushes
+function formatEta(expectedStartAt) {
+  const minutes = Math.ceil((new Date(expectedStartAt) - Date.now()) / 60000);
+  return minutes > 0 ? `~${minutes} min` : "next";
+}
+
+setInterval(() => {
+  document.querySelectorAll(".waiting-eta").forEach((el) => {
+    el.textContent = formatEta(el.dataset.start);
+  });
+}, 15000);
+
+function renderRoomStatus() {
+  const roomStatusContainer = document.getElementById("room_status");
+
+  // Clear existing room timers
+  roomTimers.forEach((intervalId, roomNumber) => {
+    clearInterval(intervalId);
+  });
+  roomTimers.clear();
+  
+  roomStatusContainer.innerHTML = "";
+  
+  board.rooms.forEach((room) => {
+    const statusClass = `room-${room.status.toLowerCase()}`;
+    
+    // Create the room info content with proper status display
+    let statusDisplay = room.status;
+    let showTimer = false;
+    
+    if (room.status === 'preparing') {
+      statusDisplay = 'ON BREAK';
+    } else if (room.status === 'available') {
+      statusDisplay = 'AVAILABLE';
+    } else if (room.status === 'occupied') {
+      statusDisplay = 'OCCUPIED';
+    } else if (room.status === 'on_going_service') {
+      statusDisplay = 'ON GOING SERVICE';
+      showTimer = true;
+    }
+    
+    let roomInfoContent = `
+      <div class="room-number">ROOM ${room.room_number}</div>
+      <div style="display: flex; justify-content: space-between; align-items: center;">
+        <div class="room-status-text">${statusDisplay}</div>
+        ${showTimer ? `<div class="room-timer" id="room-timer-${room.room_number}">00:00:00</div>` : ''}
+      </div>
+    `;
+    
+    // Create the complete room card with status indicator
+    const roomContent = `
+      <div class="room-status-indicator"></div>
+      <div class="room-info">
+        ${roomInfoContent}
+      </div>
+    `;
+    
+    roomStatusContainer.appendChild(div(roomContent, `room-card ${statusClass}`));
+    
+    // Start timer for rooms with ongoing services
+    if (room.status === 'on_going_service' && room.service_start_at && room.total_duration_minutes) {
+      startRoomTimer(room.room_number, room.transaction_id, room.service_start_at, room.total_duration_minutes);
+    }
+  });
 }
 
+function renderCashierCounters() {
+  const cashierContainer = document.getElementById("cashier_counters");
+  cashierContainer.innerHTML = "";
+  
+  const cashiers = [...board.cashiers.values()].sort((a, b) =>
+    a.counter_number < b.counter_number ? -1 : a.counter_number > b.counter_number ? 1 : 0
+  );
+  cashiers.forEach((cashier) => {
+    const hasTransactions = cashier.transaction_count > 0;
+    const statusClass = hasTransactions ? 'has-transactions' : '';
+    
+    // Get the transaction codes for this cashier
+    let displayText = '';
+    if (cashier.transactions && cashier.transactions.length > 0) {
+      // Show the first transaction code, or multiple if they fit
+      const codes = cashier.transactions.map(tx => tx.code);
+      if (codes.length === 1) {
+        displayText = codes[0];
+      } else {
+        // For multiple transactions, show the first one with a count indicator
+        displayText = `${codes[0]} +${codes.length - 1}`;
+      }
+    }
+    
+    const cashierContent = `
+      <div class="cashier-name">CASHIER ${cashier.counter_number}</div>
+      <div class="cashier-counter">${displayText}</div>
+    `;
+    
+    cashierContainer.appendChild(div(cashierContent, `cashier-card ${statusClass}`));
+  });
+}
+
+socket.on("monitor_state", loadBoard);
+socket.on("monitor_delta", applyDelta);
+
 // Play sound on specific events
 socket.on("monitor_customer_confirmed", (data) => {
   console.log("Customer confirmed event:", data);
   playSound();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 socket.on("monitor_therapist_confirmed", (data) => {
   console.log("Therapist confirmed event:", data);
   playSound();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 socket.on("monitor_service_started", (data) => {
   console.log("Service started event:", data);
   playSound();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 socket.on("monitor_service_finished", (data) => {
   console.log("Service finished event:", data);
   playSound();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 socket.on("monitor_payment_counter", (data) => {
   console.log("Payment counter event:", data);
   playSound();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 socket.on("monitor_payment_completed", (data) => {
   console.log("Payment completed event:", data);
   playSound();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 // Also play sound for general monitor updates to catch any missed events
 socket.on("monitor_updated", () => {
   console.log("Monitor updated event");
   playSound();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 // Test if sound file is accessible
@@ -508,9 +542,6 @@ document.addEventListener('DOMContentLoaded', () => {
   testSoundFile();
   ensureSoundReady();
   unlockOnFirstGesture();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 });
 
 // Fallback initialization if DOMContentLoaded already fired
@@ -521,7 +552,4 @@ if (document.readyState === 'loading') {
   testSoundFile();
   ensureSoundReady();
   unlockOnFirstGesture();
-  refreshLists();
-  refreshRoomStatus();
-  refreshCashierCounters();
 }
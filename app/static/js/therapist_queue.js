@@ -77,16 +77,20 @@ function refreshQueue() {
     });
 }
 
-function renderFinishedTransactions(transactions) {
+// Cursor for the next history page; null once the whole history is loaded
+let historyCursor = null;
+let historyLoading = false;
+
+function renderFinishedTransactions(transactions, append = false) {
   const ul = document.getElementById("finished_transactions");
   if (!ul) return;
 
-  if (transactions.length === 0) {
+  if (!append && transactions.length === 0) {
     ul.innerHTML = '<li class="no-history-message">No finished transactions yet</li>';
     return;
   }
 
-  ul.innerHTML = transactions
+  const html = transactions
     .map((t) => {
       const servicesHTML =
         t.services && t.services.length > 0
@@ -142,19 +146,39 @@ function renderFinishedTransactions(transactions) {
     `;
     })
     .join("");
+
+  if (append) {
+    ul.insertAdjacentHTML("beforeend", html);
+  } else {
+    ul.innerHTML = html;
+  }
 }
 
-function refreshFinishedTransactions() {
-  fetchWithAuth("/therapist/finished-transactions")
+function loadFinishedTransactions(append) {
+  if (historyLoading || (append && !historyCursor)) return;
+  historyLoading = true;
+
+  const url = append
+    ? `/therapist/finished-transactions?cursor=${encodeURIComponent(historyCursor)}`
+    : "/therapist/finished-transactions";
+  fetchWithAuth(url)
     .then((r) => r.json())
     .then((data) => {
-      renderFinishedTransactions(data);
+      historyCursor = data.next_cursor;
+      renderFinishedTransactions(data.transactions || [], append);
     })
     .catch((error) => {
       console.error("Error fetching finished transactions:", error);
+    })
+    .finally(() => {
+      historyLoading = false;
     });
 }
 
+function refreshFinishedTransactions() {
+  loadFinishedTransactions(false);
+}
+
 function checkActiveTransaction() {
   socket.emit("therapist_get_current_transaction");
 }
@@ -204,6 +228,14 @@ function bindControls() {
   const historySection = document.querySelector(".therapist-history-section");
   
   if (toggleHistoryBtn && historyContainer) {
+    // Fetch the next page when scrolled near the bottom
+    historyContainer.addEventListener("scroll", () => {
+      const remaining = historyContainer.scrollHeight - historyContainer.scrollTop - historyContainer.clientHeight;
+      if (remaining < 200) {
+        loadFinishedTransactions(true);
+      }
+    });
+
     toggleHistoryBtn.addEventListener("click", () => {
       if (historyContainer.style.display === "none") {
         historyContainer.style.display = "block";
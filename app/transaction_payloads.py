@@ -0,0 +1,181 @@
+"""
+Transaction payloads, built once per state change and shared by every emit.
+
+A handler reloads the transaction with TRANSACTION_GRAPH after committing, then
+hands the same TransactionPayload to the direct reply, the txn_{id} room and the
+monitor board, instead of re-walking tx.items (and lazy-loading each service)
+and re-encoding the JSON once per outgoing message.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from datetime import datetime
+import threading
+from typing import Any
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from .extensions import db
+from .models import Transaction, TransactionItem
+from .utils.packet_json import EncodedJSON
+
+# Everything serialize_transaction and serialize_monitor_transaction read, in two statements
+TRANSACTION_GRAPH = (
+    joinedload(Transaction.therapist),
+    joinedload(Transaction.assigned_cashier),
+    joinedload(Transaction.payment),
+    selectinload(Transaction.items).joinedload(TransactionItem.service),
+    selectinload(Transaction.items).joinedload(TransactionItem.service_classification),
+)
+
+
+def _iso(dt: datetime | None) -> str | None:
+    if not dt:
+        return None
+    # Use local time instead of UTC
+    try:
+        return dt.isoformat()
+    except Exception:
+        return None
+
+
+def serialize_transaction(tx: Transaction) -> dict[str, Any]:
+    data = {
+        "id": tx.id,
+        "code": tx.code,
+        # "customer_name": tx.customer_name,
+        "status": tx.status.value,
+        "therapist": tx.therapist.name if tx.therapist else None,
+        "room_number": tx.room_number,
+        "total_amount": tx.total_amount,
+        "total_duration_minutes": tx.total_duration_minutes,
+        "service_start_at": _iso(tx.service_start_at),
+        "items": [
+            {
+                "id": it.id,
+                "service_id": it.service_id,
+                "service_name": it.service.service_name,
+                "price": it.price,
+                "duration_minutes": it.duration_minutes,
+            }
+            for it in tx.items
+        ],
+    }
+    if tx.payment:
+        data["payment"] = {
+            "amount_due": tx.payment.amount_due,
+            "amount_paid": tx.payment.amount_paid,
+            "change_amount": tx.payment.change_amount,
+            "method": tx.payment.method,
+            "created_at": _iso(tx.payment.created_at),
+        }
+    return data
+
+
+def serialize_monitor_transaction(tx: Transaction) -> dict[str, Any]:
+    return {
+        'id': tx.id,
+        'code': tx.code,
+        # 'customer_name': tx.customer_name,
+        'therapist': tx.therapist.name if tx.therapist else None,
+        'room_number': tx.room_number,
+        'total_amount': tx.total_amount,
+        'total_duration_minutes': tx.total_duration_minutes,
+        'cashier': tx.assigned_cashier.name if tx.assigned_cashier else None,
+        'counter': tx.assigned_cashier.counter_number if tx.assigned_cashier else None,
+        'status': tx.status.value,  # Include status for frontend logic
+        'service_start_at': tx.service_start_at.isoformat() if tx.service_start_at else None,  # Add timer data
+        'selected_services': [
+            {
+                'service_name': item.service.service_name,
+                'price': item.price,
+                'duration_minutes': item.duration_minutes,
+                'classification_name': item.service_classification.classification_name if item.service_classification else None
+            } for item in tx.items
+        ]
+    }
+
+
+def load_transaction(tx_id: int) -> Transaction | None:
+    """
+    (Re)load a transaction with TRANSACTION_GRAPH. Instances already in the
+    session are refreshed, so this is also the way to reload after a commit.
+    """
+    return db.session.get(Transaction, tx_id, options=TRANSACTION_GRAPH, populate_existing=True)
+
+
+def transaction_version(tx: Transaction) -> tuple:
+    """
+    Cheap key for the payloads: the transaction's own columns plus its item and
+    payment ids, read without walking the related rows. Every state change moves
+    status, totals, room, therapist, cashier or items; a therapist or service
+    renamed meanwhile shows up with the transaction's next change.
+    """
+    payment = tx.payment
+    return (
+        tx.status, tx.room_number, tx.therapist_id, tx.assigned_cashier_id,
+        tx.total_amount, tx.total_duration_minutes, tx.service_start_at,
+        payment.id if payment else None,
+        tuple(it.id for it in tx.items),
+    )
+
+
+class TransactionPayload:
+    """
+    The serialized forms of one transaction version. `customer` is encoded once
+    and sent as-is by every emit; `monitor` stays a dict, as the board copies it
+    into its own state. Treat both as read-only.
+    """
+    __slots__ = ("id", "version", "customer", "monitor")
+
+    def __init__(self, tx: Transaction, version: tuple):
+        self.id = tx.id
+        self.version = version
+        self.customer = EncodedJSON(serialize_transaction(tx))
+        self.monitor = serialize_monitor_transaction(tx)
+
+
+class TransactionPayloads:
+    """
+    Memoizes the latest TransactionPayload per transaction id, rebuilt only when
+    transaction_version() changes. Bounded, least recently used entries go first.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, TransactionPayload] = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tx: Transaction) -> TransactionPayload:
+        version = transaction_version(tx)
+        with self._lock:
+            payload = self._entries.get(tx.id)
+            if payload is not None and payload.version == version:
+                self._entries.move_to_end(tx.id)
+                self.hits += 1
+                return payload
+
+        payload = TransactionPayload(tx, version)
+        with self._lock:
+            self.misses += 1
+            self._entries[tx.id] = payload
+            self._entries.move_to_end(tx.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def refresh(self, tx: Transaction) -> TransactionPayload:
+        """Reload a just-committed transaction with its graph and return its payload"""
+        return self.get(load_transaction(tx.id))
+
+    def discard(self, tx_id: int) -> None:
+        with self._lock:
+            self._entries.pop(tx_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+transaction_payloads = TransactionPayloads()
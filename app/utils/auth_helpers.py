@@ -1,31 +1,142 @@
 """Authentication helper functions for token-based auth"""
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from functools import wraps
 import secrets
-from typing import Optional, Union, Tuple
+import threading
+import time
+from typing import Any, Optional, Union, Tuple
 
-from flask import request, jsonify, session
+from flask import current_app, request, jsonify, session
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
 from ..models import Therapist, Cashier
 from ..extensions import db
 
+TOKEN_LIFETIME = timedelta(hours=24)
+
+
+class TokenCache:
+    """
+    TTL-bounded LRU cache of (role, token) -> principal column snapshot.
+    Snapshots are plain dicts so they can be shared across sessions and threads.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple[str, str], tuple[float, dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model: type, token: str, ttl: float) -> Optional[dict[str, Any]]:
+        key = (model.__name__, token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_at, snapshot = entry
+            if time.monotonic() - cached_at > ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return snapshot
+
+    def put(self, model: type, token: str, snapshot: dict[str, Any]) -> None:
+        key = (model.__name__, token)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, model: type, token: Optional[str] = None, user_id: Optional[int] = None) -> None:
+        """Drop entries by token and/or by user id"""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] != model.__name__:
+                    continue
+                if key[1] == token or (user_id is not None and self._entries[key][1]["id"] == user_id):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class SocketPrincipals:
+    """Principal resolved at Socket.IO connect time, keyed by sid"""
+
+    def __init__(self):
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def bind(self, sid: str, model: Optional[type], token: Optional[str],
+             snapshot: Optional[dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[sid] = {
+                "model": model,
+                "token": token,
+                "snapshot": snapshot,
+                "bound_at": time.monotonic(),
+            }
+
+    def get(self, sid: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(sid)
+
+    def drop(self, sid: str) -> None:
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def evict_user(self, model: type, user_id: int) -> None:
+        with self._lock:
+            for sid, entry in list(self._entries.items()):
+                if entry["model"] is model and entry["snapshot"]["id"] == user_id:
+                    del self._entries[sid]
+
+
+socket_principals = SocketPrincipals()
+
+
+def _snapshot(user: Union[Therapist, Cashier]) -> dict[str, Any]:
+    """Copy the column values of a loaded user"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(type(user)).column_attrs}
+
+
+def _attach(model: type, snapshot: dict[str, Any]) -> Union[Therapist, Cashier]:
+    """Rebuild a session-bound user from a snapshot without querying the database"""
+    user = model(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
 
 # def generate_auth_token() -> str:
 #     """Generate a secure random token"""
 #     return secrets.token_urlsafe(32)
 
 
+def _forget_user(user: Union[Therapist, Cashier]) -> None:
+    """Drop every cached credential of a user"""
+    token_cache.evict(type(user), user.auth_token, user.id)
+    socket_principals.evict_user(type(user), user.id)
+
+
 def create_token_for_user(user: Union[Therapist, Cashier]) -> str:
     """Create and save auth token for a user"""
     # token = generate_auth_token()
     token = secrets.token_urlsafe(32)
+    _forget_user(user)
     user.auth_token = token
-    user.token_expires_at = datetime.now() + timedelta(hours=24)  # Token valid for 24 hours
+    user.token_expires_at = datetime.now() + TOKEN_LIFETIME  # Token valid for 24 hours
     db.session.commit()
     return token
 
 
 def invalidate_token(user: Union[Therapist, Cashier]) -> None:
     """Invalidate a user's auth token"""
+    _forget_user(user)
     user.auth_token = None
     user.token_expires_at = None
     db.session.commit()
@@ -51,46 +162,61 @@ def get_token_from_request() -> Optional[str]:
     return None
 
 
-def validate_therapist_token(token: str) -> Optional[Therapist]:
-    """Validate therapist auth token"""
+def _validate_token(model: type, token: str) -> Optional[Union[Therapist, Cashier]]:
+    """
+    Resolve a token to a user, serving repeat lookups from token_cache.
+    The sliding expiry is only written back once it is more than
+    AUTH_TOKEN_REFRESH_INTERVAL seconds behind, instead of on every call.
+    """
     if not token:
         return None
-    
-    therapist = Therapist.query.filter_by(auth_token=token).first()
-    if not therapist:
-        return None
-    
+
+    config = current_app.config
+    ttl = config.get("AUTH_TOKEN_CACHE_TTL", 60)
+    refresh_interval = timedelta(seconds=config.get("AUTH_TOKEN_REFRESH_INTERVAL", 300))
+    now = datetime.now()
+
+    snapshot = token_cache.get(model, token, ttl)
+    if snapshot is None:
+        user = model.query.filter_by(auth_token=token).first()
+        if not user:
+            return None
+        snapshot = _snapshot(user)
+    else:
+        user = None
+
     # Check if token is expired
-    if therapist.token_expires_at and therapist.token_expires_at < datetime.now():
-        invalidate_token(therapist)
+    expires_at = snapshot["token_expires_at"]
+    if expires_at and expires_at < now:
+        invalidate_token(user or _attach(model, snapshot))
         return None
-    
-    # Extend token expiration on successful validation
-    therapist.token_expires_at = datetime.now() + timedelta(hours=24)
-    db.session.commit()
-    
-    return therapist
+
+    # Extend token expiration lazily
+    if not expires_at or now + TOKEN_LIFETIME - expires_at >= refresh_interval:
+        new_expires_at = now + TOKEN_LIFETIME
+        updated = model.query.filter_by(id=snapshot["id"], auth_token=token).update(
+            {"token_expires_at": new_expires_at}, synchronize_session=False
+        )
+        db.session.commit()
+        if not updated:
+            # Token was revoked by another process since it was cached
+            token_cache.evict(model, token)
+            return None
+        snapshot = {**snapshot, "token_expires_at": new_expires_at}
+        user = None
+
+    token_cache.put(model, token, snapshot)
+    return user or _attach(model, snapshot)
+
+
+def validate_therapist_token(token: str) -> Optional[Therapist]:
+    """Validate therapist auth token"""
+    return _validate_token(Therapist, token)
 
 
 def validate_cashier_token(token: str) -> Optional[Cashier]:
     """Validate cashier auth token"""
-    if not token:
-        return None
-    
-    cashier = Cashier.query.filter_by(auth_token=token).first()
-    if not cashier:
-        return None
-    
-    # Check if token is expired
-    if cashier.token_expires_at and cashier.token_expires_at < datetime.now():
-        invalidate_token(cashier)
-        return None
-    
-    # Extend token expiration on successful validation
-    cashier.token_expires_at = datetime.now() + timedelta(hours=24)
-    db.session.commit()
-    
-    return cashier
+    return _validate_token(Cashier, token)
 
 
 def get_current_therapist() -> Tuple[Optional[Therapist], Optional[str]]:
@@ -117,6 +243,56 @@ def get_current_cashier() -> Tuple[Optional[Cashier], Optional[str]]:
     return None, None
 
 
+def authenticate_socket() -> None:
+    """Resolve the principal of the current Socket.IO connection once and bind it to its sid"""
+    token = get_token_from_request()
+    for model in (Therapist, Cashier):
+        user = _validate_token(model, token)
+        if user:
+            socket_principals.bind(request.sid, model, token, _snapshot(user))
+            return
+    socket_principals.bind(request.sid, None, token, None)
+
+
+def forget_socket() -> None:
+    """Drop the principal bound to the current Socket.IO connection"""
+    socket_principals.drop(request.sid)
+
+
+def _get_socket_principal(model: type) -> Optional[Union[Therapist, Cashier]]:
+    entry = socket_principals.get(request.sid)
+    if entry is None:
+        # Connected before the handler was registered (e.g. reloader restart)
+        authenticate_socket()
+        entry = socket_principals.get(request.sid)
+    if entry["model"] is not model:
+        return None
+
+    snapshot = entry["snapshot"]
+    expires_at = snapshot["token_expires_at"]
+    ttl = current_app.config.get("AUTH_TOKEN_CACHE_TTL", 60)
+    if (expires_at and expires_at < datetime.now()) or time.monotonic() - entry["bound_at"] > ttl:
+        # Re-check through the token cache so revocations and expiry still apply
+        user = _validate_token(model, entry["token"])
+        if not user:
+            socket_principals.drop(request.sid)
+            return None
+        socket_principals.bind(request.sid, model, entry["token"], _snapshot(user))
+        return user
+
+    return _attach(model, snapshot)
+
+
+def get_socket_therapist() -> Optional[Therapist]:
+    """Therapist bound to the current Socket.IO connection, without a database round trip"""
+    return _get_socket_principal(Therapist)
+
+
+def get_socket_cashier() -> Optional[Cashier]:
+    """Cashier bound to the current Socket.IO connection, without a database round trip"""
+    return _get_socket_principal(Cashier)
+
+
 def therapist_required(f):
     """Decorator to require therapist authentication"""
     @wraps(f)
@@ -0,0 +1,93 @@
+"""Block-reserving allocator for the 4-digit transaction codes"""
+import threading
+from datetime import date
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models import TransactionCounter
+
+COUNTER_ID = 1
+MAX_CODE = 9999
+
+
+class CodeAllocator:
+    """
+    Reserves blocks of numbers from the transaction_counter row with one atomic
+    UPDATE (RETURNING where supported, LAST_INSERT_ID() on MySQL) in its own
+    short transaction, then serves codes from memory. Processes never share a
+    block, so codes cannot collide, and the counter row is locked only for the
+    reservation rather than for the whole request.
+
+    Config:
+        TRANSACTION_CODE_BLOCK_SIZE: numbers reserved per round trip (default 10)
+        TRANSACTION_CODE_RESET: "daily" restarts at 0001 every day, "never" keeps counting
+    Numbers above 9999 wrap around to 0001.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._period: Optional[date] = None
+
+    def allocate(self) -> str:
+        block_size = max(1, int(current_app.config.get("TRANSACTION_CODE_BLOCK_SIZE", 10)))
+        daily = current_app.config.get("TRANSACTION_CODE_RESET", "daily") == "daily"
+        period = date.today() if daily else None
+
+        with self._lock:
+            if self._next >= self._end or self._period != period:
+                self._next, self._end = self._reserve(block_size, period)
+                self._period = period
+            number = self._next
+            self._next += 1
+
+        return f"{(number - 1) % MAX_CODE + 1:04d}"
+
+    def reset(self) -> None:
+        """Drop the in-memory block (e.g. after the counter was reset externally)"""
+        with self._lock:
+            self._next = self._end = 0
+            self._period = None
+
+    @staticmethod
+    def _reserve(size: int, period: Optional[date]) -> tuple[int, int]:
+        """Atomically advance the counter by `size`; returns the reserved [start, end) range"""
+        counter = TransactionCounter
+        if period is None:
+            new_value = counter.next_number + size
+            values = {}
+        else:
+            new_value = case(
+                (counter.period == period, counter.next_number + size),
+                else_=1 + size,
+            )
+            values = {"period": period}
+
+        while True:
+            with db.engine.begin() as conn:
+                stmt = update(counter).where(counter.id == COUNTER_ID)
+                if conn.dialect.update_returning:
+                    end = conn.execute(
+                        stmt.values(next_number=new_value, **values).returning(counter.next_number)
+                    ).scalar()
+                else:
+                    result = conn.execute(stmt.values(next_number=func.last_insert_id(new_value), **values))
+                    end = conn.execute(select(func.last_insert_id())).scalar() if result.rowcount else None
+
+            if end is not None:
+                return end - size, end
+
+            # First use: create the counter row, then retry the reservation
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(counter).values(id=COUNTER_ID, next_number=1, period=period))
+            except IntegrityError:
+                pass  # Another process created it first
+
+
+code_allocator = CodeAllocator()
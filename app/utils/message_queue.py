@@ -0,0 +1,140 @@
+"""
+Socket.IO client managers that fan emits out across worker processes.
+
+SOCKETIO_MESSAGE_QUEUE picks the backend: redis://, rediss://, kafka://, zmq+tcp://
+or any Kombu URL (amqp://, ...). local:// is an in-process stand-in that behaves
+like a real queue between several servers in one process, for tests.
+
+Besides client emits, workers can notify each other with publish_to_workers();
+handlers registered with on_worker_event() run in every *other* worker.
+"""
+import pickle
+import threading
+from typing import Any, Callable
+
+import socketio as python_socketio
+
+from ..extensions import socketio
+
+# Room no client ever joins; emits to it are only seen by on_worker_event handlers
+WORKERS_ROOM = "__workers__"
+
+_worker_handlers: dict[str, Callable[[Any], None]] = {}
+
+
+def on_worker_event(event: str, handler: Callable[[Any], None]) -> None:
+    """Run `handler(data)` when another worker calls publish_to_workers(event, data)"""
+    _worker_handlers[event] = handler
+
+
+def publish_to_workers(event: str, data: Any) -> None:
+    """Send `data` to the other workers (a no-op without a message queue)"""
+    socketio.emit(event, data, to=WORKERS_ROOM)
+
+
+def _dispatch_worker_event(event: str, data: Any) -> None:
+    handler = _worker_handlers.get(event)
+    if handler is not None:
+        handler(data)
+
+
+class WorkerEventsMixin:
+    """Routes messages addressed to WORKERS_ROOM to on_worker_event handlers"""
+
+    def _handle_emit(self, message):
+        if message.get('room') != WORKERS_ROOM:
+            return super()._handle_emit(message)
+        if message.get('host_id') == self.host_id:
+            return  # The sender already applied it
+        _dispatch_worker_event(message['event'], message['data'])
+
+
+class LocalManager(python_socketio.Manager):
+    """
+    In-process stand-in for a message queue: emits reach the clients of every
+    Socket.IO server on the same channel in this process, and worker events
+    reach every other manager on it. It is not a PubSubManager, so the
+    Flask-SocketIO test client accepts it.
+    """
+    name = 'local'
+
+    _channels: dict[str, list["LocalManager"]] = {}
+    _channels_lock = threading.Lock()
+
+    def __init__(self, url='local://', channel='socketio', write_only=False, logger=None):
+        super().__init__()
+        self.channel = channel
+        with self._channels_lock:
+            self._channels.setdefault(channel, []).append(self)
+
+    def _peers(self) -> list["LocalManager"]:
+        with self._channels_lock:
+            return [m for m in self._channels.get(self.channel, ()) if m is not self]
+
+    def on_worker_event(self, event: str, data: Any) -> None:
+        """
+        Called with worker events from peers. Peers live in the same process and
+        share its on_worker_event handlers, which already ran for the sender, so
+        this does nothing by default; tests override it to observe the traffic.
+        """
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None,
+             callback=None, to=None, **kwargs):
+        room = to or room
+        if room == WORKERS_ROOM:
+            for peer in self._peers():
+                # Copied the way a real queue would serialize it
+                peer.on_worker_event(event, pickle.loads(pickle.dumps(data)))
+            return
+        super().emit(event, data, namespace=namespace, room=room, skip_sid=skip_sid, callback=callback)
+        if kwargs.get('ignore_queue'):
+            return
+        for peer in self._peers():
+            if peer.server is not None:
+                # Acks cannot cross servers
+                python_socketio.Manager.emit(
+                    peer, event, pickle.loads(pickle.dumps(data)), namespace=namespace, room=room,
+                    skip_sid=skip_sid,
+                )
+
+
+class RedisQueueManager(WorkerEventsMixin, python_socketio.RedisManager):
+    pass
+
+
+class KafkaQueueManager(WorkerEventsMixin, python_socketio.KafkaManager):
+    pass
+
+
+class ZmqQueueManager(WorkerEventsMixin, python_socketio.ZmqManager):
+    pass
+
+
+class KombuQueueManager(WorkerEventsMixin, python_socketio.KombuManager):
+    pass
+
+
+def create_client_manager(url: str, channel: str = 'flask-socketio',
+                          write_only: bool = False) -> python_socketio.Manager:
+    """Client manager for SOCKETIO_MESSAGE_QUEUE, chosen by URL scheme"""
+    if url.startswith('local://'):
+        manager_class = LocalManager
+    elif url.startswith(('redis://', 'rediss://')):
+        manager_class = RedisQueueManager
+    elif url.startswith('kafka://'):
+        manager_class = KafkaQueueManager
+    elif url.startswith('zmq'):
+        manager_class = ZmqQueueManager
+    else:
+        manager_class = KombuQueueManager
+    return manager_class(url, channel=channel, write_only=write_only)
+
+
+def start_listening(server: python_socketio.Server) -> None:
+    """
+    Subscribe to the queue now rather than on the first client connection, so
+    a worker without clients still receives worker events (e.g. board changes).
+    """
+    if not server.manager_initialized:
+        server.manager_initialized = True
+        server.manager.initialize()
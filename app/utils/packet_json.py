@@ -0,0 +1,44 @@
+"""JSON module for Socket.IO packets that splices in pre-encoded fragments"""
+import json
+import secrets
+from typing import Any
+
+_SEPARATORS = (",", ":")
+# Stand-in string for a fragment while the rest of the packet is encoded
+_MARK = f"\x00{secrets.token_hex(8)}:"
+
+
+class EncodedJSON:
+    """
+    A value encoded once and emitted many times: the packet encoder copies
+    `text` into every packet instead of serializing the value again.
+    """
+    __slots__ = ("text",)
+
+    def __init__(self, value: Any):
+        self.text = json.dumps(value, separators=_SEPARATORS)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def decode(self) -> Any:
+        return json.loads(self.text)
+
+
+def dumps(obj: Any, **kwargs) -> str:
+    """json.dumps, with EncodedJSON values anywhere in `obj` inserted verbatim"""
+    fragments: list[str] = []
+
+    def default(value):
+        if isinstance(value, EncodedJSON):
+            fragments.append(value.text)
+            return f"{_MARK}{len(fragments) - 1}"
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    text = json.dumps(obj, default=default, **kwargs)
+    for n, fragment in enumerate(fragments):
+        text = text.replace(json.dumps(f"{_MARK}{n}"), fragment, 1)
+    return text
+
+
+loads = json.loads
@@ -0,0 +1,74 @@
+"""Keyset pagination over (timestamp, id), newest first, with opaque cursor tokens"""
+from __future__ import annotations
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(at: datetime, row_id: int) -> str:
+    raw = json.dumps([at.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str | None) -> tuple[datetime, int] | None:
+    """The (timestamp, id) of the last row already seen; raises ValueError on a malformed token"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        at, row_id = json.loads(raw)
+        return datetime.fromisoformat(at), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page_size(value: str | None, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    try:
+        size = int(value) if value else default
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+def parse_day_bound(value: str | None, end: bool = False) -> datetime | None:
+    """?from=/?to= as an ISO date or datetime; a bare `to` date includes that whole day"""
+    if not value:
+        return None
+    bound = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        bound += timedelta(days=1)
+    return bound
+
+
+def before_cursor(at_column, id_column, cursor: tuple[datetime, int] | None):
+    """
+    WHERE clause for rows after `cursor` in (at_column DESC, id_column DESC) order.
+    Spelled out rather than as a row-value comparison so MySQL can range-scan an
+    index ending in (at_column).
+    """
+    if cursor is None:
+        return and_(at_column.isnot(None))
+    at, row_id = cursor
+    return and_(
+        at_column.isnot(None),
+        or_(at_column < at, and_(at_column == at, id_column < row_id)),
+    )
+
+
+def merge_pages(
+    sources: Iterable[list[Any]], limit: int, key: Callable[[Any], tuple[datetime, int]]
+) -> tuple[list[Any], str | None]:
+    """
+    Merge newest-first pages fetched with limit + 1 rows each (e.g. from the live
+    and archive tables) into one page and the cursor for the next one.
+    """
+    rows = sorted((row for source in sources for row in source), key=key, reverse=True)
+    page = rows[:limit]
+    next_cursor = encode_cursor(*key(page[-1])) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,123 @@
+"""Connection-pool instrumentation: checkout/checkin counts, hold and wait times"""
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class _Timer:
+    """count / total / max of a duration, in seconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class PoolMetrics:
+    """Counters fed by pool events and by TimedQueuePool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidated": 0, "timeouts": 0}
+            self._wait = _Timer()
+            self._hold = _Timer()
+            self._peak_checked_out = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._wait.add(seconds)
+
+    def record_hold(self, seconds: float) -> None:
+        with self._lock:
+            self._hold.add(seconds)
+
+    def instrument(self, engine: Engine) -> None:
+        """Attach the pool event listeners to `engine`"""
+        pool = engine.pool
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            self.count("connects")
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info["checked_out_at"] = time.monotonic()
+            with self._lock:
+                self._counters["checkouts"] += 1
+                if isinstance(pool, QueuePool):
+                    self._peak_checked_out = max(self._peak_checked_out, pool.checkedout())
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            started = connection_record.info.pop("checked_out_at", None)
+            with self._lock:
+                self._counters["checkins"] += 1
+                if started is not None:
+                    self._hold.add(time.monotonic() - started)
+
+        @event.listens_for(engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            self.count("invalidated")
+
+    def snapshot(self, engine: Engine) -> dict[str, Any]:
+        pool = engine.pool
+        with self._lock:
+            data: dict[str, Any] = {
+                "pool_class": type(pool).__name__,
+                **self._counters,
+                "peak_checked_out": self._peak_checked_out,
+                "wait": self._wait.to_dict(),
+                "hold": self._hold.to_dict(),
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "timeout": pool.timeout(),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection, and timeouts"""
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.count("timeouts")
+            raise
+        pool_metrics.record_wait(time.monotonic() - started)
+        return conn
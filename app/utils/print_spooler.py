@@ -0,0 +1,206 @@
+"""Background print spooler with one warm connection per thermal printer"""
+import itertools
+import queue
+import select
+import socket
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from .log import get_logger
+
+log = get_logger("print_spooler")
+
+
+class PrintJob:
+    """A single receipt waiting to be written to a printer"""
+
+    def __init__(self, job_id: str, host: str, port: int, data: bytes,
+                 on_done: Optional[Callable[["PrintJob"], None]] = None, owner_id: Optional[int] = None):
+        self.id = job_id
+        self.host = host
+        self.port = port
+        self.data = data
+        self.on_done = on_done
+        self.owner_id = owner_id  # Submitting cashier; only they may read the job
+        self.status = "queued"  # queued, printing, done, failed
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self._enqueued = time.monotonic()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "printer_host": self.host,
+            "printer_port": self.port,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class _PrinterWorker:
+    """Drains the queue of one (host, port) printer over a reused socket"""
+
+    def __init__(self, spooler: "PrintSpooler", host: str, port: int):
+        self.spooler = spooler
+        self.host = host
+        self.port = port
+        self.queue: "queue.Queue[PrintJob]" = queue.Queue()
+        self._sock: Optional[socket.socket] = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"print-spooler-{host}:{port}", daemon=True
+        )
+        self._thread.start()
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _peer_closed(self) -> bool:
+        """
+        True when the printer has closed or reset the warm connection. A send on
+        such a socket still succeeds locally, so the receipt would be lost.
+        """
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            return bool(readable) and self._sock.recv(1, socket.MSG_PEEK) == b""
+        except (OSError, ValueError):
+            return True
+
+    def _send(self, data: bytes) -> None:
+        if self._sock is not None and self._peer_closed():
+            self._close()
+        if self._sock is None:
+            self._sock = socket.create_connection(
+                (self.host, self.port), timeout=self.spooler.timeout
+            )
+        try:
+            self._sock.sendall(data)
+        except OSError:
+            # Drop the stale connection so the retry reconnects
+            self._close()
+            raise
+
+    def _run(self) -> None:
+        while True:
+            try:
+                job = self.queue.get(timeout=self.spooler.idle_timeout)
+            except queue.Empty:
+                # Printers often accept a single client; release it when idle
+                self._close()
+                continue
+            self._process(job)
+            self.queue.task_done()
+
+    def _process(self, job: PrintJob) -> None:
+        job.status = "printing"
+        delay = self.spooler.backoff
+        while True:
+            job.attempts += 1
+            try:
+                self._send(job.data)
+                job.status = "done"
+                job.error = None
+                break
+            except OSError as e:
+                self._close()
+                job.error = str(e)
+                if job.attempts > self.spooler.max_retries:
+                    job.status = "failed"
+                    break
+                self.spooler._count("retries")
+                time.sleep(delay)
+                delay = min(delay * 2, self.spooler.max_backoff)
+
+        job.finished_at = datetime.now()
+        self.spooler._record(job, time.monotonic() - job._enqueued)
+        if job.on_done:
+            try:
+                job.on_done(job)
+            except Exception:
+                log.exception("Print job callback error", extra={"job_id": job.id})
+
+
+class PrintSpooler:
+    """
+    Queues print jobs per (printer_host, printer_port) and writes them from
+    background workers, so HTTP requests never wait on a printer.
+    """
+
+    def __init__(self, timeout: float = 5, max_retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 8, idle_timeout: float = 30, history_size: int = 500):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._workers: dict[tuple[str, int], _PrinterWorker] = {}
+        self._jobs: "OrderedDict[str, PrintJob]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._counters = {"submitted": 0, "done": 0, "failed": 0, "retries": 0}
+        self._latency = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+
+    def submit(self, host: str, port: int, data: bytes,
+               on_done: Optional[Callable[[PrintJob], None]] = None, owner_id: Optional[int] = None) -> PrintJob:
+        """Queue raw ESC/POS bytes for a printer and return immediately"""
+        key = (host, int(port))
+        with self._lock:
+            job = PrintJob(f"pj-{next(self._ids)}", key[0], key[1], data, on_done, owner_id)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history_size:
+                self._jobs.popitem(last=False)
+            self._counters["submitted"] += 1
+            worker = self._workers.get(key)
+            if worker is None:
+                worker = self._workers[key] = _PrinterWorker(self, *key)
+        worker.queue.put(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[PrintJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _record(self, job: PrintJob, latency: float) -> None:
+        with self._lock:
+            self._counters[job.status] += 1
+            self._latency["count"] += 1
+            self._latency["total"] += latency
+            self._latency["last"] = latency
+            self._latency["max"] = max(self._latency["max"], latency)
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth per printer plus job and latency counters"""
+        with self._lock:
+            count = self._latency["count"]
+            return {
+                **self._counters,
+                "queue_depth": {
+                    f"{host}:{port}": w.queue.qsize() for (host, port), w in self._workers.items()
+                },
+                "latency_ms": {
+                    "avg": round(self._latency["total"] / count * 1000, 2) if count else 0.0,
+                    "max": round(self._latency["max"] * 1000, 2),
+                    "last": round(self._latency["last"] * 1000, 2),
+                },
+            }
+
+
+# Process-wide spooler used by the cashier routes
+print_spooler = PrintSpooler()
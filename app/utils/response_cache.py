@@ -0,0 +1,36 @@
+"""Short-lived cache for computed endpoint payloads"""
+import threading
+import time
+from typing import Any, Callable
+
+
+class ResponseCache:
+    """
+    Holds one computed payload for up to `ttl` seconds. clear() drops it at
+    once; a payload built while a clear() happened is not stored.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._stored_at = 0.0
+        self._generation = 0
+
+    def get_or_build(self, ttl: float, build: Callable[[], Any]) -> Any:
+        if ttl <= 0:
+            return build()
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._stored_at < ttl:
+                return self._value
+            generation = self._generation
+        value = build()
+        with self._lock:
+            if generation == self._generation:
+                self._value = value
+                self._stored_at = time.monotonic()
+        return value
+
+    def clear(self, *args, **kwargs) -> None:
+        with self._lock:
+            self._value = None
+            self._generation += 1
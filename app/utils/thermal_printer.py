@@ -1,6 +1,87 @@
 import socket
 from datetime import datetime
 
+from .log import get_logger
+
+log = get_logger("printer")
+
+
+class ReceiptBuilder:
+    """
+    In-memory ESC/POS byte stream builder.
+    Commands are appended to a buffer so a whole receipt can be sent in one write.
+    """
+
+    def __init__(self, encoding='utf-8'):
+        self.encoding = encoding
+        self._buffer = bytearray()
+
+    def _encode_text(self, text):
+        """Encode text to bytes."""
+        return text.encode(self.encoding, errors='replace')
+
+    def raw(self, data):
+        """Append raw bytes to the buffer."""
+        self._buffer += data
+        return self
+
+    def initialize(self):
+        """Initialize printer (reset to default settings)."""
+        return self.raw(b'\x1b\x40')
+
+    def set_alignment(self, alignment='center'):
+        """
+        Set text alignment.
+
+        Args:
+            alignment: 'left' (0), 'center' (1), or 'right' (2)
+        """
+        align_map = {'left': 0, 'center': 1, 'right': 2}
+        align_code = align_map.get(alignment, 1)
+        return self.raw(b'\x1b\x61' + bytes([align_code]))
+
+    def set_font_size(self, width=1, height=1):
+        """
+        Set font size (width and height multiplier).
+
+        Args:
+            width: 1-8 (1 = normal)
+            height: 1-8 (1 = normal)
+        """
+        width = max(1, min(8, width))
+        height = max(1, min(8, height))
+        size_byte = (width - 1) + ((height - 1) << 4)
+        return self.raw(b'\x1d\x21' + bytes([size_byte]))
+
+    def set_bold(self, enabled=True):
+        """Enable or disable bold text."""
+        return self.raw(b'\x1b\x45\x01' if enabled else b'\x1b\x45\x00')
+
+    def text(self, text):
+        """Append text."""
+        return self.raw(self._encode_text(text))
+
+    def line(self, text=''):
+        """Append text followed by newline."""
+        return self.raw(self._encode_text(text + '\n'))
+
+    def separator(self, char='-', width=40):
+        """Append a separator line."""
+        return self.line(char * width)
+
+    def linefeed(self, lines=1):
+        """Append blank lines."""
+        return self.raw(b'\n' * lines)
+
+    def cut_paper(self):
+        """Cut paper (full cut)."""
+        return self.raw(b'\x1d\x56\x00')
+
+    def getvalue(self):
+        """Return the assembled byte stream."""
+        return bytes(self._buffer)
+
+
 class ThermalPrinter:
     """
     ESC/POS thermal printer controller for Fun Print integration.
@@ -30,77 +111,54 @@ class ThermalPrinter:
             bool: True if successful, False otherwise
         """
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            sock.connect((self.host, self.port))
-            sock.sendall(data)
-            sock.close()
+            with socket.create_connection((self.host, self.port), timeout=self.timeout) as sock:
+                sock.sendall(data)
             return True
         except (socket.timeout, socket.error, ConnectionRefusedError) as e:
-            print(f"Printer connection error: {e}")
+            log.error("Printer connection error", extra={"host": self.host, "port": self.port, "error": str(e)})
             return False
     
-    def _encode_text(self, text, encoding='utf-8'):
-        """Encode text to bytes."""
-        return text.encode(encoding, errors='replace')
-    
     def initialize(self):
         """Initialize printer (reset to default settings)."""
-        return self._send_command(b'\x1b\x40')
+        return self._send_command(ReceiptBuilder().initialize().getvalue())
     
     def set_alignment(self, alignment='center'):
-        """
-        Set text alignment.
-        
-        Args:
-            alignment: 'left' (0), 'center' (1), or 'right' (2)
-        """
-        align_map = {'left': 0, 'center': 1, 'right': 2}
-        align_code = align_map.get(alignment, 1)
-        return self._send_command(f'\x1b\x61{chr(align_code)}'.encode())
+        """Set text alignment ('left', 'center' or 'right')."""
+        return self._send_command(ReceiptBuilder().set_alignment(alignment).getvalue())
     
     def set_font_size(self, width=1, height=1):
-        """
-        Set font size (width and height multiplier).
-        
-        Args:
-            width: 1-8 (1 = normal)
-            height: 1-8 (1 = normal)
-        """
-        width = max(1, min(8, width))
-        height = max(1, min(8, height))
-        size_byte = chr((width - 1) + ((height - 1) << 4))
-        return self._send_command(f'\x1d\x21{size_byte}'.encode())
+        """Set font size (width and height multiplier, 1-8)."""
+        return self._send_command(ReceiptBuilder().set_font_size(width, height).getvalue())
     
     def set_bold(self, enabled=True):
         """Enable or disable bold text."""
-        command = b'\x1b\x45\x01' if enabled else b'\x1b\x45\x00'
-        return self._send_command(command)
+        return self._send_command(ReceiptBuilder().set_bold(enabled).getvalue())
     
     def print_text(self, text):
         """Print text."""
-        return self._send_command(self._encode_text(text))
+        return self._send_command(ReceiptBuilder().text(text).getvalue())
     
     def print_line(self, text=''):
         """Print text followed by newline."""
-        return self._send_command(self._encode_text(text + '\n'))
+        return self._send_command(ReceiptBuilder().line(text).getvalue())
     
     def print_separator(self, char='-', width=40):
         """Print a separator line."""
-        return self.print_line(char * width)
+        return self._send_command(ReceiptBuilder().separator(char, width).getvalue())
     
     def linefeed(self, lines=1):
         """Print blank lines."""
-        return self._send_command(b'\n' * lines)
+        return self._send_command(ReceiptBuilder().linefeed(lines).getvalue())
     
     def cut_paper(self):
         """Cut paper (full cut)."""
-        return self._send_command(b'\x1d\x56\x00')
-    
-    def print_receipt(self, receipt_data):
+        return self._send_command(ReceiptBuilder().cut_paper().getvalue())
+
+    @staticmethod
+    def build_receipt(receipt_data):
         """
-        Print a complete receipt with transaction details.
-        
+        Assemble the complete ESC/POS byte stream for a receipt.
+
         Args:
             receipt_data: Dictionary containing:
                 - code: Transaction code
@@ -112,67 +170,82 @@ class ThermalPrinter:
                 - change_amount: Change amount
                 - payment_method: Payment method
                 - payment_date: Payment date/time
+
+        Returns:
+            bytes: The receipt, ready to be written to the printer in one call
+        """
+        r = ReceiptBuilder()
+        r.initialize()
+        r.set_alignment('center')
+        r.set_font_size(2, 2)
+        r.set_bold(True)
+        r.line('SPA RECEIPT')
+        r.set_font_size(1, 1)
+        r.set_bold(False)
+        r.line()
+
+        r.set_alignment('left')
+        r.separator()
+        r.line(f"Transaction: {receipt_data.get('code', 'N/A')}")
+        r.line(f"Therapist: {receipt_data.get('therapist_name', 'N/A')}")
+        r.line(f"Room: {receipt_data.get('room_number', 'N/A')}")
+        r.line()
+
+        r.separator()
+        r.line('SERVICES')
+        r.separator()
+
+        services = receipt_data.get('services', [])
+        for service in services:
+            service_name = service.get('name', 'Unknown')
+            duration = service.get('duration_minutes', 0)
+            price = service.get('price', 0)
+            r.line(f"{service_name}")
+            r.line(f"  {duration}min - ₱{price:.2f}")
+
+        r.line()
+        r.separator()
+
+        r.set_alignment('right')
+        r.set_font_size(1, 2)
+        r.set_bold(True)
+        total = receipt_data.get('total_amount', 0)
+        r.line(f"Total: ₱{total:.2f}")
+        r.set_font_size(1, 1)
+        r.set_bold(False)
+
+        r.set_alignment('left')
+        amount_paid = receipt_data.get('amount_paid', 0)
+        change = receipt_data.get('change_amount', 0)
+        method = receipt_data.get('payment_method', 'N/A')
+        date_str = receipt_data.get('payment_date', '')
+
+        r.line(f"Amount Paid: ₱{amount_paid:.2f}")
+        r.line(f"Change: ₱{change:.2f}")
+        r.line(f"Method: {method}")
+        r.line(f"Date: {date_str}")
+
+        r.line()
+        r.set_alignment('center')
+        r.line('Thank you!')
+        r.line()
+
+        r.linefeed(2)
+        r.cut_paper()
+        return r.getvalue()
+    
+    def print_receipt(self, receipt_data):
+        """
+        Print a complete receipt with transaction details.
+
+        The whole receipt is rendered in memory by build_receipt() and written
+        over a single connection, instead of one connection per command.
+
+        Args:
+            receipt_data: Dictionary as described in build_receipt()
         """
         try:
-            self.initialize()
-            self.set_alignment('center')
-            self.set_font_size(2, 2)
-            self.set_bold(True)
-            self.print_line('SPA RECEIPT')
-            self.set_font_size(1, 1)
-            self.set_bold(False)
-            self.print_line()
-            
-            self.set_alignment('left')
-            self.print_separator()
-            self.print_line(f"Transaction: {receipt_data.get('code', 'N/A')}")
-            self.print_line(f"Therapist: {receipt_data.get('therapist_name', 'N/A')}")
-            self.print_line(f"Room: {receipt_data.get('room_number', 'N/A')}")
-            self.print_line()
-            
-            self.print_separator()
-            self.print_line('SERVICES')
-            self.print_separator()
-            
-            services = receipt_data.get('services', [])
-            for service in services:
-                service_name = service.get('name', 'Unknown')
-                duration = service.get('duration_minutes', 0)
-                price = service.get('price', 0)
-                self.print_line(f"{service_name}")
-                self.print_line(f"  {duration}min - ₱{price:.2f}")
-            
-            self.print_line()
-            self.print_separator()
-            
-            self.set_alignment('right')
-            self.set_font_size(1, 2)
-            self.set_bold(True)
-            total = receipt_data.get('total_amount', 0)
-            self.print_line(f"Total: ₱{total:.2f}")
-            self.set_font_size(1, 1)
-            self.set_bold(False)
-            
-            self.set_alignment('left')
-            amount_paid = receipt_data.get('amount_paid', 0)
-            change = receipt_data.get('change_amount', 0)
-            method = receipt_data.get('payment_method', 'N/A')
-            date_str = receipt_data.get('payment_date', '')
-            
-            self.print_line(f"Amount Paid: ₱{amount_paid:.2f}")
-            self.print_line(f"Change: ₱{change:.2f}")
-            self.print_line(f"Method: {method}")
-            self.print_line(f"Date: {date_str}")
-            
-            self.print_line()
-            self.set_alignment('center')
-            self.print_line('Thank you!')
-            self.print_line()
-            
-            self.linefeed(2)
-            self.cut_paper()
-            
-            return True
-        except Exception as e:
-            print(f"Error printing receipt: {e}")
+            return self._send_command(self.build_receipt(receipt_data))
+        except Exception:
+            log.exception("Error printing receipt")
             return False
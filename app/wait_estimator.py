@@ -0,0 +1,180 @@
+"""Expected start times for customers waiting for a therapist, derived from monitor board entries"""
+from __future__ import annotations
+from collections import deque
+from datetime import datetime, timedelta
+import heapq
+import math
+from typing import Any, Iterable
+
+from sortedcontainers import SortedList
+
+from .models import TransactionStatus
+
+PENDING = TransactionStatus.pending_therapist.value
+CONFIRMED = TransactionStatus.therapist_confirmed.value
+IN_SERVICE = TransactionStatus.in_service.value
+
+# Room status set by a therapist going on break (see toggle_room_status)
+ON_BREAK = "preparing"
+
+# Confirm-to-start delay assumed until real ones have been observed
+DEFAULT_CONFIRM_DELAY_SECONDS = 120.0
+# Number of recent confirm-to-start delays averaged
+DELAY_WINDOW = 50
+
+
+def _parse(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+class WaitEstimator:
+    """
+    Each room is a server that frees up at:
+        in service          service_start_at + total_duration_minutes (now, if overrunning)
+        therapist confirmed therapist_confirmed_at + average confirm-to-start delay + duration
+        idle                now
+    Only rooms with a logged-in therapist count, and rooms on break only while
+    still busy. Waiting customers are handed, in queue order, to the earliest
+    free room (a min-heap), each adding the average delay and their own booked
+    duration.
+
+    Board updates are O(log n) (the waiting list is a SortedList) and set
+    `changed` only when they touch the waiting queue or a room's server state;
+    estimates() is O(k log r) for k waiting customers and r rooms, so callers
+    recompute only when `changed`. Not thread-safe on its own: MonitorBoard
+    calls it under its lock.
+    """
+
+    def __init__(self, window: int = DELAY_WINDOW, default_delay: float = DEFAULT_CONFIRM_DELAY_SECONDS):
+        self.default_delay = default_delay
+        self._delays: deque[float] = deque(maxlen=window)
+        self._delay_sum = 0.0
+        self._rooms: dict[str, str] = {}
+        # therapist id -> room_number of therapists currently logged in
+        self._therapists: dict[int, str] = {}
+        # Sorted (order_at, id) of pending_therapist transactions, and their booked minutes
+        self._waiting: SortedList[tuple[str, int]] = SortedList()
+        self._waiting_minutes: dict[int, int] = {}
+        # room_number -> {transaction id: (status, therapist_confirmed_at/service_start_at, minutes)}
+        self._busy: dict[str, dict[int, tuple[str, datetime | None, int]]] = {}
+        # Set by changes that can move an estimate, cleared by take_changed()
+        self.changed = True
+
+    # Board events
+
+    def load(self, entries: Iterable[dict[str, Any]], rooms: dict[str, str], therapists: dict[int, str]) -> None:
+        """Start over from a freshly loaded board; observed delays are kept"""
+        self._rooms = dict(rooms)
+        self._therapists = dict(therapists)
+        self._waiting = SortedList()
+        self._waiting_minutes = {}
+        self._busy = {}
+        for entry in entries:
+            self._add(entry)
+        self.changed = True
+
+    def set_room(self, room_number: str, status: str) -> None:
+        if self._rooms.get(room_number) != status:
+            self._rooms[room_number] = status
+            self.changed = True
+
+    def set_therapist(self, therapist_id: int, room_number: str | None) -> None:
+        """A therapist logged in to `room_number`, or logged out (None)"""
+        if self._therapists.get(therapist_id) == room_number:
+            return
+        if room_number is None:
+            del self._therapists[therapist_id]
+        else:
+            self._therapists[therapist_id] = room_number
+        self.changed = True
+
+    def update(self, old: dict[str, Any] | None, new: dict[str, Any] | None) -> None:
+        """Apply one board transaction change (entries as built by MonitorBoard, None when absent)"""
+        if old is not None and new is not None and old['status'] == CONFIRMED and new['status'] == IN_SERVICE:
+            confirmed_at, started_at = _parse(old['order_at']), _parse(new['service_start_at'])
+            if confirmed_at and started_at:
+                self.observe_delay((started_at - confirmed_at).total_seconds())
+        if old is not None:
+            self._remove(old)
+        if new is not None:
+            self._add(new)
+
+    def observe_delay(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        if len(self._delays) == self._delays.maxlen:
+            self._delay_sum -= self._delays[0]
+        self._delays.append(seconds)
+        self._delay_sum += seconds
+        self.changed = True
+
+    @property
+    def average_delay(self) -> float:
+        """Rolling average confirm-to-start delay in seconds"""
+        return self._delay_sum / len(self._delays) if self._delays else self.default_delay
+
+    def _add(self, entry: dict[str, Any]) -> None:
+        minutes = entry['total_duration_minutes'] or 0
+        if entry['status'] == PENDING:
+            self._waiting.add((entry['order_at'] or '', entry['id']))
+            self._waiting_minutes[entry['id']] = minutes
+            self.changed = True
+        elif entry['status'] in (CONFIRMED, IN_SERVICE) and entry['room_number']:
+            # order_at is therapist_confirmed_at or service_start_at respectively
+            self._busy.setdefault(entry['room_number'], {})[entry['id']] = (
+                entry['status'], _parse(entry['order_at']), minutes,
+            )
+            self.changed = True
+
+    def _remove(self, entry: dict[str, Any]) -> None:
+        if entry['status'] == PENDING:
+            self._waiting.discard((entry['order_at'] or '', entry['id']))
+            self._waiting_minutes.pop(entry['id'], None)
+            self.changed = True
+        elif entry['room_number'] in self._busy:
+            room = self._busy[entry['room_number']]
+            if room.pop(entry['id'], None) is not None:
+                self.changed = True
+            if not room:
+                del self._busy[entry['room_number']]
+
+    # Estimates
+
+    def take_changed(self) -> bool:
+        """Whether estimates may have moved since the last call"""
+        changed, self.changed = self.changed, False
+        return changed
+
+    def _free_at(self, room_number: str, now: datetime, delay: timedelta) -> datetime:
+        free = now
+        busy = self._busy.get(room_number, {})
+        for status, at, minutes in sorted(busy.values(), key=lambda b: (b[0] != IN_SERVICE, b[1] or now)):
+            start = at if status == IN_SERVICE else (at or now) + delay
+            free = max(free, start or now) + timedelta(minutes=minutes)
+        return max(free, now)
+
+    def estimates(self, now: datetime | None = None) -> list[dict[str, Any]]:
+        """Expected start time and wait per waiting transaction, in queue order"""
+        if not self._waiting:
+            return []
+        now = now or datetime.now()
+        delay = timedelta(seconds=self.average_delay)
+        rooms = [
+            number for number in set(self._therapists.values())
+            if self._rooms.get(number) != ON_BREAK or number in self._busy
+        ]
+        heap = [self._free_at(number, now, delay) for number in rooms]
+        heapq.heapify(heap)
+
+        result = []
+        for _, tx_id in self._waiting:
+            if not heap:
+                result.append({'id': tx_id, 'expected_start_at': None, 'wait_minutes': None})
+                continue
+            start = heapq.heappop(heap) + delay
+            heapq.heappush(heap, start + timedelta(minutes=self._waiting_minutes[tx_id]))
+            result.append({
+                'id': tx_id,
+                'expected_start_at': start.isoformat(timespec='seconds'),
+                'wait_minutes': math.ceil((start - now).total_seconds() / 60),
+            })
+        return result
@@ -0,0 +1,50 @@
+"""FIFO work queues over the transactions table, claimed with row locks"""
+from __future__ import annotations
+from typing import Any
+
+from sqlalchemy import func
+
+from .extensions import db
+from .models import Transaction, TransactionStatus
+
+
+class WorkQueue:
+    """
+    Transactions in `status`, served oldest `order_column` first.
+    Backed by the composite (status, order_column) indexes on Transaction, so a
+    claim reads the head of the index instead of scanning every historical row.
+    """
+
+    def __init__(self, status: TransactionStatus, order_column):
+        self.status = status
+        self.order_column = order_column
+
+    def claim(self, new_status: TransactionStatus, **changes: Any) -> Transaction | None:
+        """
+        Lock the oldest waiting transaction, skipping rows other workers hold,
+        and move it to `new_status`. The caller commits.
+        """
+        tx: Transaction | None = (
+            Transaction.query
+            .filter(Transaction.status == self.status)
+            .order_by(self.order_column.asc(), Transaction.id.asc())
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if tx is None:
+            return None
+
+        tx.status = new_status
+        for name, value in changes.items():
+            setattr(tx, name, value)
+        return tx
+
+    def depth(self) -> int:
+        return db.session.query(func.count(Transaction.id)).filter(Transaction.status == self.status).scalar()
+
+
+# Customers waiting for a therapist, in confirmation order
+therapist_queue = WorkQueue(TransactionStatus.pending_therapist, Transaction.selection_confirmed_at)
+
+# Finished services waiting for a cashier, in finish order
+cashier_queue = WorkQueue(TransactionStatus.finished, Transaction.service_finish_at)
@@ -0,0 +1,169 @@
+"""
+Work-queue claim benchmark: latency of therapist_queue.claim and cashier_queue.claim
+(app/work_queue.py) as the transactions table grows from 1k to 1M historical rows.
+
+    python bench_claims.py                                  # throwaway SQLite DB, 1k..1M rows
+    python bench_claims.py --sizes 1000,100000 --claims 500
+    python bench_claims.py --no-indexes                     # same run without the queue indexes
+    python bench_claims.py --database-url mysql+pymysql://root@127.0.0.1/bench   # EMPTIES that DB
+    python bench_claims.py --json claims.json
+
+History rows are paid transactions, so they never match a claim; at each size the
+queues are refilled with --claims waiting rows and drained one claim + commit at a
+time. With the (status, timestamp) indexes latency should stay flat across sizes.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, insert
+
+QUEUE_INDEXES = ("ix_transactions_status_selection_confirmed_at", "ix_transactions_status_service_finish_at")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def add_history(db, Transaction, TransactionStatus, start, count, chunk_size=10_000):
+    """`count` paid transactions, one minute apart, ending before now"""
+    now = datetime.now()
+    for offset in range(0, count, chunk_size):
+        rows = []
+        for n in range(start + offset, start + min(offset + chunk_size, count)):
+            at = now - timedelta(minutes=n + 1)
+            rows.append({
+                "code": f"{n % 9999 + 1:04d}",
+                "status": TransactionStatus.paid,
+                "total_amount": 500.0,
+                "total_duration_minutes": 60,
+                "created_at": at,
+                "selection_confirmed_at": at,
+                "therapist_confirmed_at": at,
+                "service_start_at": at,
+                "service_finish_at": at,
+                "cashier_claimed_at": at,
+                "paid_at": at,
+            })
+        db.session.execute(insert(Transaction), rows)
+        db.session.commit()
+
+
+def fill_queues(db, Transaction, TransactionStatus, claims):
+    now = datetime.now()
+    rows = []
+    for n in range(claims):
+        at = now + timedelta(milliseconds=n)
+        rows.append({"code": "0000", "status": TransactionStatus.pending_therapist, "selection_confirmed_at": at})
+        rows.append({"code": "0000", "status": TransactionStatus.finished, "service_finish_at": at})
+    db.session.execute(insert(Transaction), rows)
+    db.session.commit()
+
+
+def drain(db, queue, new_status, claims, stamp):
+    """Claim and commit one transaction at a time; returns per-claim seconds"""
+    timings = []
+    for _ in range(claims):
+        started = time.perf_counter()
+        tx = queue.claim(new_status, **{stamp: datetime.now()})
+        db.session.commit()
+        timings.append(time.perf_counter() - started)
+        assert tx is not None, "queue drained early"
+    return timings
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to benchmark (its transactions are deleted)")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated history sizes")
+    parser.add_argument("--claims", type=int, default=200, help="Claims per queue at each size")
+    parser.add_argument("--no-indexes", action="store_true", help="Drop the work-queue indexes first")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    scratch = None
+    if not args.database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        args.database_url = f"sqlite:///{scratch.name}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Payment, Room, Transaction, TransactionItem, TransactionStatus
+    from app.work_queue import cashier_queue, therapist_queue
+
+    app = create_app()
+    results = []
+    try:
+        with app.app_context():
+            for model in (Payment, TransactionItem):
+                db.session.execute(delete(model))
+            db.session.execute(Room.__table__.update().values(current_transaction_id=None))
+            db.session.execute(delete(Transaction))
+            db.session.commit()
+            for index in Transaction.__table__.indexes:
+                if index.name in QUEUE_INDEXES:
+                    if args.no_indexes:
+                        index.drop(db.engine, checkfirst=True)
+                    else:
+                        index.create(db.engine, checkfirst=True)
+
+            history = 0
+            for size in sizes:
+                started = time.perf_counter()
+                add_history(db, Transaction, TransactionStatus, history, size - history)
+                history = size
+                load_seconds = time.perf_counter() - started
+
+                fill_queues(db, Transaction, TransactionStatus, args.claims)
+                therapist = drain(
+                    db, therapist_queue, TransactionStatus.therapist_confirmed, args.claims, "therapist_confirmed_at"
+                )
+                cashier = drain(
+                    db, cashier_queue, TransactionStatus.awaiting_payment, args.claims, "cashier_claimed_at"
+                )
+                result = {
+                    "history": size,
+                    "therapist_claim": summarize(therapist),
+                    "cashier_claim": summarize(cashier),
+                }
+                results.append(result)
+                print(
+                    f"{size:>9,} rows (+{load_seconds:.0f}s load)  "
+                    f"therapist p50 {result['therapist_claim']['p50_ms']:7.2f} ms  p99 {result['therapist_claim']['p99_ms']:7.2f} ms  "
+                    f"cashier p50 {result['cashier_claim']['p50_ms']:7.2f} ms  p99 {result['cashier_claim']['p99_ms']:7.2f} ms",
+                    flush=True,
+                )
+    finally:
+        if scratch is not None:
+            os.unlink(scratch.name)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"indexes": not args.no_indexes, "claims": args.claims, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start budget check: time create_app() plus the first request in fresh
+interpreters and fail when the best run is over budget.
+
+    python check_startup.py                 # STARTUP_BUDGET_MS, default 1500
+    python check_startup.py --budget-ms 800 --runs 5
+
+Run it against a database whose schema is already current, so it measures the
+"check" startup path that every restart and extra worker takes.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold start budget in ms, also enforced by tests/test_startup.py
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+# Runs in a child process so imports are cold
+PROBE = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get("/api/services").status_code
+served = time.perf_counter()
+print("STARTUP " + json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "total_ms": (served - started) * 1000,
+    "status": status,
+}))
+"""
+
+
+def measure() -> dict:
+    env = {**os.environ, "ARCHIVE_INTERVAL_SECONDS": "0"}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    line = next(l for l in result.stdout.splitlines() if l.startswith("STARTUP "))
+    return json.loads(line[len("STARTUP "):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # The first run may apply the schema; it is not counted
+    warmup = measure()
+    print(f"warm-up: {warmup['total_ms']:.0f}ms")
+
+    runs = [measure() for _ in range(args.runs)]
+    for n, run in enumerate(runs, 1):
+        print(f"run {n}: import {run['import_ms']:.0f}ms, create_app {run['create_app_ms']:.0f}ms, "
+              f"first request {run['first_request_ms']:.0f}ms, total {run['total_ms']:.0f}ms")
+
+    best = min(run["total_ms"] for run in runs)
+    if any(run["status"] != 200 for run in runs):
+        print("FAIL: first request did not return 200")
+        sys.exit(1)
+    if best > args.budget_ms:
+        print(f"FAIL: cold start {best:.0f}ms exceeds budget {args.budget_ms:.0f}ms")
+        sys.exit(1)
+    print(f"OK: cold start {best:.0f}ms within budget {args.budget_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""
+Socket.IO load test: kiosks, therapists, cashiers and lobby monitors driving the
+real event flow concurrently.
+
+    customer_confirm_selection -> therapist_confirm_next -> therapist_start_service
+    -> therapist_finish_service -> cashier_claim_next -> cashier_pay
+
+Needs the Socket.IO client transports: pip install "python-socketio[client]"
+
+    python loadtest.py                          # in-process server on a throwaway SQLite DB
+    python loadtest.py --kiosks 8 --therapists 8 --cashiers 4 --monitors 100 --duration 60
+    python loadtest.py --clients 200            # pool sizing: 200 connections, see "pool" below
+    python loadtest.py --database-url mysql+pymysql://root@127.0.0.1/loadtest   # RESEEDS that DB
+    python loadtest.py --url http://127.0.0.1:5000   # running server (seeded with scripts/seed.py)
+    python loadtest.py --json report.json
+
+Reported per event: client round trip p50/p95/p99 (the Socket.IO ack arrives after
+the handler finished), and from the server's /internal/metrics its handler time,
+time in SQL, SQL statements, and emits and packets sent (broadcast fan-out). The
+server's connection pool figures (/internal/pool) are reported too: peak
+connections checked out, checkout waits and pool timeouts, which should stay at 0.
+Both are reset when the run starts, so a remote server's figures cover the run only
+(pass --metrics-token when it sets INTERNAL_METRICS_TOKEN).
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import socketio as python_socketio
+
+PASSWORD = "password123"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class ClientStats:
+    """Round-trip latencies and failures per event, shared by all actors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def record(self, event, seconds):
+        with self._lock:
+            self.latencies[event].append(seconds)
+
+    def error(self, event):
+        with self._lock:
+            self.errors[event] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+
+class Actor(threading.Thread):
+    """One Socket.IO client running its role's loop until `stop` is set"""
+
+    def __init__(self, name, base_url, stats, stop, token=None):
+        super().__init__(name=name, daemon=True)
+        self.base_url = base_url
+        self.stats = stats
+        self.stop = stop
+        self.results = {}
+        self.client = python_socketio.Client(reconnection=False)
+        self.client.on("*", self._on_any)
+        self.token = token
+
+    def _on_any(self, event, *args):
+        self.results[event] = args[0] if args else None
+
+    def connect(self):
+        query = f"?auth_token={self.token}" if self.token else ""
+        self.client.connect(self.base_url + query, transports=["websocket"], wait_timeout=10)
+
+    def call(self, event, data=None):
+        """Emit and wait for the ack; returns False on timeout"""
+        started = time.perf_counter()
+        try:
+            self.client.call(event, data, timeout=30)
+        except python_socketio.exceptions.TimeoutError:
+            self.stats.error(event)
+            return False
+        self.stats.record(event, time.perf_counter() - started)
+        return True
+
+    def pause(self, seconds):
+        self.stop.wait(seconds)
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                self.step()
+        except Exception as e:
+            self.stats.count("actor_crashes")
+            print(f"[ERROR] {self.name}: {e!r}")
+        finally:
+            self.client.disconnect()
+
+
+class Kiosk(Actor):
+    def __init__(self, *args, catalog, interval, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.catalog = catalog
+        self.interval = interval
+        self.rng = random.Random(self.name)
+
+    def step(self):
+        picks = self.rng.sample(self.catalog, min(len(self.catalog), self.rng.randint(1, 3)))
+        items = [{"service_id": s, "service_classification_id": c} for s, c in picks]
+        if self.call("customer_confirm_selection", {"items": items}):
+            self.stats.count("customers")
+        self.pause(self.interval)
+
+
+class Therapist(Actor):
+    def __init__(self, *args, service_seconds, poll, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.service_seconds = service_seconds
+        self.poll = poll
+
+    def step(self):
+        self.results.pop("therapist_confirm_result", None)
+        if not self.call("therapist_confirm_next", {}):
+            return
+        result = self.results.get("therapist_confirm_result") or {}
+        if not result.get("ok"):
+            self.pause(self.poll)
+            return
+        tx_id = result["transaction"]["id"]
+        self.call("therapist_start_service", {"transaction_id": tx_id})
+        self.pause(self.service_seconds)
+        self.call("therapist_finish_service", {"transaction_id": tx_id})
+
+
+class Cashier(Actor):
+    def __init__(self, *args, poll, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.poll = poll
+
+    def step(self):
+        self.results.pop("cashier_claim_result", None)
+        if not self.call("cashier_claim_next", {}):
+            return
+        result = self.results.get("cashier_claim_result") or {}
+        if not result.get("ok"):
+            self.pause(self.poll)
+            return
+        tx = result["transaction"]
+        self.results.pop("cashier_pay_result", None)
+        self.call("cashier_pay", {"transaction_id": tx["id"], "amount_paid": tx["total_amount"] + 100})
+        if (self.results.get("cashier_pay_result") or {}).get("ok"):
+            self.stats.count("flows_completed")
+
+
+class Monitor(Actor):
+    """Lobby screen: follows monitor_delta versions, resyncs on gaps, refreshes periodically"""
+
+    def __init__(self, *args, refresh, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refresh = refresh
+        self.version = None
+        self.client.on("monitor_state", self._on_state)
+        self.client.on("monitor_delta", self._on_delta)
+
+    def _on_state(self, state):
+        self.version = state["version"]
+        self.stats.count("monitor_messages")
+
+    def _on_delta(self, delta):
+        self.stats.count("monitor_messages")
+        if self.version is not None and delta["version"] != self.version + 1:
+            self.stats.count("monitor_resyncs")
+            self.client.emit("monitor_sync")
+        self.version = delta["version"]
+
+    def step(self):
+        if self.version is None:
+            self.call("monitor_subscribe")
+        self.pause(self.refresh or 1)
+        if self.refresh and not self.stop.is_set():
+            self.call("monitor_sync")
+
+
+def login(base_url, role, username):
+    response = requests.post(
+        f"{base_url}/login/{role}", data={"username": username, "password": PASSWORD}, allow_redirects=False
+    )
+    location = response.headers.get("Location", "")
+    token = parse_qs(urlparse(location).query).get("token")
+    if not token:
+        raise SystemExit(f"Login failed for {role} {username} (is the database seeded?)")
+    return token[0]
+
+
+def start_local_server(args):
+    """Seed a database and serve the app from a background thread; returns its URL"""
+    if args.database_url:
+        print(f"[WARNING] Reseeding {args.database_url}")
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="spa-loadtest-"), "loadtest.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+
+    from app import create_app, socketio
+    from seed import seed_database, generate_dataset
+
+    app = create_app()
+    seed_database(app)
+    generate_dataset(app, therapists=args.therapists, cashiers=args.cashiers,
+                     rooms=max(args.therapists, 4), transactions=0)
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    threading.Thread(
+        target=lambda: socketio.run(app, host="127.0.0.1", port=port, log_output=False,
+                                    allow_unsafe_werkzeug=True),
+        daemon=True,
+    ).start()
+
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(url + "/api/services", timeout=1)
+            return url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise SystemExit("In-process server did not start")
+
+
+def internal(base_url, args, path, method="get"):
+    """Call a /internal endpoint; None when the server refuses it (remote without --metrics-token)"""
+    headers = {"X-Metrics-Token": args.metrics_token} if args.metrics_token else {}
+    response = requests.request(method, f"{base_url}/internal/{path}", headers=headers, timeout=10)
+    return response.json() if response.ok else None
+
+
+def build_report(args, client_stats, elapsed, pool, server):
+    events = {}
+    for event in sorted(set(client_stats.latencies) | set(client_stats.errors)):
+        values = sorted(client_stats.latencies.get(event, []))
+        events[event] = {
+            "count": len(values),
+            "errors": client_stats.errors.get(event, 0),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": (values[-1] if values else 0) * 1000,
+        }
+
+    counters = dict(client_stats.counters)
+    total_calls = sum(len(v) for v in client_stats.latencies.values())
+    report = {
+        "config": {name: getattr(args, name) for name in CLIENT_OPTIONS},
+        "clients": args.kiosks + args.therapists + args.cashiers + args.monitors,
+        "elapsed_s": elapsed,
+        "throughput": {
+            "flows_per_s": counters.get("flows_completed", 0) / elapsed,
+            "events_per_s": total_calls / elapsed,
+            "monitor_messages_per_s": counters.get("monitor_messages", 0) / elapsed,
+        },
+        "counters": counters,
+        "sql_statements_total": 0,
+        "pool": pool,
+        "events": events,
+    }
+    if server:
+        add_server_stats(report, server)
+    return report
+
+
+def add_server_stats(report, server):
+    """Merge the server's /internal/metrics figures (Socket.IO handlers) into a client report"""
+    report["sql_statements_total"] = round(sum(
+        stats["db_statements"]["count"] * stats["db_statements"]["avg"]
+        for calls in server.values() for stats in calls.values()
+    ))
+    for event, stats in server.get("socket", {}).items():
+        n = stats["calls"]
+        if not n:
+            continue
+        row = report["events"].setdefault(event, {
+            "count": 0, "errors": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0,
+        })
+        row.update({
+            "server_ms": stats["wall_ms"]["avg"],
+            "db_ms": stats["db_ms"]["avg"],
+            "statements": stats["db_statements"]["avg"],
+            "emits": stats["emits"] / n,
+            "packets": stats["packets"] / n,
+        })
+    report["events"] = dict(sorted(report["events"].items()))
+
+
+def print_report(report):
+    t = report["throughput"]
+    print(f"\n{report['elapsed_s']:.1f}s: {report['counters'].get('flows_completed', 0)} flows completed "
+          f"({t['flows_per_s']:.1f}/s), {t['events_per_s']:.1f} events/s, "
+          f"{t['monitor_messages_per_s']:.1f} monitor messages/s, "
+          f"{report['counters'].get('monitor_resyncs', 0)} monitor resyncs")
+    if report["sql_statements_total"]:
+        print(f"SQL statements: {report['sql_statements_total']}")
+    pool = report.get("pool")
+    if pool:
+        limit = f"{pool['size']}+{pool['max_overflow']}" if "size" in pool else "n/a"
+        print(f"Pool ({pool['pool_class']}, size+overflow {limit}): peak {pool['peak_checked_out']} checked out "
+              f"for {report['clients']} clients, {pool['checkouts']} checkouts, "
+              f"wait avg {pool['wait']['avg_ms']:.2f} ms / max {pool['wait']['max_ms']:.2f} ms, "
+              f"{pool['timeouts']} timeouts")
+
+    header = f"{'event':32} {'count':>7} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    server_header = f" {'srv ms':>7} {'sql ms':>7} {'sql':>6} {'emits':>6} {'pkts':>7}"
+    has_server = any("server_ms" in row for row in report["events"].values())
+    print("\n" + header + (server_header if has_server else ""))
+    for event, row in report["events"].items():
+        line = (f"{event:32} {row['count']:>7} {row['errors']:>4} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+        if "server_ms" in row:
+            line += (f" {row['server_ms']:>7.1f} {row['db_ms']:>7.2f} {row['statements']:>6.1f} "
+                     f"{row['emits']:>6.1f} {row['packets']:>7.1f}")
+        print(line)
+
+
+# Actor options, passed through to the client process in in-process mode
+CLIENT_OPTIONS = ("kiosks", "therapists", "cashiers", "monitors", "duration",
+                  "kiosk_interval", "service_seconds", "monitor_refresh", "poll")
+
+
+def run_clients(args, base_url):
+    catalog = [(row["id"], row["classification_id"]) for row in requests.get(base_url + "/api/services").json()]
+    client_stats = ClientStats()
+    stop = threading.Event()
+
+    actors = []
+    actors += [Monitor(f"monitor-{n}", base_url, client_stats, stop, refresh=args.monitor_refresh)
+               for n in range(1, args.monitors + 1)]
+    actors += [Therapist(f"therapist-{n}", base_url, client_stats, stop,
+                         token=login(base_url, "therapist", f"therapist{n}"),
+                         service_seconds=args.service_seconds, poll=args.poll)
+               for n in range(1, args.therapists + 1)]
+    actors += [Cashier(f"cashier-{n}", base_url, client_stats, stop,
+                       token=login(base_url, "cashier", f"cashier{n}"), poll=args.poll)
+               for n in range(1, args.cashiers + 1)]
+    actors += [Kiosk(f"kiosk-{n}", base_url, client_stats, stop, catalog=catalog, interval=args.kiosk_interval)
+               for n in range(1, args.kiosks + 1)]
+
+    for actor in actors:
+        actor.connect()
+    print(f"Connected {len(actors)} clients to {base_url}; running for {args.duration:.0f}s")
+    internal(base_url, args, "pool/reset", "post")
+    internal(base_url, args, "metrics/reset", "post")
+
+    started = time.perf_counter()
+    for actor in actors:
+        actor.start()
+    stop.wait(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    for actor in actors:
+        actor.join(timeout=35)
+
+    return build_report(args, client_stats, elapsed, internal(base_url, args, "pool"),
+                        internal(base_url, args, "metrics"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target a running server instead of starting one in-process")
+    parser.add_argument("--database-url", help="Database for the in-process server (it is reseeded)")
+    parser.add_argument("--kiosks", type=int, default=4)
+    parser.add_argument("--therapists", type=int, default=4)
+    parser.add_argument("--cashiers", type=int, default=2)
+    parser.add_argument("--monitors", type=int, default=20)
+    parser.add_argument("--clients", type=int,
+                        help="Total clients: therapists and cashiers as given, the rest split between kiosks and monitors")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--kiosk-interval", type=float, default=0.5, help="Seconds between a kiosk's customers")
+    parser.add_argument("--service-seconds", type=float, default=0.2, help="Time between start and finish")
+    parser.add_argument("--monitor-refresh", type=float, default=5, help="Seconds between monitor_sync calls (0 = never)")
+    parser.add_argument("--poll", type=float, default=0.2, help="Wait after an empty queue")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--metrics-token", default=os.getenv("INTERNAL_METRICS_TOKEN", ""),
+                        help="INTERNAL_METRICS_TOKEN of a remote --url server, for its pool and handler figures")
+    parser.add_argument("--quiet", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.clients:
+        rest = args.clients - args.therapists - args.cashiers
+        if rest < 2:
+            parser.error("--clients must leave room for at least one kiosk and one monitor")
+        args.kiosks = rest // 2
+        args.monitors = rest - args.kiosks
+
+    if args.url:
+        report = run_clients(args, args.url.rstrip("/"))
+    else:
+        base_url = start_local_server(args)
+        # Clients run in their own interpreter so they don't compete with the server for the GIL
+        with tempfile.NamedTemporaryFile(suffix=".json") as out:
+            command = [sys.executable, os.path.abspath(__file__), "--url", base_url, "--json", out.name, "--quiet",
+                       "--metrics-token", args.metrics_token]
+            for name in CLIENT_OPTIONS:
+                command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+            subprocess.run(command, check=True)
+            report = json.load(open(out.name))
+
+    if not args.quiet:
+        print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,42 @@
 #!/usr/bin/env python3
 """
 Seed script to populate the database with sample data for the new service structure.
+
+    python seed.py                      # hand-written catalog, 4 therapists/cashiers/rooms
+    python seed.py --generate ...       # plus a reproducible synthetic load dataset
+
+Use --database-url (e.g. sqlite:///load.db) to seed somewhere other than the MySQL
+database configured in .env.
 """
 
+import argparse
+import random
 import sys
 import os
+import time
+from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import create_app
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
 from app.extensions import db
-from app.models import ServiceCategory, Service, ServiceClassification, Therapist, Cashier, Room
+from app.rollups import rebuild_rollups
+from app.models import (
+    ServiceCategory, Service, ServiceClassification, Therapist, Cashier, Room,
+    Transaction, TransactionItem, TransactionStatus, Payment,
+)
 
-def seed_database():
-    app = create_app()
-    
+DEFAULT_PASSWORD = "password123"
+
+
+def bulk_insert(model, rows, chunk_size=5000):
+    """executemany in chunks instead of one ORM object at a time"""
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(model), rows[start:start + chunk_size])
+
+
+def seed_database(app):
     with app.app_context():
         print("Seeding database with sample data...")
         
@@ -27,13 +50,8 @@ def seed_database():
             {"category_name": "Holistic Recovery"},
         ]
         
-        categories = []
-        for cat_data in categories_data:
-            category = ServiceCategory(**cat_data)
-            db.session.add(category)
-            categories.append(category)
-        
-        db.session.commit()
+        categories = [{"id": i, **cat_data} for i, cat_data in enumerate(categories_data, 1)]
+        bulk_insert(ServiceCategory, categories)
         print(f"Created {len(categories)} service categories")
         
         # Create services and their classifications
@@ -117,25 +135,25 @@ def seed_database():
             }
         ]
         
-        for service_data in services_data:
-            service = Service(
-                category_id=service_data["category"].id,
-                service_name=service_data["service_name"],
-                description=service_data["description"]
-            )
-            db.session.add(service)
-            db.session.flush()  # Get the ID
-            
+        services = []
+        classifications = []
+        for service_id, service_data in enumerate(services_data, 1):
+            services.append({
+                "id": service_id,
+                "category_id": service_data["category"]["id"],
+                "service_name": service_data["service_name"],
+                "description": service_data["description"],
+            })
             for class_data in service_data["classifications"]:
-                classification = ServiceClassification(
-                    service_id=service.id,
-                    classification_name=class_data["classification_name"],
-                    price=class_data["price"],
-                    duration_minutes=class_data["duration_minutes"]
-                )
-                db.session.add(classification)
-        
-        db.session.commit()
+                classifications.append({
+                    "id": len(classifications) + 1,
+                    "service_id": service_id,
+                    "classification_name": class_data["classification_name"],
+                    "price": class_data["price"],
+                    "duration_minutes": class_data["duration_minutes"],
+                })
+        bulk_insert(Service, services)
+        bulk_insert(ServiceClassification, classifications)
         print(f"Created {len(services_data)} services with their classifications")
         
         # Create sample therapists
@@ -146,12 +164,9 @@ def seed_database():
             {"username": "therapist4", "name": "David Wilson", "room_number": "104"}
         ]
         
-        for therapist_data in therapists_data:
-            therapist = Therapist(**therapist_data)
-            therapist.set_password("password123")  # Default password
-            db.session.add(therapist)
-        
-        db.session.commit()
+        # Hash the default password once and share it
+        password_hash = generate_password_hash(DEFAULT_PASSWORD)
+        bulk_insert(Therapist, [{**t, "password_hash": password_hash} for t in therapists_data])
         print(f"Created {len(therapists_data)} therapists")
         
         # Create sample cashiers
@@ -162,12 +177,7 @@ def seed_database():
               {"username": "cashier4", "name": "John Doe", "counter_number": "C4"}
         ]
         
-        for cashier_data in cashiers_data:
-            cashier = Cashier(**cashier_data)
-            cashier.set_password("password123")  # Default password
-            db.session.add(cashier)
-        
-        db.session.commit()
+        bulk_insert(Cashier, [{**c, "password_hash": password_hash} for c in cashiers_data])
         print(f"Created {len(cashiers_data)} cashiers")
         
         # Create sample rooms
@@ -178,9 +188,7 @@ def seed_database():
             {"room_number": "104", "status": "available"}
         ]
         
-        for room_data in rooms_data:
-            room = Room(**room_data)
-            db.session.add(room)
+        bulk_insert(Room, rooms_data)
         
         db.session.commit()
         print(f"Created {len(rooms_data)} rooms")
@@ -193,5 +201,181 @@ def seed_database():
         print("- 4 cashiers (username: cashier1-4, password: password123)")
         print("- 4 rooms (101-104, all available)")
 
+def generate_dataset(app, therapists=20, cashiers=6, rooms=20, transactions=100_000,
+                     days=365, seed=1, end_date=None, chunk_size=5000):
+    """
+    Add a reproducible synthetic dataset on top of seed_database(): extra
+    therapists, cashiers and rooms, plus `transactions` paid transactions
+    (with items and payments) spread over the `days` before `end_date`.
+    The same seed and end date always produce the same rows.
+    """
+    rng = random.Random(seed)
+    end = end_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days)
+
+    with app.app_context():
+        started = time.perf_counter()
+        password_hash = generate_password_hash(DEFAULT_PASSWORD)
+
+        existing_therapists = Therapist.query.count()
+        existing_cashiers = Cashier.query.count()
+        existing_rooms = Room.query.count()
+
+        room_numbers = [f"{100 + n}" for n in range(1, max(rooms, existing_rooms) + 1)]
+        bulk_insert(Room, [
+            {"room_number": number, "status": "available"}
+            for number in room_numbers[existing_rooms:]
+        ], chunk_size)
+        bulk_insert(Therapist, [
+            {
+                "username": f"therapist{n}",
+                "name": f"Therapist {n}",
+                "room_number": room_numbers[(n - 1) % len(room_numbers)],
+                "password_hash": password_hash,
+            }
+            for n in range(existing_therapists + 1, therapists + 1)
+        ], chunk_size)
+        bulk_insert(Cashier, [
+            {
+                "username": f"cashier{n}",
+                "name": f"Cashier {n}",
+                "counter_number": f"C{n}",
+                "password_hash": password_hash,
+            }
+            for n in range(existing_cashiers + 1, cashiers + 1)
+        ], chunk_size)
+        db.session.commit()
+
+        therapist_rows = [(t.id, t.room_number) for t in Therapist.query.order_by(Therapist.id)]
+        cashier_ids = [c.id for c in Cashier.query.order_by(Cashier.id)]
+        catalog = [
+            (c.id, c.service_id, c.price, c.duration_minutes)
+            for c in ServiceClassification.query.order_by(ServiceClassification.id)
+        ]
+
+        # Sorted arrival times so ids follow time, as they would in production
+        span = (end - start).total_seconds()
+        arrivals = sorted(start + timedelta(seconds=rng.random() * span) for _ in range(transactions))
+
+        first_tx_id = (db.session.query(db.func.max(Transaction.id)).scalar() or 0) + 1
+        next_item_id = (db.session.query(db.func.max(TransactionItem.id)).scalar() or 0) + 1
+        next_payment_id = (db.session.query(db.func.max(Payment.id)).scalar() or 0) + 1
+
+        tx_rows, item_rows, payment_rows = [], [], []
+
+        def flush_chunk():
+            bulk_insert(Transaction, tx_rows, chunk_size)
+            bulk_insert(TransactionItem, item_rows, chunk_size)
+            bulk_insert(Payment, payment_rows, chunk_size)
+            db.session.commit()
+            tx_rows.clear(); item_rows.clear(); payment_rows.clear()
+
+        for n, confirmed_at in enumerate(arrivals):
+            tx_id = first_tx_id + n
+            therapist_id, room_number = rng.choice(therapist_rows)
+            cashier_id = rng.choice(cashier_ids)
+
+            total = 0.0
+            duration = 0
+            for classification_id, service_id, price, minutes in rng.sample(catalog, rng.randint(1, 3)):
+                item_rows.append({
+                    "id": next_item_id,
+                    "transaction_id": tx_id,
+                    "service_id": service_id,
+                    "service_classification_id": classification_id,
+                    "price": price,
+                    "duration_minutes": minutes,
+                })
+                next_item_id += 1
+                total += price
+                duration += minutes
+
+            therapist_confirmed_at = confirmed_at + timedelta(minutes=rng.uniform(1, 20))
+            service_start_at = therapist_confirmed_at + timedelta(minutes=rng.uniform(1, 10))
+            service_finish_at = service_start_at + timedelta(minutes=duration + rng.uniform(-5, 10))
+            cashier_claimed_at = service_finish_at + timedelta(minutes=rng.uniform(0.5, 10))
+            paid_at = cashier_claimed_at + timedelta(minutes=rng.uniform(0.5, 5))
+            amount_paid = float(-(-total // 100) * 100)  # Rounded up to the next 100
+
+            tx_rows.append({
+                "id": tx_id,
+                "code": f"{n % 9999 + 1:04d}",
+                "status": TransactionStatus.paid,
+                "therapist_id": therapist_id,
+                "room_number": room_number,
+                "assigned_cashier_id": cashier_id,
+                "total_amount": round(total, 2),
+                "total_duration_minutes": duration,
+                "created_at": confirmed_at,
+                "selection_confirmed_at": confirmed_at,
+                "therapist_confirmed_at": therapist_confirmed_at,
+                "service_start_at": service_start_at,
+                "service_finish_at": service_finish_at,
+                "cashier_claimed_at": cashier_claimed_at,
+                "paid_at": paid_at,
+            })
+            payment_rows.append({
+                "id": next_payment_id,
+                "transaction_id": tx_id,
+                "cashier_id": cashier_id,
+                "amount_due": round(total, 2),
+                "amount_paid": amount_paid,
+                "change_amount": round(amount_paid - total, 2),
+                "method": "cash",
+                "created_at": paid_at,
+            })
+            next_payment_id += 1
+
+            if len(tx_rows) >= chunk_size:
+                flush_chunk()
+        flush_chunk()
+
+        elapsed = time.perf_counter() - started
+        print(f"Generated {transactions} paid transactions over {days} days "
+              f"({len(therapist_rows)} therapists, {len(cashier_ids)} cashiers, {len(room_numbers)} rooms) "
+              f"in {elapsed:.1f}s")
+
+        # Bulk inserts bypass cashier_pay, so derive the daily rollups in one pass
+        started = time.perf_counter()
+        written = rebuild_rollups()
+        print(f"Rebuilt {written} daily rollup rows in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="SQLAlchemy URL overriding the MySQL settings in .env")
+    parser.add_argument("--generate", action="store_true", help="Also generate a synthetic load dataset")
+    parser.add_argument("--therapists", type=int, default=20)
+    parser.add_argument("--cashiers", type=int, default=6)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end-date", type=datetime.fromisoformat, default=None,
+                        help="Last day of generated history (YYYY-MM-DD), default today")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app import create_app
+    app = create_app()
+
+    seed_database(app)
+    if args.generate:
+        generate_dataset(
+            app,
+            therapists=args.therapists,
+            cashiers=args.cashiers,
+            rooms=args.rooms,
+            transactions=args.transactions,
+            days=args.days,
+            seed=args.seed,
+            end_date=args.end_date,
+            chunk_size=args.chunk_size,
+        )
+
+
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    main()
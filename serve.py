@@ -0,0 +1,133 @@
+"""
+Production entry point: a supervisor that runs SERVER_WORKERS worker processes.
+
+    python serve.py                          # settings from .env
+    python serve.py --workers 4 --port 5000 --async-mode eventlet
+
+Worker i listens on port + i with SOCKETIO_ASYNC_MODE (eventlet, gevent or
+threading; eventlet/gevent must be pip-installed). Workers share emits through
+SOCKETIO_MESSAGE_QUEUE, which is required when there is more than one. Socket.IO
+needs sticky sessions, so put the ports behind a load balancer that pins each
+client to one of them, e.g. nginx:
+
+    upstream spa { ip_hash; server 127.0.0.1:5000; server 127.0.0.1:5001; }
+
+Crashed workers are restarted; SIGINT/SIGTERM stops them all. Use run.py for
+development (debug + reloader).
+"""
+import os
+import sys
+
+if __name__ == "__main__" and "--worker" in sys.argv:
+    # Workers patch before anything else imports socket, threading or ssl. The
+    # supervisor has already loaded .env into the environment.
+    _async_mode = os.environ.get("SOCKETIO_ASYNC_MODE", "threading")
+    if _async_mode == "eventlet":
+        import eventlet
+        eventlet.monkey_patch()
+    elif _async_mode == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+
+import argparse
+import signal
+import subprocess
+import time
+
+ASYNC_MODES = ("eventlet", "gevent", "threading")
+
+
+def run_worker(host: str, port: int) -> None:
+    from app import create_app, socketio
+
+    app = create_app()
+    index = os.environ.get("SERVER_WORKER_INDEX", "0")
+    print(f"[INFO] Worker {index} (pid {os.getpid()}) serving on {host}:{port} with {socketio.async_mode}")
+    socketio.run(
+        app,
+        host=host,
+        port=port,
+        debug=False,
+        use_reloader=False,
+        log_output=False,
+        # Werkzeug refuses to run outside debug mode unless told this is deliberate
+        allow_unsafe_werkzeug=socketio.async_mode == "threading",
+    )
+
+
+def supervise(workers: int, host: str, port: int, async_mode: str) -> None:
+    env = {**os.environ, "SOCKETIO_ASYNC_MODE": async_mode}
+    processes: dict[int, subprocess.Popen] = {}
+    stopping = False
+
+    def spawn(index: int) -> None:
+        worker_env = {**env, "SERVER_WORKER_INDEX": str(index)}
+        if index > 0:
+            # Background jobs run once, in worker 0
+            worker_env["ARCHIVE_INTERVAL_SECONDS"] = "0"
+        processes[index] = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--host", host, "--port", str(port + index)],
+            env=worker_env,
+        )
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(workers):
+        spawn(index)
+    print(f"[INFO] Started {workers} {async_mode} worker(s) on ports {port}-{port + workers - 1}")
+
+    while not stopping:
+        time.sleep(1)
+        for index, process in list(processes.items()):
+            code = process.poll()
+            if code is not None and not stopping:
+                print(f"[WARNING] Worker {index} exited with {code}; restarting")
+                spawn(index)
+
+    print("[INFO] Stopping workers...")
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--async-mode", choices=ASYNC_MODES, default=None)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.host, args.port)
+        return
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    workers = args.workers or int(os.getenv("SERVER_WORKERS", "1"))
+    host = args.host or os.getenv("SERVER_HOST", "0.0.0.0")
+    port = args.port or int(os.getenv("SERVER_PORT", "5000"))
+    async_mode = args.async_mode or os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+    if async_mode not in ASYNC_MODES:
+        parser.error(f"SOCKETIO_ASYNC_MODE must be one of {', '.join(ASYNC_MODES)}")
+
+    message_queue = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+    if workers > 1 and (not message_queue or message_queue.startswith("local://")):
+        parser.error("more than one worker needs SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379/0)")
+
+    supervise(workers, host, port, async_mode)
+
+
+if __name__ == "__main__":
+    main()
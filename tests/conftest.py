@@ -0,0 +1,80 @@
+"""Shared fixtures: one app per test session, on a throwaway SQLite database"""
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import (
+    Cashier, Payment, Room, Service, ServiceCategory, ServiceClassification, Therapist,
+    Transaction, TransactionItem,
+)
+
+
+@pytest.fixture(scope="session")
+def database_url(tmp_path_factory):
+    return f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+
+
+@pytest.fixture(scope="session")
+def app(database_url):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATABASE_URL", database_url)
+        mp.setenv("ARCHIVE_INTERVAL_SECONDS", "0")
+        mp.setenv("LOG_LEVEL", "WARNING")
+        from app import create_app
+        app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture(scope="session")
+def catalog(app):
+    """Two therapists, a cashier, two rooms and three services with one classification each"""
+    with app.app_context():
+        category = ServiceCategory(category_name="Massage")
+        services = [
+            Service(category=category, service_name=name, classifications=[
+                ServiceClassification(classification_name="Regular", price=price, duration_minutes=minutes),
+            ])
+            for name, price, minutes in (("Swedish", 500.0, 60), ("Shiatsu", 650.0, 60), ("Foot Spa", 250.0, 30))
+        ]
+        therapists = [Therapist(username=f"t{n}", name=f"Therapist {n}", room_number=str(n)) for n in (1, 2)]
+        for therapist in therapists:
+            therapist.set_password("password123")
+        cashier = Cashier(username="c1", name="Cashier 1", counter_number="1")
+        cashier.set_password("password123")
+        rooms = [Room(room_number=str(n)) for n in (1, 2)]
+        db.session.add_all([category, *services, *therapists, cashier, *rooms])
+        db.session.commit()
+        return {
+            "services": [(s.id, s.classifications[0].id) for s in services],
+            "therapist_ids": [t.id for t in therapists],
+            "cashier_id": cashier.id,
+        }
+
+
+@pytest.fixture
+def clean_transactions(app):
+    """Delete the transactions a test created"""
+    yield
+    with app.app_context():
+        db.session.query(Payment).delete()
+        db.session.query(TransactionItem).delete()
+        db.session.query(Transaction).delete()
+        db.session.commit()
+
+
+@contextlib.contextmanager
+def count_statements(engine):
+    """Collect the SQL statements executed on `engine` inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,49 @@
+"""Archived ids are never handed out again by the live tables"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.archive import archive_paid_transactions, find_transaction
+from app.extensions import db
+from app.models import (
+    Payment, PaymentHistory, Transaction, TransactionHistory, TransactionItem, TransactionItemHistory,
+    TransactionStatus,
+)
+
+
+def add_paid(catalog):
+    service_id, classification_id = catalog["services"][0]
+    paid_at = datetime.now() - timedelta(hours=1)
+    tx = Transaction(code="0001", status=TransactionStatus.paid, paid_at=paid_at, total_amount=500.0)
+    tx.items.append(TransactionItem(
+        service_id=service_id, service_classification_id=classification_id, price=500.0, duration_minutes=60,
+    ))
+    tx.payment = Payment(cashier_id=catalog["cashier_id"], amount_due=500.0, amount_paid=500.0, created_at=paid_at)
+    db.session.add(tx)
+    db.session.commit()
+    return tx.id, tx.items[0].id, tx.payment.id
+
+
+@pytest.fixture
+def clean_history(app):
+    yield
+    with app.app_context():
+        for model in (PaymentHistory, TransactionItemHistory, TransactionHistory):
+            db.session.query(model).delete()
+        db.session.commit()
+
+
+def test_newest_archived_ids_are_not_reused(app, catalog, clean_transactions, clean_history):
+    with app.app_context():
+        archived = add_paid(catalog)
+        # Archives the newest row of every live table
+        assert archive_paid_transactions(older_than=timedelta(0)) == 1
+
+        fresh = add_paid(catalog)
+        assert all(new > old for new, old in zip(fresh, archived))
+        assert isinstance(find_transaction(archived[0]), TransactionHistory)
+        assert isinstance(find_transaction(fresh[0]), Transaction)
+
+        # The next batch copies into history without a primary-key collision
+        assert archive_paid_transactions(older_than=timedelta(0)) == 1
+        assert db.session.query(TransactionHistory).count() == 2
@@ -0,0 +1,83 @@
+"""Transaction codes stay unique when threads in several processes allocate at once"""
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.extensions import db
+from app.models import TransactionCounter
+from app.utils.code_allocator import code_allocator
+
+ROOT = Path(__file__).resolve().parent.parent
+PROCESSES = 4
+THREADS = 4
+CODES_PER_THREAD = 50
+BLOCK_SIZE = 3
+
+# Each process allocates from its own CodeAllocator, as a separate server worker would
+WORKER = f"""
+import json, os
+from concurrent.futures import ThreadPoolExecutor
+from app import create_app
+from app.utils.code_allocator import code_allocator
+
+app = create_app()
+
+def allocate(_):
+    with app.app_context():
+        return [code_allocator.allocate() for _ in range({CODES_PER_THREAD})]
+
+with ThreadPoolExecutor({THREADS}) as pool:
+    codes = [code for batch in pool.map(allocate, range({THREADS})) for code in batch]
+print("CODES " + json.dumps(codes))
+"""
+
+
+def reset_counter(app):
+    with app.app_context():
+        db.session.query(TransactionCounter).delete()
+        db.session.commit()
+    code_allocator.reset()
+
+
+def test_threads_get_distinct_codes(app, monkeypatch):
+    reset_counter(app)
+    monkeypatch.setitem(app.config, "TRANSACTION_CODE_BLOCK_SIZE", BLOCK_SIZE)
+
+    def allocate(_):
+        with app.app_context():
+            return [code_allocator.allocate() for _ in range(CODES_PER_THREAD)]
+
+    with ThreadPoolExecutor(8) as pool:
+        codes = [code for batch in pool.map(allocate, range(8)) for code in batch]
+
+    assert len(codes) == 8 * CODES_PER_THREAD
+    assert len(set(codes)) == len(codes)
+
+
+def test_processes_get_distinct_codes(app, database_url):
+    reset_counter(app)
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "ARCHIVE_INTERVAL_SECONDS": "0",
+        "LOG_LEVEL": "WARNING",
+        "TRANSACTION_CODE_BLOCK_SIZE": str(BLOCK_SIZE),
+        "TRANSACTION_CODE_RESET": "daily",
+    }
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER], cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+        for _ in range(PROCESSES)
+    ]
+    codes = []
+    for worker in workers:
+        out, _ = worker.communicate(timeout=120)
+        assert worker.returncode == 0
+        line = next(l for l in out.splitlines() if l.startswith("CODES "))
+        codes += json.loads(line[len("CODES "):])
+
+    # All allocated within today's period, far below the 9999 wrap-around
+    assert len(codes) == PROCESSES * THREADS * CODES_PER_THREAD
+    assert len(set(codes)) == len(codes)
@@ -0,0 +1,65 @@
+"""/monitor_snapshot runs the same statements however many transactions and items are active"""
+from datetime import datetime, timedelta
+from itertools import cycle
+
+from app.extensions import db
+from app.models import Transaction, TransactionItem, TransactionStatus
+from conftest import count_statements
+
+BOARD_STATUSES = (
+    TransactionStatus.pending_therapist,
+    TransactionStatus.therapist_confirmed,
+    TransactionStatus.in_service,
+    TransactionStatus.finished,
+    TransactionStatus.awaiting_payment,
+)
+
+
+def add_transactions(catalog, count, items_per_transaction):
+    now = datetime.now()
+    services = cycle(catalog["services"])
+    therapists = cycle(catalog["therapist_ids"])
+    statuses = cycle(BOARD_STATUSES)
+    for n in range(count):
+        at = now - timedelta(minutes=count - n)
+        tx = Transaction(
+            code=f"{n + 1:04d}",
+            status=next(statuses),
+            therapist_id=next(therapists),
+            assigned_cashier_id=catalog["cashier_id"],
+            room_number="1",
+            selection_confirmed_at=at, therapist_confirmed_at=at, service_start_at=at,
+            service_finish_at=at, cashier_claimed_at=at,
+        )
+        for _ in range(items_per_transaction):
+            service_id, classification_id = next(services)
+            tx.items.append(TransactionItem(
+                service_id=service_id, service_classification_id=classification_id, price=100.0, duration_minutes=30,
+            ))
+        db.session.add(tx)
+    db.session.commit()
+
+
+def snapshot_statements(app, client):
+    with app.app_context():
+        engine = db.engine
+    with count_statements(engine) as statements:
+        response = client.get("/monitor_snapshot/")
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+
+def test_statement_count_does_not_grow_with_items(app, catalog, clean_transactions):
+    client = app.test_client()
+    with app.app_context():
+        add_transactions(catalog, count=1, items_per_transaction=1)
+    single, body = snapshot_statements(app, client)
+    assert sum(len(column) for column in body.values()) == 1
+
+    with app.app_context():
+        add_transactions(catalog, count=40, items_per_transaction=5)
+    many, body = snapshot_statements(app, client)
+    assert sum(len(column) for column in body.values()) == 41
+    assert sum(len(t["selected_services"]) for column in body.values() for t in column) == 201
+
+    assert many == single, (single, many)
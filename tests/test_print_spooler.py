@@ -0,0 +1,60 @@
+"""Print spooler against a printer that drops its connection after each receipt, and job ownership"""
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Cashier
+from app.utils.print_spooler import PrintSpooler, print_spooler
+
+
+def test_reconnects_when_the_printer_closed_the_warm_connection():
+    server = socket.create_server(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    received: list[bytes] = []
+    closed = threading.Semaphore(0)
+
+    def serve():
+        # One read per connection, then close it like a printer's idle timeout
+        for _ in range(2):
+            conn, _ = server.accept()
+            with conn:
+                received.append(conn.recv(65536))
+            closed.release()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+
+    spooler = PrintSpooler(timeout=2, backoff=0.05)
+    done = []
+    for payload in (b'first receipt', b'second receipt'):
+        finished = threading.Event()
+        job = spooler.submit('127.0.0.1', port, payload, on_done=lambda job: finished.set())
+        assert finished.wait(5)
+        assert closed.acquire(timeout=5)
+        done.append(job)
+
+    thread.join(5)
+    server.close()
+    assert [job.status for job in done] == ['done', 'done']
+    assert received == [b'first receipt', b'second receipt']
+
+
+def test_print_job_status_only_for_the_submitting_cashier(app, catalog):
+    with app.app_context():
+        owner = db.session.get(Cashier, catalog["cashier_id"])
+        other = Cashier(username="c-print", name="Cashier Print", counter_number="9")
+        other.set_password("password123")
+        db.session.add(other)
+        for n, cashier in enumerate((owner, other)):
+            cashier.auth_token = f"print-token-{n}"
+            cashier.token_expires_at = datetime.now() + timedelta(hours=1)
+        db.session.commit()
+        owner_id = owner.id
+
+    # Nothing listens on the port; the job's outcome does not matter here
+    job = print_spooler.submit('127.0.0.1', 9, b'receipt', owner_id=owner_id)
+    client = app.test_client()
+    url = f"/cashier/print-jobs/{job.id}"
+    assert client.get(url, headers={"X-Auth-Token": "print-token-0"}).status_code == 200
+    assert client.get(url, headers={"X-Auth-Token": "print-token-1"}).status_code == 404
@@ -0,0 +1,79 @@
+"""Daily rollups: single-statement upsert and transaction measures per service"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions import db
+from app.models import DailyRollup
+from app.rollups import accumulate, apply_rollups, rollup_report
+from conftest import count_statements
+
+PAID_AT = datetime(2026, 3, 2, 15, 0)
+
+
+def paid(therapist_id, wait_minutes):
+    confirmed = PAID_AT - timedelta(minutes=wait_minutes + 70)
+    started = confirmed + timedelta(minutes=wait_minutes)
+    finished = started + timedelta(minutes=60)
+    return SimpleNamespace(
+        therapist_id=therapist_id, selection_confirmed_at=confirmed, service_start_at=started,
+        service_finish_at=finished, paid_at=PAID_AT,
+    )
+
+
+def record(tx, cashier_id, items):
+    rollups = {}
+    accumulate(rollups, tx, cashier_id, items)
+    apply_rollups(rollups)
+    db.session.commit()
+
+
+@pytest.fixture
+def clean_rollups(app):
+    yield
+    with app.app_context():
+        db.session.query(DailyRollup).delete()
+        db.session.commit()
+
+
+def test_each_payment_is_one_upsert(app, catalog, clean_rollups):
+    (swedish, _), (shiatsu, _), _ = catalog["services"]
+    therapist = catalog["therapist_ids"][0]
+    with app.app_context():
+        for _ in range(2):
+            # Second round hits existing keys: still a single statement, adding to the rows
+            with count_statements(db.engine) as statements:
+                record(paid(therapist, 10), catalog["cashier_id"], [(swedish, 500.0, 60), (shiatsu, 650.0, 60)])
+            assert len([s for s in statements if s.lstrip().upper().startswith("INSERT")]) == 1
+
+        (day,) = rollup_report(None, None, ["day"])
+        assert day["transaction_count"] == 2
+        assert day["item_count"] == 4
+        assert day["revenue"] == 2300.0
+
+
+def test_transaction_measures_by_service(app, catalog, clean_rollups):
+    (swedish, _), (shiatsu, _), (foot_spa, _) = catalog["services"]
+    therapist = catalog["therapist_ids"][0]
+    with app.app_context():
+        record(paid(therapist, 10), catalog["cashier_id"], [(swedish, 500.0, 60), (foot_spa, 250.0, 30)])
+        record(paid(therapist, 20), catalog["cashier_id"], [(shiatsu, 650.0, 60), (foot_spa, 250.0, 30),
+                                                           (foot_spa, 250.0, 30)])
+
+        by_service = {row["service_name"]: row for row in rollup_report(None, None, ["service"])}
+        assert {name: row["transaction_count"] for name, row in by_service.items()} == {
+            "Swedish": 1, "Shiatsu": 1, "Foot Spa": 2,
+        }
+        assert by_service["Foot Spa"]["item_count"] == 3
+        assert by_service["Swedish"]["avg_wait_minutes"] == 10
+        assert by_service["Shiatsu"]["avg_wait_minutes"] == 20
+        assert by_service["Foot Spa"]["avg_wait_minutes"] == 15
+
+        # Without the service dimension each transaction counts once
+        (day,) = rollup_report(None, None, ["day"])
+        assert day["transaction_count"] == 2
+        assert day["item_count"] == 5
+        assert day["avg_wait_minutes"] == 15
+        (row,) = rollup_report(None, None, ["therapist", "cashier"])
+        assert row["transaction_count"] == 2
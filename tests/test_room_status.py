@@ -0,0 +1,28 @@
+"""/room_status cache is dropped by changes from other workers, loaded board or not"""
+from app.extensions import db
+from app.models import Room
+from app.monitor_state import monitor_board
+
+
+def room_statuses(client):
+    return {room['room_number']: room['status'] for room in client.get('/room_status/').get_json()['rooms']}
+
+
+def test_remote_change_clears_cache_while_board_unloaded(app, catalog):
+    client = app.test_client()
+    monitor_board.invalidate()
+    assert room_statuses(client)['1'] == 'available'
+
+    # Another worker put room 1 on break; this worker's board is not loaded
+    with app.app_context():
+        room = Room.query.filter_by(room_number='1').one()
+        room.status = 'preparing'
+        db.session.commit()
+    try:
+        monitor_board.apply_remote({'op': 'room', 'room_number': '1', 'status': 'preparing'})
+        assert room_statuses(client)['1'] == 'preparing'
+    finally:
+        with app.app_context():
+            Room.query.filter_by(room_number='1').one().status = 'available'
+            db.session.commit()
+        monitor_board.invalidate()
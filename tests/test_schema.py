@@ -0,0 +1,83 @@
+"""Startup against a database created by an older version of the models"""
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP = """
+from app import create_app
+app = create_app()
+print("STARTED")
+"""
+
+
+def start(database):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}", "ARCHIVE_INTERVAL_SECONDS": "0",
+           "DB_SCHEMA_MODE": "check"}
+    return subprocess.run([sys.executable, "-c", STARTUP], cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def stored_versions(database):
+    with sqlite3.connect(database) as conn:
+        return conn.execute("SELECT version FROM schema_version").fetchall()
+
+
+def test_missing_columns_stop_startup_until_migrated(tmp_path):
+    database = tmp_path / "old.db"
+    with sqlite3.connect(database) as conn:
+        # transaction_counter as it was before the daily-reset `period` column
+        conn.execute("CREATE TABLE transaction_counter (id INTEGER PRIMARY KEY, next_number INTEGER NOT NULL)")
+        conn.execute("INSERT INTO transaction_counter VALUES (1, 42)")
+
+    for _ in range(2):
+        # Refused on every boot, and no version is recorded in between
+        result = start(database)
+        assert result.returncode != 0
+        assert "SchemaMigrationRequired" in result.stderr
+        assert "ALTER TABLE transaction_counter ADD COLUMN period DATE" in result.stderr
+        assert stored_versions(database) == []
+
+    with sqlite3.connect(database) as conn:
+        conn.execute("ALTER TABLE transaction_counter ADD COLUMN period DATE")
+    result = start(database)
+    assert result.returncode == 0, result.stderr
+    assert "STARTED" in result.stdout
+    assert len(stored_versions(database)) == 1
+
+
+def test_missing_indexes_are_reported_on_every_boot(tmp_path):
+    database = tmp_path / "old.db"
+    assert start(database).returncode == 0
+    with sqlite3.connect(database) as conn:
+        conn.execute("DROP INDEX ix_transactions_status_service_finish_at")
+        conn.execute("DELETE FROM schema_version")
+
+    for _ in range(2):
+        result = start(database)
+        assert result.returncode == 0, result.stderr
+        assert "ix_transactions_status_service_finish_at" in result.stdout + result.stderr
+        assert stored_versions(database) == []
+
+
+def test_stale_unique_index_stops_startup_until_dropped(tmp_path):
+    database = tmp_path / "old.db"
+    assert start(database).returncode == 0
+    with sqlite3.connect(database) as conn:
+        # transactions.code as it was before codes could repeat
+        conn.execute("CREATE UNIQUE INDEX code ON transactions (code)")
+        conn.execute("DELETE FROM schema_version")
+
+    result = start(database)
+    assert result.returncode != 0
+    assert "SchemaMigrationRequired" in result.stderr
+    assert "DROP INDEX code" in result.stderr
+    assert stored_versions(database) == []
+
+    with sqlite3.connect(database) as conn:
+        conn.execute("DROP INDEX code")
+    result = start(database)
+    assert result.returncode == 0, result.stderr
+    assert len(stored_versions(database)) == 1
@@ -0,0 +1,23 @@
+"""Cold-start budget: create_app() plus the first request in a fresh interpreter"""
+import importlib.util
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+spec = importlib.util.spec_from_file_location("check_startup", ROOT / "scripts" / "check_startup.py")
+check_startup = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(check_startup)
+
+
+def test_cold_start_within_budget(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'startup.db'}")
+    monkeypatch.setenv("LOG_LEVEL", "WARNING")
+    # The first start applies the schema; the budget covers the "check" path every restart takes
+    assert check_startup.measure()["status"] == 200
+
+    runs = [check_startup.measure() for _ in range(3)]
+    assert all(run["status"] == 200 for run in runs)
+    best = min(run["total_ms"] for run in runs)
+    assert best < check_startup.STARTUP_BUDGET_MS, (
+        f"cold start {best:.0f}ms exceeds budget {check_startup.STARTUP_BUDGET_MS:.0f}ms"
+    )
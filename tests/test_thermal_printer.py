@@ -0,0 +1,76 @@
+"""ESC/POS receipt bytes, as received by a fake printer listening on a local socket"""
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.utils.thermal_printer import ThermalPrinter
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+RECEIPT = {
+    'code': 'A-0042',
+    'therapist_name': 'Maria Santos',
+    'room_number': '3',
+    'services': [
+        {'name': 'Swedish Massage', 'duration_minutes': 60, 'price': 650.0},
+        {'name': 'Foot Spa', 'duration_minutes': 30, 'price': 250.5},
+    ],
+    'total_amount': 900.5,
+    'amount_paid': 1000.0,
+    'change_amount': 99.5,
+    'payment_method': 'cash',
+    'payment_date': '2026-10-18 14:05:00',
+}
+
+
+class FakePrinter:
+    """Accepts connections and records the bytes received on each one"""
+
+    def __init__(self):
+        self._server = socket.create_server(('127.0.0.1', 0))
+        self.port = self._server.getsockname()[1]
+        self.connections: list[bytes] = []
+        self._received = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn:
+                data = bytearray()
+                while chunk := conn.recv(65536):
+                    data += chunk
+            self.connections.append(bytes(data))
+            self._received.set()
+
+    def wait(self, timeout=5):
+        assert self._received.wait(timeout), "printer received nothing"
+
+    def close(self):
+        self._server.close()
+
+
+@pytest.fixture
+def printer():
+    fake = FakePrinter()
+    yield fake
+    fake.close()
+
+
+def test_receipt_is_sent_in_one_connection_byte_for_byte(printer):
+    # receipt.bin was captured from the original one-connection-per-command printer
+    expected = (FIXTURES / "receipt.bin").read_bytes()
+
+    assert ThermalPrinter('127.0.0.1', printer.port).print_receipt(RECEIPT) is True
+    printer.wait()
+
+    assert printer.connections == [expected]
+
+
+def test_build_receipt_matches_fixture():
+    assert ThermalPrinter.build_receipt(RECEIPT) == (FIXTURES / "receipt.bin").read_bytes()
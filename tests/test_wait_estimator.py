@@ -0,0 +1,50 @@
+"""Expected waits: staffed rooms only, recomputed only when the queue or rooms change"""
+from datetime import datetime
+
+from app.wait_estimator import WaitEstimator
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+def entry(tx_id, status, minutes=60, room_number=None, order_at=NOW):
+    return {
+        'id': tx_id, 'status': status, 'total_duration_minutes': minutes, 'room_number': room_number,
+        'order_at': order_at.isoformat(), 'service_start_at': None,
+    }
+
+
+def test_only_rooms_with_a_logged_in_therapist_serve():
+    estimator = WaitEstimator(default_delay=0)
+    estimator.load([entry(1, 'pending_therapist'), entry(2, 'pending_therapist')],
+                   {'1': 'available', '2': 'available'}, {10: '1'})
+    waits = [e['wait_minutes'] for e in estimator.estimates(NOW)]
+    # Room 2 is idle but unstaffed, so the second customer waits for room 1
+    assert waits == [0, 60]
+
+    estimator.set_therapist(20, '2')
+    assert [e['wait_minutes'] for e in estimator.estimates(NOW)] == [0, 0]
+
+    estimator.set_therapist(10, None)
+    estimator.set_therapist(20, None)
+    assert [e['wait_minutes'] for e in estimator.estimates(NOW)] == [None, None]
+
+
+def test_changed_only_by_queue_and_room_changes():
+    estimator = WaitEstimator()
+    estimator.load([entry(1, 'pending_therapist')], {'1': 'available'}, {10: '1'})
+    assert estimator.take_changed()
+    assert not estimator.take_changed()
+
+    # Payment-side moves and unchanged room statuses leave the estimates alone
+    estimator.update(entry(5, 'finished', room_number='1'), entry(5, 'awaiting_payment', room_number='1'))
+    estimator.set_room('1', 'available')
+    estimator.set_therapist(10, '1')
+    assert not estimator.take_changed()
+
+    estimator.update(None, entry(2, 'pending_therapist'))
+    assert estimator.take_changed()
+    estimator.set_room('1', 'preparing')
+    assert estimator.take_changed()
+    estimator.update(entry(1, 'pending_therapist'), entry(1, 'therapist_confirmed', room_number='1'))
+    assert estimator.take_changed()
+    assert [e['id'] for e in estimator.estimates(NOW)] == [2]